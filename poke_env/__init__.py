@@ -1,6 +1,7 @@
 """poke_env module init.
 """
 import logging
+import poke_env.damage as damage
 import poke_env.environment as environment
 import poke_env.exceptions as exceptions
 import poke_env.player as player
@@ -31,6 +32,7 @@ __all__ = [
     "ShowdownException",
     "ShowdownServerConfiguration",
     "compute_raw_stats",
+    "damage",
     "environment",
     "exceptions",
     "gen_data",
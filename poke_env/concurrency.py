@@ -2,8 +2,10 @@ import asyncio
 import atexit
 import sys
 from logging import CRITICAL, disable
-from threading import Thread
-from typing import Any, List
+from threading import Lock, Thread
+from typing import Any, Awaitable, Dict, List, TypeVar
+
+T = TypeVar("T")
 
 
 def __run_loop(loop: asyncio.AbstractEventLoop):
@@ -65,6 +67,129 @@ async def handle_threaded_coroutines(coro: Any):
     return task.result()
 
 
+async def run_in_poke_loop(coro: Awaitable[T]) -> T:
+    """Awaits a coroutine in POKE_LOOP, from any event loop. Objects bound to
+    POKE_LOOP, such as the websocket or asyncio synchronization primitives created
+    with create_in_poke_loop, must only be used through this function from other
+    loops.
+
+    :param coro: The coroutine.
+    :type coro: Awaitable
+    :return: The coroutine's result.
+    """
+    if asyncio.get_running_loop() is POKE_LOOP:
+        return await coro
+    return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coro, POKE_LOOP))
+
+
+class LoopWorkerPool:
+    """Event loops running in daemon threads, to which coroutines are routed by
+    key.
+
+    Each key is assigned to the least loaded worker the first time it is used, and
+    stays on it until released, so that coroutines sharing a key run in one loop,
+    in submission order. Players use it to parse battle messages and decide moves
+    outside of POKE_LOOP, which then only handles websocket I/O.
+
+    Workers are threads: pure python work still contends for the GIL, so they
+    mostly help when decisions release it - numpy, model calls or blocking I/O -
+    and keep POKE_LOOP responsive otherwise. Use processes, with one client each,
+    to scale pure python work across cores, eg. with run_sharded_battles.
+
+    :param n_workers: The number of workers.
+    :type n_workers: int
+    :param name: Prefix of the workers' thread names.
+    :type name: str
+    """
+
+    def __init__(self, n_workers: int, name: str = "poke-env-worker"):
+        if n_workers < 1:
+            raise ValueError(f"Expected at least one worker, got {n_workers}")
+        self._loops: List[asyncio.AbstractEventLoop] = []
+        self._threads: List[Thread] = []
+        self._loads: List[int] = [0] * n_workers
+        self._assignments: Dict[Any, int] = {}
+        self._lock = Lock()
+
+        for i in range(n_workers):
+            loop = asyncio.new_event_loop()
+            thread = Thread(
+                target=_run_worker_loop, args=(loop,), name=f"{name}-{i}", daemon=True
+            )
+            thread.start()
+            self._loops.append(loop)
+            self._threads.append(thread)
+        atexit.register(self.close)
+
+    def __len__(self) -> int:
+        return len(self._loops)
+
+    def loop_for(self, key: Any) -> asyncio.AbstractEventLoop:
+        """Returns the event loop of the worker a key is assigned to, assigning it
+        if needed.
+
+        :param key: The key, eg. a battle tag.
+        :return: The worker's event loop.
+        :rtype: asyncio.AbstractEventLoop
+        """
+        with self._lock:
+            worker = self._assignments.get(key)
+            if worker is None:
+                worker = self._loads.index(min(self._loads))
+                self._assignments[key] = worker
+                self._loads[worker] += 1
+        return self._loops[worker]
+
+    def release(self, key: Any):
+        """Releases a key, which no longer counts towards its worker's load.
+
+        :param key: The key.
+        """
+        with self._lock:
+            worker = self._assignments.pop(key, None)
+            if worker is not None:
+                self._loads[worker] -= 1
+
+    async def run(self, key: Any, coro: Awaitable[T]) -> T:
+        """Awaits a coroutine in the worker a key is assigned to.
+
+        :param key: The key.
+        :param coro: The coroutine.
+        :type coro: Awaitable
+        :return: The coroutine's result.
+        """
+        loop = self.loop_for(key)
+        if asyncio.get_running_loop() is loop:
+            return await coro
+        return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coro, loop))
+
+    def close(self):
+        """Stops the workers. Pending coroutines are cancelled."""
+        for loop, thread in zip(self._loops, self._threads):
+            if not loop.is_closed() and thread.is_alive():
+                _stop_worker_loop(loop, thread)
+        atexit.unregister(self.close)
+
+
+def _run_worker_loop(loop: asyncio.AbstractEventLoop):
+    __run_loop(loop)
+
+
+def _stop_worker_loop(loop: asyncio.AbstractEventLoop, thread: Thread):
+    async def cancel_tasks():
+        current = asyncio.current_task()
+        tasks = [task for task in asyncio.all_tasks() if task is not current]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await loop.shutdown_asyncgens()
+
+    asyncio.run_coroutine_threadsafe(cancel_tasks(), loop).result()
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join()
+    loop.close()
+
+
 POKE_LOOP = asyncio.new_event_loop()
 py_ver = sys.version_info
 _t = Thread(target=__run_loop, args=(POKE_LOOP,), daemon=True)
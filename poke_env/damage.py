@@ -0,0 +1,376 @@
+"""This module contains utility functions estimating the damage dealt by moves.
+
+Damage is computed with the games' formula, without intermediate rounding:
+estimates are within a few HP of the actual values. Stats are read from requests
+for the player's pokemons, and estimated from base stats for the opponent's. STAB,
+type effectiveness, boosts, weather, burn, and the most common damage-modifying
+items and abilities are taken into account, when known. Critical hits, screens and
+field effects are not.
+"""
+
+from typing import Dict, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+from poke_env.data.type_matchup import TypeMatchup
+from poke_env.environment.move import Move
+from poke_env.environment.move_category import MoveCategory
+from poke_env.environment.pokemon import Pokemon
+from poke_env.environment.pokemon_type import PokemonType
+from poke_env.environment.status import Status
+from poke_env.environment.weather import Weather
+
+STAT_BOOST_MULTIPLIERS: Dict[int, float] = {
+    level: (2 + level) / 2 if level >= 0 else 2 / (2 - level) for level in range(-6, 7)
+}
+ACCURACY_BOOST_MULTIPLIERS: Dict[int, float] = {
+    level: (3 + level) / 3 if level >= 0 else 3 / (3 - level) for level in range(-6, 7)
+}
+
+# Lowest damage roll. The highest one is 1
+MIN_ROLL = 0.85
+
+# Multipliers of the defender's ability on moves of a given type
+_DEFENDER_ABILITY_TYPE_MULTIPLIERS: Dict[str, Dict[PokemonType, float]] = {
+    "dryskin": {PokemonType.WATER: 0, PokemonType.FIRE: 1.25},
+    "eartheater": {PokemonType.GROUND: 0},
+    "flashfire": {PokemonType.FIRE: 0},
+    "heatproof": {PokemonType.FIRE: 0.5},
+    "levitate": {PokemonType.GROUND: 0},
+    "lightningrod": {PokemonType.ELECTRIC: 0},
+    "motordrive": {PokemonType.ELECTRIC: 0},
+    "purifyingsalt": {PokemonType.GHOST: 0.5},
+    "sapsipper": {PokemonType.GRASS: 0},
+    "stormdrain": {PokemonType.WATER: 0},
+    "thickfat": {PokemonType.FIRE: 0.5, PokemonType.ICE: 0.5},
+    "voltabsorb": {PokemonType.ELECTRIC: 0},
+    "waterabsorb": {PokemonType.WATER: 0},
+    "wellbakedbody": {PokemonType.FIRE: 0},
+}
+_SUPER_EFFECTIVE_REDUCING_ABILITIES = {"filter", "prismarmor", "solidrock"}
+_FULL_HP_REDUCING_ABILITIES = {"multiscale", "shadowshield"}
+
+_SUN = {Weather.SUNNYDAY, Weather.DESOLATELAND}
+_RAIN = {Weather.RAINDANCE, Weather.PRIMORDIALSEA}
+
+
+class DamageRange(NamedTuple):
+    """The lowest and highest damage of a move, in HP."""
+
+    min: float
+    max: float
+
+
+def boost_multiplier(stat: str, level: int) -> float:
+    """Returns the multiplier of a stat boost.
+
+    :param stat: The boosted stat, eg. `atk` or `accuracy`.
+    :type stat: str
+    :param level: The boost level, from -6 to 6.
+    :type level: int
+    :return: The multiplier.
+    :rtype: float
+    """
+    if stat in ("accuracy", "evasion"):
+        return ACCURACY_BOOST_MULTIPLIERS[level]
+    return STAT_BOOST_MULTIPLIERS[level]
+
+
+def estimate_stats(pokemon: Pokemon) -> Dict[str, int]:
+    """Returns the stats of a pokemon: the actual ones when they are known, or
+    estimates computed from its base stats and level otherwise.
+
+    :param pokemon: The pokemon.
+    :type pokemon: Pokemon
+    :return: The stats, including hp.
+    :rtype: Dict[str, int]
+    """
+    stats = pokemon.stats
+    if stats and None not in stats.values():
+        return {"hp": pokemon.max_hp, **stats}  # type: ignore
+    return pokemon.calculate_stats()
+
+
+def boosted_stat(
+    pokemon: Pokemon, stat: str, stats: Optional[Dict[str, int]] = None
+) -> float:
+    """
+    :param pokemon: The pokemon.
+    :type pokemon: Pokemon
+    :param stat: The stat.
+    :type stat: str
+    :param stats: The pokemon's stats. Defaults to the ones given by estimate_stats.
+    :type stats: Dict[str, int], optional
+    :return: The pokemon's stat times its boost multiplier.
+    :rtype: float
+    """
+    if stats is None:
+        stats = estimate_stats(pokemon)
+    return stats[stat] * boost_multiplier(stat, pokemon.boosts[stat])
+
+
+def calculate_damage(
+    attacker: Pokemon,
+    defender: Pokemon,
+    move: Move,
+    gen: int,
+    weather: Optional[Weather] = None,
+) -> DamageRange:
+    """Estimates the damage dealt by a move.
+
+    :param attacker: The attacking pokemon.
+    :type attacker: Pokemon
+    :param defender: The defending pokemon.
+    :type defender: Pokemon
+    :param move: The move.
+    :type move: Move
+    :param gen: The generation, which sets the type chart.
+    :type gen: int
+    :param weather: The current weather, if any.
+    :type weather: Weather, optional
+    :return: The lowest and highest damage, in HP. Both are 0 for status moves.
+    :rtype: DamageRange
+    """
+    if not _is_damaging(move):
+        return DamageRange(0, 0)
+
+    offensive_stat = _offensive_stat(move)
+    if _uses_target_offense(move):
+        attack = boosted_stat(defender, offensive_stat)
+    else:
+        attack = _attack_stat(attacker, estimate_stats(attacker), offensive_stat)
+    defense = _defense_stat(
+        defender, estimate_stats(defender), _defensive_stat(move), weather
+    )
+
+    effectiveness = TypeMatchup.from_gen(gen).multiplier(move.type, *defender.types)
+    damage = (
+        _base_damage(attacker.level, _power(attacker, move), attack, defense)
+        * _move_modifier(attacker, move, weather)
+        * _defender_modifier(defender)
+        * _DEFENDER_ABILITY_TYPE_MULTIPLIERS.get(defender.ability, {}).get(  # type: ignore
+            move.type, 1
+        )
+        * effectiveness
+    )
+
+    if effectiveness > 1:
+        if defender.ability in _SUPER_EFFECTIVE_REDUCING_ABILITIES:
+            damage *= 0.75
+        if attacker.item == "expertbelt":
+            damage *= 1.2
+    else:
+        if 0 < effectiveness < 1 and attacker.ability == "tintedlens":
+            damage *= 2
+        if defender.ability == "wonderguard":
+            damage = 0
+    return DamageRange(MIN_ROLL * damage, damage)
+
+
+def calculate_damages(
+    attacker: Pokemon,
+    moves: Sequence[Move],
+    defenders: Sequence[Pokemon],
+    gen: int,
+    weather: Optional[Weather] = None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Estimates the damage dealt by each of an attacker's moves on each defender,
+    as calculate_damage does, in a single vectorized computation.
+
+    :param attacker: The attacking pokemon.
+    :type attacker: Pokemon
+    :param moves: The K moves.
+    :type moves: Sequence[Move]
+    :param defenders: The M defending pokemons.
+    :type defenders: Sequence[Pokemon]
+    :param gen: The generation, which sets the type chart.
+    :type gen: int
+    :param weather: The current weather, if any.
+    :type weather: Weather, optional
+    :return: Two (K, M) arrays, holding the lowest and highest damages in HP.
+    :rtype: Tuple[np.ndarray, np.ndarray]
+    """
+    n_moves, n_defenders = len(moves), len(defenders)
+    power = np.array(
+        [_power(attacker, move) if _is_damaging(move) else 0 for move in moves],
+        dtype=np.float64,
+    )
+    move_modifier = np.array(
+        [_move_modifier(attacker, move, weather) for move in moves], dtype=np.float64
+    )
+
+    # Defensive stats are computed once per defender. Offensive stats only depend
+    # on the defender for a few moves, such as Foul Play
+    attacker_stats = estimate_stats(attacker)
+    defenders_stats = [estimate_stats(mon) for mon in defenders]
+    defenses = {
+        stat: [
+            _defense_stat(mon, mon_stats, stat, weather)
+            for mon, mon_stats in zip(defenders, defenders_stats)
+        ]
+        for stat in ("def", "spd")
+    }
+    attack = np.ones((n_moves, n_defenders))
+    defense = np.ones((n_moves, n_defenders))
+    for i, move in enumerate(moves):
+        if not power[i]:
+            continue
+        offensive_stat = _offensive_stat(move)
+        if _uses_target_offense(move):
+            attack[i] = [
+                boosted_stat(mon, offensive_stat, mon_stats)
+                for mon, mon_stats in zip(defenders, defenders_stats)
+            ]
+        else:
+            attack[i] = _attack_stat(attacker, attacker_stats, offensive_stat)
+        defense[i] = defenses[_defensive_stat(move)]
+
+    effectiveness = TypeMatchup.from_gen(gen).multipliers(
+        [move.type for move in moves], defenders
+    )
+    ability_multipliers = np.ones((n_moves, n_defenders))
+    for j, mon in enumerate(defenders):
+        type_multipliers = _DEFENDER_ABILITY_TYPE_MULTIPLIERS.get(
+            mon.ability, {}  # type: ignore
+        )
+        if type_multipliers:
+            ability_multipliers[:, j] = [
+                type_multipliers.get(move.type, 1) for move in moves
+            ]
+    defender_modifier = np.array([_defender_modifier(mon) for mon in defenders])
+
+    super_effective = effectiveness > 1
+    not_very_effective = (effectiveness > 0) & (effectiveness < 1)
+    reduces_super_effective = np.array(
+        [mon.ability in _SUPER_EFFECTIVE_REDUCING_ABILITIES for mon in defenders],
+        dtype=bool,
+    )
+    wonder_guard = np.array(
+        [mon.ability == "wonderguard" for mon in defenders], dtype=bool
+    )
+    effectiveness_modifier = np.where(
+        super_effective & reduces_super_effective, 0.75, 1.0
+    )
+    if attacker.item == "expertbelt":
+        effectiveness_modifier[super_effective] *= 1.2
+    if attacker.ability == "tintedlens":
+        effectiveness_modifier[not_very_effective] *= 2
+    effectiveness_modifier[~super_effective & wonder_guard] = 0
+
+    damage = (
+        _base_damage(attacker.level, power[:, None], attack, defense)
+        * move_modifier[:, None]
+        * defender_modifier
+        * ability_multipliers
+        * effectiveness
+        * effectiveness_modifier
+    )
+    damage[power == 0] = 0
+    return MIN_ROLL * damage, damage
+
+
+def _is_damaging(move: Move) -> bool:
+    return move.category != MoveCategory.STATUS and move.base_power > 0
+
+
+def _base_damage(level, power, attack, defense):
+    # Works on floats and arrays alike
+    return (2 * level / 5 + 2) * power * attack / defense / 50 + 2
+
+
+def _power(attacker: Pokemon, move: Move) -> float:
+    if attacker.ability == "technician" and move.base_power <= 60:
+        return move.base_power * 1.5
+    return move.base_power
+
+
+def _offensive_stat(move: Move) -> str:
+    return move.entry.get("overrideOffensiveStat") or (
+        "atk" if move.category == MoveCategory.PHYSICAL else "spa"
+    )
+
+
+def _defensive_stat(move: Move) -> str:
+    return move.entry.get("overrideDefensiveStat") or (
+        "def" if move.category == MoveCategory.PHYSICAL else "spd"
+    )
+
+
+def _uses_target_offense(move: Move) -> bool:
+    return move.entry.get("overrideOffensivePokemon") == "target"
+
+
+def _attack_stat(attacker: Pokemon, stats: Dict[str, int], stat: str) -> float:
+    value = boosted_stat(attacker, stat, stats)
+    if stat == "atk":
+        if attacker.ability in ("hugepower", "purepower"):
+            value *= 2
+        elif attacker.ability == "hustle" or (
+            attacker.ability == "guts" and attacker.status is not None
+        ):
+            value *= 1.5
+        if attacker.item == "choiceband":
+            value *= 1.5
+    elif stat == "spa" and attacker.item == "choicespecs":
+        value *= 1.5
+    return value
+
+
+def _defense_stat(
+    defender: Pokemon,
+    stats: Dict[str, int],
+    stat: str,
+    weather: Optional[Weather] = None,
+) -> float:
+    value = boosted_stat(defender, stat, stats)
+    if stat == "def":
+        if defender.ability == "furcoat":
+            value *= 2
+        if weather == Weather.SNOW and PokemonType.ICE in defender.types:
+            value *= 1.5
+    else:
+        if defender.item == "assaultvest":
+            value *= 1.5
+        if weather == Weather.SANDSTORM and PokemonType.ROCK in defender.types:
+            value *= 1.5
+    if defender.item == "eviolite":
+        value *= 1.5
+    return value
+
+
+def _move_modifier(
+    attacker: Pokemon, move: Move, weather: Optional[Weather] = None
+) -> float:
+    modifier = 1.0
+    if move.type in attacker.types:
+        modifier *= 2 if attacker.ability == "adaptability" else 1.5
+
+    if weather in _SUN:
+        if move.type == PokemonType.FIRE:
+            modifier *= 1.5
+        elif move.type == PokemonType.WATER:
+            modifier *= 0 if weather == Weather.DESOLATELAND else 0.5
+    elif weather in _RAIN:
+        if move.type == PokemonType.WATER:
+            modifier *= 1.5
+        elif move.type == PokemonType.FIRE:
+            modifier *= 0 if weather == Weather.PRIMORDIALSEA else 0.5
+
+    if (
+        attacker.status == Status.BRN
+        and move.category == MoveCategory.PHYSICAL
+        and attacker.ability != "guts"
+    ):
+        modifier *= 0.5
+    if attacker.item == "lifeorb":
+        modifier *= 1.3
+    return modifier
+
+
+def _defender_modifier(defender: Pokemon) -> float:
+    if (
+        defender.ability in _FULL_HP_REDUCING_ABILITIES
+        and defender.current_hp_fraction == 1
+    ):
+        return 0.5
+    return 1.0
@@ -1,9 +1,15 @@
 from poke_env.data.gen_data import GenData
+from poke_env.data.knowledge_base import KnowledgeBase
+from poke_env.data.mapped_table import MappedTable
 from poke_env.data.normalize import to_id_str
 from poke_env.data.replay_template import REPLAY_TEMPLATE
+from poke_env.data.type_matchup import TypeMatchup
 
 __all__ = [
     "REPLAY_TEMPLATE",
     "GenData",
+    "KnowledgeBase",
+    "MappedTable",
+    "TypeMatchup",
     "to_id_str",
 ]
@@ -2,15 +2,17 @@ from __future__ import annotations
 
 import os
 from functools import lru_cache
-from typing import Any, Dict, Optional, Union
+from typing import Any, Dict, Iterable, List, Optional, Union
 
 import orjson
 
+from poke_env.data.mapped_table import MappedTable
 from poke_env.data.normalize import to_id_str
+from poke_env.data.static_cache import dump_cached, load_cached
 
 
 class GenData:
-    __slots__ = ("gen", "moves", "natures", "pokedex", "type_chart", "learnset")
+    __slots__ = ("gen", "moves", "natures", "pokedex", "type_chart", "_learnset")
 
     UNKNOWN_ITEM = "unknown_item"
 
@@ -21,15 +23,67 @@ class GenData:
             raise ValueError(f"GenData for gen {gen} already initialized.")
 
         self.gen = gen
-        self.moves = self.load_moves(gen)
-        self.natures = self.load_natures()
-        self.pokedex = self.load_pokedex(gen)
-        self.type_chart = self.load_type_chart(gen)
-        self.learnset = self.load_learnset()
+        tables = self.load_tables(gen)
+        self.moves = tables["moves"]
+        self.natures = tables["natures"]
+        self.pokedex = tables["pokedex"]
+        self.type_chart = tables["type_chart"]
+        self._learnset: Optional[Dict[str, Dict[str, Union[int, float]]]] = None
 
     def __deepcopy__(self, memodict: Optional[Dict[int, Any]] = None) -> GenData:
         return self
 
+    @property
+    def learnset(self) -> Dict[str, Dict[str, Union[int, float]]]:
+        """The learnset is large and seldom used, so it is only loaded on first
+        access.
+
+        :return: The learnset.
+        :rtype: Dict[str, Dict[str, Union[int, float]]]
+        """
+        if self._learnset is None:
+            self._learnset = self.load_learnset()
+        return self._learnset
+
+    def load_tables(self, gen: int) -> Dict[str, Any]:
+        """Loads the post-processed moves, natures, pokedex and type chart of a
+        generation, from the binary cache if it is up to date with the static
+        files, and from the static files otherwise. If mapped tables are enabled,
+        moves and pokedex are MappedTables instead of dicts.
+
+        :param gen: The generation.
+        :type gen: int
+        :return: The tables, by name.
+        :rtype: Dict[str, Any]
+        """
+        if MappedTable.enabled():
+            moves_source, _, pokedex_source, _ = self._table_sources(gen)
+            moves = MappedTable.from_cache(
+                f"gen{gen}moves", [moves_source], lambda: self.load_moves(gen)
+            )
+            pokedex = MappedTable.from_cache(
+                f"gen{gen}pokedex", [pokedex_source], lambda: self.load_pokedex(gen)
+            )
+            if moves is not None and pokedex is not None:
+                return {
+                    "moves": moves,
+                    "natures": self.load_natures(),
+                    "pokedex": pokedex,
+                    "type_chart": self.load_type_chart(gen),
+                }
+
+        sources = self._table_sources(gen)
+        tables = load_cached(f"gen{gen}data", sources)
+        if tables is None:
+            tables = {
+                "moves": self.load_moves(gen),
+                "natures": self.load_natures(),
+                "pokedex": self.load_pokedex(gen),
+                "type_chart": self.load_type_chart(gen),
+            }
+            dump_cached(f"gen{gen}data", sources, tables)
+        return tables
+
     def load_moves(self, gen: int) -> Dict[str, Any]:
         with open(
             os.path.join(self._static_files_root, "moves", f"gen{gen}moves.json")
@@ -41,8 +95,7 @@ class GenData:
             return orjson.loads(f.read())
 
     def load_learnset(self) -> Dict[str, Dict[str, Union[int, float]]]:
-        with open(os.path.join(self._static_files_root, "learnset.json")) as f:
-            return orjson.loads(f.read())
+        return _load_learnset(self._static_files_root)
 
     def load_pokedex(self, gen: int) -> Dict[str, Any]:
         with open(
@@ -113,6 +166,31 @@ class GenData:
     def _static_files_root(self) -> str:
         return os.path.join(os.path.dirname(os.path.realpath(__file__)), "static")
 
+    def _table_sources(self, gen: int) -> List[str]:
+        return [
+            os.path.join(self._static_files_root, "moves", f"gen{gen}moves.json"),
+            os.path.join(self._static_files_root, "natures.json"),
+            os.path.join(self._static_files_root, "pokedex", f"gen{gen}pokedex.json"),
+            os.path.join(
+                self._static_files_root, "typechart", f"gen{gen}typechart.json"
+            ),
+        ]
+
+    @classmethod
+    def build_cache(cls, gens: Iterable[int] = range(1, 10)):
+        """Builds the binary cache of the given generations' tables and of the
+        learnset ahead of time, for instance when installing or deploying.
+
+        :param gens: The generations to cache. Defaults to all of them.
+        :type gens: Iterable[int]
+        """
+        for gen in gens:
+            gen_data = cls.__new__(cls)
+            sources = gen_data._table_sources(gen)
+            if load_cached(f"gen{gen}data", sources) is None:
+                gen_data.load_tables(gen)
+            gen_data.load_learnset()
+
     @classmethod
     @lru_cache(None)
     def from_gen(cls, gen: int) -> GenData:
@@ -126,3 +204,24 @@ class GenData:
     def from_format(cls, format: str) -> GenData:
         gen = int(format[3])  # Update when Gen 10 comes
         return cls.from_gen(gen)
+
+
+@lru_cache(None)
+def _load_learnset(static_files_root: str) -> Dict[str, Dict[str, Union[int, float]]]:
+    # The learnset does not depend on the generation: it is loaded once and shared
+    source = os.path.join(static_files_root, "learnset.json")
+
+    def load_source() -> Dict[str, Dict[str, Union[int, float]]]:
+        with open(source) as f:
+            return orjson.loads(f.read())
+
+    if MappedTable.enabled():
+        mapped_learnset = MappedTable.from_cache("learnset", [source], load_source)
+        if mapped_learnset is not None:
+            return mapped_learnset  # type: ignore
+
+    learnset = load_cached("learnset", [source])
+    if learnset is None:
+        learnset = load_source()
+        dump_cached("learnset", [source], learnset)
+    return learnset
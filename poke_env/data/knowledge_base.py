@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+import os
+from functools import lru_cache
+from typing import Any, Dict, Mapping, Optional
+
+import orjson
+
+from poke_env.data.mapped_table import MappedTable
+
+
+class KnowledgeBase:
+    """Descriptions of moves, abilities and items, along with the moves, abilities
+    and items pokemons were seen using, for a given generation.
+
+    Static files are loaded once per process and shared between generations when
+    they do not depend on it. Generations without recorded usage files fall back
+    on the ones of FALLBACK_GEN. Knowledge bases are shared between players and
+    must be treated as read-only; their tables are MappedTables when mapped
+    tables are enabled.
+    """
+
+    __slots__ = (
+        "gen",
+        "move_effect",
+        "pokemon_move_dict",
+        "ability_effect",
+        "pokemon_ability_dict",
+        "item_effect",
+        "pokemon_item_dict",
+    )
+
+    FALLBACK_GEN = 8
+
+    def __init__(self, gen: int):
+        self.gen = gen
+        self.move_effect = self.load_static_file("moves", "moves_effect.json")
+        self.pokemon_move_dict = self.load_gen_file(
+            gen, "moves", "pokemon_move_dict.json"
+        )
+        self.ability_effect = self.load_static_file(
+            "abilities", "ability_effect.json"
+        )
+        self.pokemon_ability_dict = self.load_gen_file(
+            gen, "abilities", "pokemon_ability_dict.json"
+        )
+        self.item_effect = self.load_static_file("items", "item_effect.json")
+        self.pokemon_item_dict = self.load_gen_file(
+            gen, "items", "pokemon_item_dict.json"
+        )
+
+    def __deepcopy__(
+        self, memodict: Optional[Dict[int, Any]] = None
+    ) -> KnowledgeBase:
+        return self
+
+    @classmethod
+    def load_gen_file(cls, gen: int, directory: str, name: str) -> Mapping[str, Any]:
+        if not os.path.isfile(
+            os.path.join(_static_files_root(), directory, f"gen{gen}{name}")
+        ):
+            gen = cls.FALLBACK_GEN
+        return cls.load_static_file(directory, f"gen{gen}{name}")
+
+    @staticmethod
+    @lru_cache(None)
+    def load_static_file(directory: str, name: str) -> Mapping[str, Any]:
+        path = os.path.join(_static_files_root(), directory, name)
+
+        def load_source() -> Dict[str, Any]:
+            with open(path, "rb") as f:
+                return orjson.loads(f.read())
+
+        if MappedTable.enabled():
+            table = MappedTable.from_cache(
+                os.path.splitext(name)[0], [path], load_source
+            )
+            if table is not None:
+                return table
+        return load_source()
+
+    @classmethod
+    @lru_cache(None)
+    def from_gen(cls, gen: int) -> KnowledgeBase:
+        return cls(gen)
+
+    @classmethod
+    @lru_cache(None)
+    def from_format(cls, format: str) -> KnowledgeBase:
+        gen = int(format[3])  # Update when Gen 10 comes
+        return cls.from_gen(gen)
+
+
+def _static_files_root() -> str:
+    return os.path.join(os.path.dirname(os.path.realpath(__file__)), "static")
@@ -0,0 +1,193 @@
+"""This module defines the MappedTable class, a read-only mapping stored in a
+memory-mapped file, which lets processes share static data tables.
+"""
+from __future__ import annotations
+
+import mmap
+import os
+import struct
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterator, List, Mapping, Optional, Sequence
+
+import orjson
+
+from poke_env.data.static_cache import cache_directory, fingerprint
+
+MAPPED_TABLES_ENV_VAR = "POKE_ENV_MAPPED_TABLES"
+
+_INDEX_LENGTH = struct.Struct("<Q")
+
+
+class MappedTable(Mapping[str, Any]):
+    """A read-only mapping whose values are stored in a memory-mapped file.
+
+    The file holds a fingerprint line, an index mapping each key to the offset
+    and length of its value, and the values serialized as JSON. Processes
+    opening the same file share its pages through the OS page cache, so only the
+    index and recently decoded values live in each process. Values are decoded
+    on access and kept in a small LRU cache; they must not be mutated.
+
+    When mapped tables are enabled, with MappedTable.enable or by setting the
+    POKE_ENV_MAPPED_TABLES environment variable, GenData and KnowledgeBase
+    serve their large tables from mapped files stored in the static data cache
+    directory, building them on first use.
+
+    :param path: Path of the file, written with MappedTable.write.
+    :type path: str
+    :param decode_cache_size: Number of decoded values kept in memory.
+    :type decode_cache_size: int
+    """
+
+    _enabled: Optional[bool] = None
+
+    def __init__(self, path: str, decode_cache_size: int = 256):
+        self.path = path
+        self.decode_cache_size = decode_cache_size
+
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        index_start = self._mmap.find(b"\n") + 1
+        self.fingerprint = self._mmap[: index_start - 1]
+        (index_length,) = _INDEX_LENGTH.unpack_from(self._mmap, index_start)
+        index_start += _INDEX_LENGTH.size
+        self._index: Dict[str, List[int]] = orjson.loads(
+            self._mmap[index_start : index_start + index_length]
+        )
+        self._data_start = index_start + index_length
+
+        self._decoded: OrderedDict[str, Any] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __getitem__(self, key: str) -> Any:
+        with self._lock:
+            if key in self._decoded:
+                self._decoded.move_to_end(key)
+                return self._decoded[key]
+
+        offset, length = self._index[key]
+        start = self._data_start + offset
+        value = orjson.loads(self._mmap[start : start + length])
+
+        with self._lock:
+            self._decoded[key] = value
+            if len(self._decoded) > self.decode_cache_size:
+                self._decoded.popitem(last=False)
+        return value
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._index
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._index)
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def __deepcopy__(self, memodict: Optional[Dict[int, Any]] = None) -> MappedTable:
+        return self
+
+    def __reduce__(self):
+        return self.__class__, (self.path, self.decode_cache_size)
+
+    def __repr__(self) -> str:
+        return f"MappedTable({self.path!r}, {len(self)} entries)"
+
+    @staticmethod
+    def write(path: str, table: Mapping[str, Any], fingerprint: bytes = b""):
+        """Writes a table to a file that can be opened as a MappedTable. The file
+        is replaced atomically.
+
+        :param path: Path of the file.
+        :type path: str
+        :param table: The table. Its values must be serializable to JSON.
+        :type table: Mapping[str, Any]
+        :param fingerprint: Identifies the table's content. It must not contain
+            line breaks.
+        :type fingerprint: bytes
+        """
+        index: Dict[str, List[int]] = {}
+        values = []
+        offset = 0
+        for key, value in table.items():
+            serialized = orjson.dumps(value)
+            index[key] = [offset, len(serialized)]
+            values.append(serialized)
+            offset += len(serialized)
+        serialized_index = orjson.dumps(index)
+
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(fingerprint + b"\n")
+                f.write(_INDEX_LENGTH.pack(len(serialized_index)))
+                f.write(serialized_index)
+                for serialized in values:
+                    f.write(serialized)
+            os.replace(tmp_path, path)
+        except OSError:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+
+    @classmethod
+    def enable(cls, enabled: bool = True):
+        """Enables or disables mapped tables for static data loaded from now on.
+
+        :param enabled: Whether to enable mapped tables.
+        :type enabled: bool
+        """
+        cls._enabled = enabled
+
+    @classmethod
+    def enabled(cls) -> bool:
+        """
+        :return: Whether static data is served from mapped tables.
+        :rtype: bool
+        """
+        if cls._enabled is None:
+            return os.environ.get(MAPPED_TABLES_ENV_VAR, "") not in ("", "0")
+        return cls._enabled
+
+    @classmethod
+    def from_cache(
+        cls,
+        name: str,
+        sources: Sequence[str],
+        build: Callable[[], Mapping[str, Any]],
+    ) -> Optional[MappedTable]:
+        """Opens a table from the static data cache directory, building it if it
+        is missing or stale.
+
+        :param name: The name of the table.
+        :type name: str
+        :param sources: Paths of the source files the table is built from.
+        :type sources: Sequence[str]
+        :param build: Builds the table from its source files.
+        :type build: Callable[[], Mapping[str, Any]]
+        :return: The table, or None if the cache directory is disabled or cannot
+            be written to.
+        :rtype: MappedTable, optional
+        """
+        directory = cache_directory()
+        if directory is None:
+            return None
+        path = os.path.join(directory, f"{name}.table")
+        expected_fingerprint = fingerprint(sources)
+
+        try:
+            table = cls(path)
+            if table.fingerprint == expected_fingerprint:
+                return table
+        except (OSError, ValueError, struct.error):
+            pass
+
+        try:
+            os.makedirs(directory, exist_ok=True)
+            cls.write(path, build(), expected_fingerprint)
+            return cls(path)
+        except OSError:
+            return None
@@ -0,0 +1,120 @@
+"""This module implements an on-disk binary cache of post-processed static data.
+
+Cached tables are stored with marshal, next to a fingerprint of their source
+files, the python version and CACHE_FORMAT_VERSION. Stale entries are ignored
+and rebuilt. The cache lives in the directory given by the POKE_ENV_CACHE_DIR
+environment variable, or in ~/.cache/poke_env by default; setting the variable
+to an empty string disables it. When the default directory cannot be written to,
+eg. in a read-only home, caching is silently disabled.
+"""
+import hashlib
+import marshal
+import os
+import sys
+import threading
+from functools import lru_cache
+from typing import Any, Iterable, Optional
+
+CACHE_DIR_ENV_VAR = "POKE_ENV_CACHE_DIR"
+
+# Bump when the post-processing of cached tables changes
+CACHE_FORMAT_VERSION = 1
+
+
+def cache_directory() -> Optional[str]:
+    """
+    :return: The directory holding cached tables, or None if caching is disabled.
+    :rtype: str, optional
+    """
+    directory = os.environ.get(CACHE_DIR_ENV_VAR)
+    if directory is None:
+        return _default_cache_directory()
+    return directory or None
+
+
+@lru_cache(maxsize=None)
+def _default_cache_directory() -> Optional[str]:
+    cache_home = os.environ.get("XDG_CACHE_HOME") or os.path.join(
+        os.path.expanduser("~"), ".cache"
+    )
+    # expanduser leaves ~ as is when there is no home directory
+    if not os.path.isabs(cache_home):
+        return None
+    directory = os.path.join(cache_home, "poke_env")
+    try:
+        os.makedirs(directory, exist_ok=True)
+    except OSError:
+        return None
+    if not os.access(directory, os.W_OK):
+        return None
+    return directory
+
+
+def fingerprint(sources: Iterable[str]) -> bytes:
+    """Computes the fingerprint of cached tables built from source files.
+
+    :param sources: Paths of the source files.
+    :type sources: Iterable[str]
+    :return: The fingerprint.
+    :rtype: bytes
+    """
+    digest = hashlib.sha256(
+        f"{CACHE_FORMAT_VERSION}|{sys.version}|{marshal.version}".encode()
+    )
+    for source in sources:
+        with open(source, "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest().encode()
+
+
+def load_cached(name: str, sources: Iterable[str]) -> Optional[Any]:
+    """Loads cached tables, if they are up to date with their source files.
+
+    :param name: The name of the cached tables.
+    :type name: str
+    :param sources: Paths of the source files the tables are built from.
+    :type sources: Iterable[str]
+    :return: The tables, or None if they are not cached or stale.
+    """
+    directory = cache_directory()
+    if directory is None:
+        return None
+    try:
+        with open(_path(directory, name), "rb") as f:
+            if f.readline().rstrip(b"\n") != fingerprint(sources):
+                return None
+            return marshal.loads(f.read())
+    except (OSError, EOFError, ValueError, TypeError):
+        return None
+
+
+def dump_cached(name: str, sources: Iterable[str], tables: Any):
+    """Caches tables built from source files. Failures to write the cache are
+    ignored, as it is only an optimization.
+
+    :param name: The name of the cached tables.
+    :type name: str
+    :param sources: Paths of the source files the tables are built from.
+    :type sources: Iterable[str]
+    :param tables: The tables. They must be serializable by marshal.
+    """
+    directory = cache_directory()
+    if directory is None:
+        return
+    path = _path(directory, name)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        os.makedirs(directory, exist_ok=True)
+        with open(tmp_path, "wb") as f:
+            f.write(fingerprint(sources) + b"\n")
+            marshal.dump(tables, f)
+        os.replace(tmp_path, path)
+    except (OSError, ValueError):
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+
+
+def _path(directory: str, name: str) -> str:
+    return os.path.join(directory, f"{name}.marshal")
@@ -0,0 +1,285 @@
+"""This module defines the TypeMatchup class, which holds type effectiveness
+matrices and answers vectorized type matchup queries.
+"""
+from __future__ import annotations
+
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from poke_env.data.gen_data import GenData
+
+_NEUTRAL_TYPES = {None, "???", "THREE_QUESTION_MARKS"}
+
+
+class TypeMatchup:
+    """Type effectiveness matrices of a generation.
+
+    ``matrix[a, d]`` is the damage multiplier of attacking type ``a`` on a
+    pokemon of type ``d``, and ``dual_matrix[a, c]`` the multiplier of attacking
+    type ``a`` on the type combination ``c`` - the first columns being single
+    types, followed by every unordered pair of types. Types are indexed in the
+    order of ``types``.
+
+    Types can be given as PokemonType objects or as upper case type names. The
+    unknown type (``???``) and missing types are neutral to everything.
+
+    Instances are built once per type chart and shared; use from_gen or
+    from_format rather than the constructor.
+
+    :param type_chart: The type chart, as found in GenData.
+    :type type_chart: Dict[str, Dict[str, float]]
+    """
+
+    __slots__ = (
+        "types",
+        "matrix",
+        "dual_matrix",
+        "combinations",
+        "_combination_index",
+        "_rows",
+        "_table",
+        "_type_index",
+    )
+
+    def __init__(self, type_chart: Dict[str, Dict[str, float]]):
+        self.types: Tuple[str, ...] = tuple(type_chart)
+        n_types = len(self.types)
+        self._type_index: Dict[Any, int] = {t: i for i, t in enumerate(self.types)}
+        self._type_index[None] = n_types
+
+        matrix = np.array(
+            [
+                [type_chart[defender][attacker] for defender in self.types]
+                for attacker in self.types
+            ],
+            dtype=np.float64,
+        )
+
+        self.combinations: List[Tuple[str, Optional[str]]] = [
+            (type_, None) for type_ in self.types
+        ]
+        self._combination_index: Dict[Tuple[int, int], int] = {
+            (i, i): i for i in range(n_types)
+        }
+        for i in range(n_types):
+            for j in range(i + 1, n_types):
+                self._combination_index[(i, j)] = self._combination_index[
+                    (j, i)
+                ] = len(self.combinations)
+                self.combinations.append((self.types[i], self.types[j]))
+
+        # The extra last row and column hold the neutral attacking type and the
+        # neutral type combination, so that unknown types need no special case
+        table = np.ones((n_types + 1, len(self.combinations) + 1), dtype=np.float64)
+        for (i, j), column in self._combination_index.items():
+            if i <= j:
+                table[:n_types, column] = (
+                    matrix[:, i] if i == j else matrix[:, i] * matrix[:, j]
+                )
+        table.flags.writeable = False
+        matrix.flags.writeable = False
+
+        self._table = table
+        # Scalar lookups are faster on nested lists than on numpy arrays
+        self._rows: List[List[float]] = table.tolist()
+        self.matrix: np.ndarray = matrix
+        self.dual_matrix: np.ndarray = table[:n_types, : len(self.combinations)]
+
+    def type_index(self, type_: Any) -> int:
+        """Returns the index of a type, as an attacking type.
+
+        :param type_: The type, as a PokemonType or a name. Neutral types map to
+            an extra index which is neutral to everything.
+        :return: The type's index.
+        :rtype: int
+        """
+        index = self._type_index.get(type_)
+        if index is None:
+            # Remembers PokemonType objects and other spellings as they come
+            name = _type_name(type_)
+            index = len(self.types) if name is None else self._type_index[name]
+            self._type_index[type_] = index
+        return index
+
+    def combination_index(self, type_1: Any, type_2: Any = None) -> int:
+        """Returns the column of a type combination in dual_matrix. The order of
+        the two types does not matter.
+
+        :param type_1: The first type.
+        :param type_2: The second type. Defaults to None.
+        :return: The combination's index. Combinations including an unknown first
+            type map to an extra, neutral index.
+        :rtype: int
+        """
+        index_1 = self.type_index(type_1)
+        if index_1 == len(self.types):
+            return len(self.combinations)
+        index_2 = self.type_index(type_2)
+        if index_2 == len(self.types):
+            return index_1
+        return self._combination_index[(index_1, index_2)]
+
+    def defender_index(self, defender: Union[Any, Sequence[Any]]) -> int:
+        """Returns the column of a defender in dual_matrix.
+
+        :param defender: A pokemon, or a tuple of its types.
+        :return: The defender's index.
+        :rtype: int
+        """
+        if isinstance(defender, (tuple, list)):
+            return self.combination_index(*defender)
+        return self.combination_index(defender.type_1, defender.type_2)
+
+    def multiplier(self, attack_type: Any, type_1: Any, type_2: Any = None) -> float:
+        """Returns the damage multiplier of an attacking type on a type
+        combination.
+
+        :param attack_type: The attacking type.
+        :param type_1: The first type of the defender.
+        :param type_2: The second type of the defender. Defaults to None.
+        :return: The damage multiplier.
+        :rtype: float
+        """
+        return self._rows[self.type_index(attack_type)][
+            self.combination_index(type_1, type_2)
+        ]
+
+    def multipliers(
+        self, attack_types: Iterable[Any], defenders: Iterable[Any]
+    ) -> np.ndarray:
+        """Returns the damage multipliers of K attacking types on M defenders.
+
+        :param attack_types: The attacking types.
+        :type attack_types: Iterable
+        :param defenders: The defenders, as pokemons or tuples of types.
+        :type defenders: Iterable
+        :return: A (K, M) array of damage multipliers.
+        :rtype: np.ndarray
+        """
+        rows = np.array([self.type_index(type_) for type_ in attack_types], np.intp)
+        columns = np.array(
+            [self.defender_index(defender) for defender in defenders], np.intp
+        )
+        return self._table[np.ix_(rows, columns)]
+
+    def effectiveness(self, type_1: Any, type_2: Any = None) -> np.ndarray:
+        """Returns the damage multipliers of every attacking type on a type
+        combination, in the order of types.
+
+        :param type_1: The first type of the defender.
+        :param type_2: The second type of the defender. Defaults to None.
+        :return: An array of damage multipliers.
+        :rtype: np.ndarray
+        """
+        return self._table[: len(self.types), self.combination_index(type_1, type_2)]
+
+    def types_by_multiplier(
+        self,
+        type_1: Any,
+        type_2: Any = None,
+        attack_types: Optional[Iterable[str]] = None,
+    ) -> Tuple[List[str], List[str], List[str], List[str], List[str]]:
+        """Groups attacking types by their damage multiplier on a type combination.
+
+        :param type_1: The first type of the defender.
+        :param type_2: The second type of the defender. Defaults to None.
+        :param attack_types: If given, only these upper case type names are kept.
+        :type attack_types: Iterable[str], optional
+        :return: The upper case names of the types dealing 4x, 2x, 0.5x, 0.25x and
+            0x damage, each in the order of types, so that identical inputs always
+            give identical lists.
+        :rtype: Tuple[List[str], List[str], List[str], List[str], List[str]]
+        """
+        multipliers = self.effectiveness(type_1, type_2)
+        kept = set(attack_types) if attack_types else None
+
+        def types_with_multiplier(value: float) -> List[str]:
+            return [
+                self.types[i]
+                for i in np.flatnonzero(multipliers == value)
+                if kept is None or self.types[i] in kept
+            ]
+
+        return (
+            types_with_multiplier(4),
+            types_with_multiplier(2),
+            types_with_multiplier(1 / 2),
+            types_with_multiplier(1 / 4),
+            types_with_multiplier(0),
+        )
+
+    def best_multiplier(self, attacker: Any, defender: Any) -> float:
+        """Returns the best damage multiplier the attacker's own types get on the
+        defender.
+
+        :param attacker: The attacking pokemon.
+        :type attacker: Pokemon
+        :param defender: The defending pokemon, or a tuple of its types.
+        :return: The damage multiplier.
+        :rtype: float
+        """
+        column = self.defender_index(defender)
+        multiplier = self._rows[self.type_index(attacker.type_1)][column]
+        if attacker.type_2 is not None:
+            multiplier = max(
+                multiplier, self._rows[self.type_index(attacker.type_2)][column]
+            )
+        return multiplier
+
+    def best_multipliers(self, attackers: Sequence[Any], defender: Any) -> np.ndarray:
+        """Returns, for each attacker, the best damage multiplier its own types
+        get on the defender.
+
+        :param attackers: The attacking pokemons.
+        :type attackers: Sequence[Pokemon]
+        :param defender: The defending pokemon, or a tuple of its types.
+        :return: An array of damage multipliers, one per attacker.
+        :rtype: np.ndarray
+        """
+        rows = np.empty((len(attackers), 2), dtype=np.intp)
+        for i, attacker in enumerate(attackers):
+            rows[i, 0] = self.type_index(attacker.type_1)
+            # A missing second type repeats the first one, which leaves the max
+            # unchanged
+            type_2 = attacker.type_2
+            rows[i, 1] = rows[i, 0] if type_2 is None else self.type_index(type_2)
+        return self._table[rows, self.defender_index(defender)].max(axis=1)
+
+    @classmethod
+    def from_type_chart(cls, type_chart: Dict[str, Dict[str, float]]) -> TypeMatchup:
+        """Returns the matchup matrices of a type chart, building them on first
+        use.
+
+        :param type_chart: The type chart.
+        :type type_chart: Dict[str, Dict[str, float]]
+        :return: The corresponding TypeMatchup.
+        :rtype: TypeMatchup
+        """
+        matchup = _matchups_per_chart.get(id(type_chart))
+        if matchup is None or matchup[0] is not type_chart:
+            matchup = (type_chart, cls(type_chart))
+            _matchups_per_chart[id(type_chart)] = matchup
+        return matchup[1]
+
+    @classmethod
+    @lru_cache(None)
+    def from_gen(cls, gen: int) -> TypeMatchup:
+        return cls.from_type_chart(GenData.from_gen(gen).type_chart)
+
+    @classmethod
+    @lru_cache(None)
+    def from_format(cls, format: str) -> TypeMatchup:
+        return cls.from_type_chart(GenData.from_format(format).type_chart)
+
+
+# Keeps a reference to each chart, so that ids are not reused
+_matchups_per_chart: Dict[int, Tuple[Dict[str, Dict[str, float]], TypeMatchup]] = {}
+
+
+def _type_name(type_: Any) -> Optional[str]:
+    name = getattr(type_, "name", type_)
+    if name in _NEUTRAL_TYPES:
+        return None
+    return name.upper()
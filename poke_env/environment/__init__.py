@@ -1,9 +1,12 @@
 from poke_env.environment import (
     abstract_battle,
     battle,
+    battle_event_log,
+    battle_snapshot,
     double_battle,
     effect,
     field,
+    hp_timeline,
     move,
     move_category,
     pokemon,
@@ -16,9 +19,16 @@ from poke_env.environment import (
 )
 from poke_env.environment.abstract_battle import AbstractBattle
 from poke_env.environment.battle import Battle
+from poke_env.environment.battle_event_log import (
+    BattleEvent,
+    BattleEventLog,
+    TurnRecord,
+)
+from poke_env.environment.battle_snapshot import BattleSnapshot, PokemonSnapshot
 from poke_env.environment.double_battle import DoubleBattle
 from poke_env.environment.effect import Effect
 from poke_env.environment.field import Field
+from poke_env.environment.hp_timeline import HPTimeline
 from poke_env.environment.move import SPECIAL_MOVES, EmptyMove, Move
 from poke_env.environment.move_category import MoveCategory
 from poke_env.environment.pokemon import Pokemon
@@ -32,26 +42,35 @@ from poke_env.environment.z_crystal import Z_CRYSTAL
 __all__ = [
     "AbstractBattle",
     "Battle",
+    "BattleEvent",
+    "BattleEventLog",
+    "BattleSnapshot",
     "DoubleBattle",
     "Effect",
     "EmptyMove",
     "Field",
+    "HPTimeline",
     "Move",
     "MoveCategory",
     "Pokemon",
     "PokemonGender",
+    "PokemonSnapshot",
     "PokemonType",
     "SPECIAL_MOVES",
     "STACKABLE_CONDITIONS",
     "SideCondition",
     "Status",
+    "TurnRecord",
     "Weather",
     "Z_CRYSTAL",
     "abstract_battle",
     "battle",
+    "battle_event_log",
+    "battle_snapshot",
     "double_battle",
     "effect",
     "field",
+    "hp_timeline",
     "move",
     "move_category",
     "pokemon",
@@ -1,11 +1,14 @@
 import os
 from abc import ABC, abstractmethod
 from logging import Logger
-from typing import Any, Dict, List, Optional, Set, Tuple, Union
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple, Union
 
 from poke_env.data import GenData, to_id_str
 from poke_env.data.replay_template import REPLAY_TEMPLATE
+from poke_env.environment.battle_event_log import BattleEventLog
+from poke_env.environment.battle_snapshot import BattleSnapshot
 from poke_env.environment.field import Field
+from poke_env.environment.hp_timeline import HPTimeline
 from poke_env.environment.pokemon import Pokemon
 from poke_env.environment.side_condition import STACKABLE_CONDITIONS, SideCondition
 from poke_env.environment.weather import Weather
@@ -62,6 +65,9 @@ class AbstractBattle(ABC):
         "zbroken",
     }
 
+    # Number of HP values kept per pokemon in hp timelines; None keeps them all
+    HP_TIMELINE_MAX_LENGTH: Optional[int] = 16
+
     __slots__ = (
         "_anybody_inactive",
         "_available_moves",
@@ -73,10 +79,12 @@ class AbstractBattle(ABC):
         "_can_z_move",
         "_data",
         "_dynamax_turn",
+        "_event_log",
         "_fields",
         "_finished",
         "_force_switch",
         "_format",
+        "_hp_timelines",
         "in_team_preview",
         "_max_team_size",
         "_maybe_trapped",
@@ -140,6 +148,8 @@ class AbstractBattle(ABC):
         self._anybody_inactive: bool = False
         self._reconnected: bool = True
         self.logger: Optional[Logger] = logger
+        self._event_log: BattleEventLog = BattleEventLog()
+        self._hp_timelines: Dict[str, HPTimeline] = {}
 
         # Turn choice attributes
         self.in_team_preview: bool = False
@@ -339,6 +349,21 @@ class AbstractBattle(ABC):
 
         self._fields[field] = self.turn
 
+    def hp_timeline(self, identifier: str) -> HPTimeline:
+        """Returns the HP timeline of a pokemon, creating it if needed.
+
+        :param identifier: The pokemon identifier, as found in battle messages.
+        :type identifier: str
+        :return: The HP timeline.
+        :rtype: HPTimeline
+        """
+        timeline = self._hp_timelines.get(identifier)
+        if timeline is None:
+            timeline = self._hp_timelines[identifier] = HPTimeline(
+                self.HP_TIMELINE_MAX_LENGTH
+            )
+        return timeline
+
     def _finish_battle(self):
         if self._save_replays:
             if self._save_replays is True:
@@ -382,377 +407,527 @@ class AbstractBattle(ABC):
 
         if split_message[1] in self.MESSAGES_TO_IGNORE:
             return
-        elif split_message[1] in ["drag", "switch"]:
-            pokemon, details, hp_status = split_message[2:5]
-            self.switch(pokemon, details, hp_status)
-        elif split_message[1] == "-damage":
-            pokemon, hp_status = split_message[2:4]
-            self.get_pokemon(pokemon).damage(hp_status)
-            self._check_damage_message_for_item(split_message)
-            self._check_damage_message_for_ability(split_message)
-        elif split_message[1] == "move":
-            failed = False
-            override_move = None
-            reveal_other_move = False
-
-            for move_failed_suffix in ["[miss]", "[still]", "[notarget]"]:
-                if split_message[-1] == move_failed_suffix:
-                    split_message = split_message[:-1]
-                    failed = True
-
-            if split_message[-1] == "[notarget]":
-                split_message = split_message[:-1]
 
-            if split_message[-1].startswith("[spread]"):
-                split_message = split_message[:-1]
+        handler = self._message_handlers.get(split_message[1])
+        if handler is None:
+            raise NotImplementedError(split_message)
+        handler(self, split_message)
 
-            if split_message[-1] in {"[from]lockedmove", "[from]Pursuit", "[zeffect]"}:
+    @classmethod
+    def register_message_handler(
+        cls,
+        message_type: str,
+        handler: Callable[["AbstractBattle", List[str]], Any],
+    ):
+        """Registers the function handling a type of battle message, replacing the
+        current one if any. The handler is registered on this class and its future
+        subclasses only.
+
+        :param message_type: The message type, eg. `-damage`.
+        :type message_type: str
+        :param handler: The handler. It is called with the battle and the split
+            message.
+        :type handler: Callable[[AbstractBattle, List[str]], Any]
+        """
+        cls._message_handlers = {**cls._message_handlers, message_type: handler}
+
+    def __init_subclass__(cls, **kwargs: Any):
+        super().__init_subclass__(**kwargs)
+        # Handlers overridden by the subclass replace the inherited ones
+        parent = cls.__mro__[1]
+        cls._message_handlers = {
+            message_type: getattr(cls, handler.__name__)
+            if getattr(parent, handler.__name__, None) is handler
+            else handler
+            for message_type, handler in cls._message_handlers.items()
+        }
+
+    def _parse_switch_message(self, split_message: List[str]):
+        pokemon, details, hp_status = split_message[2:5]
+        self.switch(pokemon, details, hp_status)
+
+    def _parse_damage_message(self, split_message: List[str]):
+        pokemon, hp_status = split_message[2:4]
+        self.get_pokemon(pokemon).damage(hp_status)
+        self._check_damage_message_for_item(split_message)
+        self._check_damage_message_for_ability(split_message)
+
+    def _parse_move_message(self, split_message: List[str]):
+        failed = False
+        override_move = None
+        reveal_other_move = False
+
+        for move_failed_suffix in ["[miss]", "[still]", "[notarget]"]:
+            if split_message[-1] == move_failed_suffix:
                 split_message = split_message[:-1]
+                failed = True
 
-            if split_message[-1].startswith("[anim]"):
-                split_message = split_message[:-1]
+        if split_message[-1] == "[notarget]":
+            split_message = split_message[:-1]
 
-            if split_message[-1].startswith("[from]move: "):
-                override_move = split_message.pop()[12:]
-
-                if override_move == "Sleep Talk":
-                    # Sleep talk was used, but also reveals another move
-                    reveal_other_move = True
-                elif override_move in {"Copycat", "Metronome", "Nature Power"}:
-                    pass
-                elif self.logger is not None:
-                    self.logger.warning(
-                        "Unmanaged [from]move message received - move %s in cleaned up "
-                        "message %s in battle %s turn %d",
-                        override_move,
-                        split_message,
-                        self.battle_tag,
-                        self.turn,
-                    )
-
-            if split_message[-1] == "null":
-                split_message = split_message[:-1]
+        if split_message[-1].startswith("[spread]"):
+            split_message = split_message[:-1]
 
-            if split_message[-1].startswith("[from]ability: "):
-                revealed_ability = split_message.pop()[15:]
-                pokemon = split_message[2]
-                self.get_pokemon(pokemon).ability = revealed_ability
-
-                if revealed_ability == "Magic Bounce":
-                    return
-                elif revealed_ability == "Dancer":
-                    return
-                elif self.logger is not None:
-                    self.logger.warning(
-                        "Unmanaged [from]ability: message received - ability %s in "
-                        "cleaned up message %s in battle %s turn %d",
-                        revealed_ability,
-                        split_message,
-                        self.battle_tag,
-                        self.turn,
-                    )
-            if split_message[-1] == "[from]Magic Coat":
-                return
+        if split_message[-1] in {"[from]lockedmove", "[from]Pursuit", "[zeffect]"}:
+            split_message = split_message[:-1]
 
-            while split_message[-1] == "[still]":
-                split_message = split_message[:-1]
+        if split_message[-1].startswith("[anim]"):
+            split_message = split_message[:-1]
 
-            if split_message[-1] == "":
-                split_message = split_message[:-1]
+        if split_message[-1].startswith("[from]move: "):
+            override_move = split_message.pop()[12:]
 
-            if len(split_message) == 4:
-                pokemon, move = split_message[2:4]
-            elif len(split_message) == 5:
-                pokemon, move, presumed_target = split_message[2:5]
-
-                if len(presumed_target) > 4 and presumed_target[:4] in {
-                    "p1: ",
-                    "p2: ",
-                    "p1a:",
-                    "p1b:",
-                    "p2a:",
-                    "p2b:",
-                }:
-                    pass
-                elif self.logger is not None:
-                    self.logger.warning(
-                        "Unmanaged move message format received - cleaned up message %s"
-                        " in battle %s turn %d",
-                        split_message,
-                        self.battle_tag,
-                        self.turn,
-                    )
-            else:
-                pokemon, move, presumed_target = split_message[2:5]
-                if self.logger is not None:
-                    self.logger.warning(
-                        "Unmanaged move message format received - cleaned up message %s in "
-                        "battle %s turn %d",
-                        split_message,
-                        self.battle_tag,
-                        self.turn,
-                    )
-
-            # Check if a silent-effect move has occurred (Minimize) and add the effect
-
-            if move.upper().strip() == "MINIMIZE":
-                temp_pokemon = self.get_pokemon(pokemon)
-                temp_pokemon.start_effect("MINIMIZE")
-
-            if override_move:
-                # Moves that can trigger this branch results in two `move` messages being sent.
-                # We're setting use=False in the one (with the override) in order to prevent two pps from being used
-                # incorrectly.
-                self.get_pokemon(pokemon).moved(override_move, failed=failed, use=False)
-            if override_move is None or reveal_other_move:
-                self.get_pokemon(pokemon).moved(move, failed=failed, use=False)
-        elif split_message[1] == "cant":
-            pokemon, _ = split_message[2:4]
-            self.get_pokemon(pokemon).cant_move()
-        elif split_message[1] == "turn":
-            self.end_turn(int(split_message[2]))
-        elif split_message[1] == "-heal":
-            pokemon, hp_status = split_message[2:4]
-            self.get_pokemon(pokemon).heal(hp_status)
-            self._check_heal_message_for_ability(split_message)
-            self._check_heal_message_for_item(split_message)
-        elif split_message[1] == "-boost":
-            pokemon, stat, amount = split_message[2:5]
-            self.get_pokemon(pokemon).boost(stat, int(amount))
-        elif split_message[1] == "-weather":
-            weather = split_message[2]
-            if weather == "none":
-                self._weather = {}
-                return
-            else:
-                self._weather = {Weather.from_showdown_message(weather): self.turn}
-        elif split_message[1] == "faint":
-            pokemon = split_message[2]
-            self.get_pokemon(pokemon).faint()
-        elif split_message[1] == "-unboost":
-            pokemon, stat, amount = split_message[2:5]
-            self.get_pokemon(pokemon).boost(stat, -int(amount))
-        elif split_message[1] == "-ability":
-            pokemon, ability = split_message[2:4]
-            self.get_pokemon(pokemon).ability = ability
-        elif split_message[1] == "-start":
-            pokemon, effect = split_message[2:4]
-            pokemon = self.get_pokemon(pokemon)
-            pokemon.start_effect(effect)
-
-            if pokemon.is_dynamaxed:
-                if pokemon in set(self.team.values()) and self._dynamax_turn is None:
-                    self._dynamax_turn = self.turn
-                # self._can_dynamax value is set via _parse_request()
-                elif (
-                    pokemon in set(self.opponent_team.values())
-                    and self._opponent_dynamax_turn is None
-                ):
-                    self._opponent_dynamax_turn = self.turn
-                    self.opponent_can_dynamax = False
-        elif split_message[1] == "-activate":
-            target, effect = split_message[2:4]
-            if target:
-                self.get_pokemon(target).start_effect(effect)
-        elif split_message[1] == "-status":
-            pokemon, status = split_message[2:4]
-            self.get_pokemon(pokemon).status = status
-        elif split_message[1] == "rule":
-            self.rules.append(split_message[2])
-
-        elif split_message[1] == "-clearallboost":
-            self.clear_all_boosts()
-        elif split_message[1] == "-clearboost":
-            pokemon = split_message[2]
-            self.get_pokemon(pokemon).clear_boosts()
-        elif split_message[1] == "-clearnegativeboost":
-            pokemon = split_message[2]
-            self.get_pokemon(pokemon).clear_negative_boosts()
-        elif split_message[1] == "-clearpositiveboost":
-            pokemon = split_message[2]
-            self.get_pokemon(pokemon).clear_positive_boosts()
-        elif split_message[1] == "-copyboost":
-            source, target = split_message[2:4]
-            self.get_pokemon(target).copy_boosts(self.get_pokemon(source))
-        elif split_message[1] == "-curestatus":
-            pokemon, status = split_message[2:4]
-            self.get_pokemon(pokemon).cure_status(status)
-        elif split_message[1] == "-cureteam":
-            pokemon = split_message[2]
-            team = (
-                self.team if pokemon[:2] == self._player_role else self._opponent_team
-            )
-            for mon in team.values():
-                mon.cure_status()
-        elif split_message[1] == "-end":
-            pokemon, effect = split_message[2:4]
-            self.get_pokemon(pokemon).end_effect(effect)
-        elif split_message[1] == "-endability":
-            pokemon = split_message[2]
-            self.get_pokemon(pokemon).ability = None
-        elif split_message[1] == "-enditem":
-            pokemon, item = split_message[2:4]
-            self.get_pokemon(pokemon).end_item(item)
-        elif split_message[1] == "-fieldend":
-            condition = split_message[2]
-            self._field_end(condition)
-        elif split_message[1] == "-fieldstart":
-            condition = split_message[2]
-            self.field_start(condition)
-        elif split_message[1] in ["-formechange", "detailschange"]:
-            pokemon, species = split_message[2:4]
-            self.get_pokemon(pokemon).forme_change(species)
-        elif split_message[1] == "-invertboost":
-            pokemon = split_message[2]
-            self.get_pokemon(pokemon).invert_boosts()
-        elif split_message[1] == "-item":
-            pokemon, item = split_message[2:4]
-            self.get_pokemon(pokemon).item = to_id_str(item)
-        elif split_message[1] == "-mega":
-            if self.player_role is not None and not split_message[2].startswith(
-                self.player_role
-            ):
-                self._opponent_can_mega_evolve = False
-            pokemon, megastone = split_message[2:4]
-            self.get_pokemon(pokemon).mega_evolve(megastone)
-        elif split_message[1] == "-mustrecharge":
-            pokemon = split_message[2]
-            self.get_pokemon(pokemon).must_recharge = True
-        elif split_message[1] == "-prepare":
-            try:
-                attacker, move, defender = split_message[2:5]
-                defender = self.get_pokemon(defender)
-                if to_id_str(move) == "skydrop":
-                    defender.start_effect("Sky Drop")
-            except ValueError:
-                attacker, move = split_message[2:4]
-                defender = None
-            self.get_pokemon(attacker).prepare(move, defender)
-        elif split_message[1] == "-primal":
-            pokemon = split_message[2]
-            self.get_pokemon(pokemon).primal()
-        elif split_message[1] == "-setboost":
-            pokemon, stat, amount = split_message[2:5]
-            self.get_pokemon(pokemon).set_boost(stat, int(amount))
-        elif split_message[1] == "-sethp":
-            pokemon, hp_status = split_message[2:4]
-            self.get_pokemon(pokemon).set_hp(hp_status)
-        elif split_message[1] == "-sideend":
-            side, condition = split_message[2:4]
-            self.side_end(side, condition)
-        elif split_message[1] == "-sidestart":
-            side, condition = split_message[2:4]
-            self._side_start(side, condition)
-        elif split_message[1] == "-swapboost":
-            source, target, stats = split_message[2:5]
-            source = self.get_pokemon(source)
-            target = self.get_pokemon(target)
-            for stat in stats.split(", "):
-                source.boosts[stat], target.boosts[stat] = (
-                    target.boosts[stat],
-                    source.boosts[stat],
+            if override_move == "Sleep Talk":
+                # Sleep talk was used, but also reveals another move
+                reveal_other_move = True
+            elif override_move in {"Copycat", "Metronome", "Nature Power"}:
+                pass
+            elif self.logger is not None:
+                self.logger.warning(
+                    "Unmanaged [from]move message received - move %s in cleaned up "
+                    "message %s in battle %s turn %d",
+                    override_move,
+                    split_message,
+                    self.battle_tag,
+                    self.turn,
                 )
-        elif split_message[1] == "-transform":
-            pokemon, into = split_message[2:4]
-            self.get_pokemon(pokemon).transform(self.get_pokemon(into))
-        elif split_message[1] == "-zpower":
-            if self._player_role is not None and not split_message[2].startswith(
-                self._player_role
-            ):
-                self._opponent_can_z_move = False
 
+        if split_message[-1] == "null":
+            split_message = split_message[:-1]
+
+        if split_message[-1].startswith("[from]ability: "):
+            revealed_ability = split_message.pop()[15:]
             pokemon = split_message[2]
-            self.get_pokemon(pokemon).used_z_move()
-        elif split_message[1] == "clearpoke":
-            self.in_team_preview = True
-            for mon in self.team.values():
-                mon.clear_active()
-        elif split_message[1] == "gen":
-            self._format = split_message[2]
-        elif split_message[1] == "inactive":
-            if "disconnected" in split_message[2]:
-                self._anybody_inactive = True
-            elif "reconnected" in split_message[2]:
-                self._anybody_inactive = False
-                self._reconnected = True
-        elif split_message[1] == "player":
-            if len(split_message) == 6:
-                player, username, avatar, rating = split_message[2:6]
-            else:
-                if not self._anybody_inactive:
-                    if self._reconnected:
-                        self._reconnected = False
-                    else:
-                        raise RuntimeError(f"Invalid player message: {split_message}")
+            self.get_pokemon(pokemon).ability = revealed_ability
+
+            if revealed_ability == "Magic Bounce":
+                return
+            elif revealed_ability == "Dancer":
                 return
-            if username == self._player_username:
-                self._player_role = player
-            return self._players.append(
-                {
-                    "username": username,
-                    "player": player,
-                    "avatar": avatar,
-                    "rating": rating,
-                }
-            )
-        elif split_message[1] == "poke":
-            player, details = split_message[2:4]
-            self._register_teampreview_pokemon(player, details)
-        elif split_message[1] == "raw":
-            username, rating_info = split_message[2].split("'s rating: ")
-            rating = int(rating_info[:4])
-            if username == self.player_username:
-                self._rating = rating
-            elif username == self.opponent_username:
-                self._opponent_rating = rating
             elif self.logger is not None:
                 self.logger.warning(
-                    "Rating information regarding an unrecognized username received. "
-                    "Received '%s', while only known players are '%s' and '%s'",
-                    username,
-                    self.player_username,
-                    self.opponent_username,
+                    "Unmanaged [from]ability: message received - ability %s in "
+                    "cleaned up message %s in battle %s turn %d",
+                    revealed_ability,
+                    split_message,
+                    self.battle_tag,
+                    self.turn,
                 )
-        elif split_message[1] == "replace":
-            pokemon = split_message[2]
-            details = split_message[3]
-            self.end_illusion(pokemon, details)
-        elif split_message[1] == "start":
-            self.in_team_preview = False
-        elif split_message[1] == "swap":
-            pokemon, position = split_message[2:4]
-            self._swap(pokemon, position)  # type: ignore
-        elif split_message[1] == "teamsize":
-            player, number = split_message[2:4]
-            number = int(number)
-            self._team_size[player] = number
-        elif split_message[1] in {"message", "-message"} and self.logger is not None:
-            self.logger.info("Received message: %s", split_message[2])
-        elif split_message[1] == "-immune":
-            if len(split_message) == 4:
-                mon, cause = split_message[2:]
-
-                if cause.startswith("[from] ability:"):
-                    ability = cause.replace("[from] ability:", "")
-                    self.get_pokemon(mon).ability = to_id_str(ability)
-        elif split_message[1] == "-swapsideconditions":
-            self._side_conditions, self._opponent_side_conditions = (
-                self._opponent_side_conditions,
-                self._side_conditions,
+        if split_message[-1] == "[from]Magic Coat":
+            return
+
+        while split_message[-1] == "[still]":
+            split_message = split_message[:-1]
+
+        if split_message[-1] == "":
+            split_message = split_message[:-1]
+
+        if len(split_message) == 4:
+            pokemon, move = split_message[2:4]
+        elif len(split_message) == 5:
+            pokemon, move, presumed_target = split_message[2:5]
+
+            if len(presumed_target) > 4 and presumed_target[:4] in {
+                "p1: ",
+                "p2: ",
+                "p1a:",
+                "p1b:",
+                "p2a:",
+                "p2b:",
+            }:
+                pass
+            elif self.logger is not None:
+                self.logger.warning(
+                    "Unmanaged move message format received - cleaned up message %s"
+                    " in battle %s turn %d",
+                    split_message,
+                    self.battle_tag,
+                    self.turn,
+                )
+        else:
+            pokemon, move, presumed_target = split_message[2:5]
+            if self.logger is not None:
+                self.logger.warning(
+                    "Unmanaged move message format received - cleaned up message %s in "
+                    "battle %s turn %d",
+                    split_message,
+                    self.battle_tag,
+                    self.turn,
+                )
+
+        # Check if a silent-effect move has occurred (Minimize) and add the effect
+
+        if move.upper().strip() == "MINIMIZE":
+            temp_pokemon = self.get_pokemon(pokemon)
+            temp_pokemon.start_effect("MINIMIZE")
+
+        if override_move:
+            # Moves that can trigger this branch results in two `move` messages being sent.
+            # We're setting use=False in the one (with the override) in order to prevent two pps from being used
+            # incorrectly.
+            self.get_pokemon(pokemon).moved(override_move, failed=failed, use=False)
+        if override_move is None or reveal_other_move:
+            self.get_pokemon(pokemon).moved(move, failed=failed, use=False)
+
+    def _parse_cant_message(self, split_message: List[str]):
+        pokemon, _ = split_message[2:4]
+        self.get_pokemon(pokemon).cant_move()
+
+    def _parse_turn_message(self, split_message: List[str]):
+        self.end_turn(int(split_message[2]))
+
+    def _parse_heal_message(self, split_message: List[str]):
+        pokemon, hp_status = split_message[2:4]
+        self.get_pokemon(pokemon).heal(hp_status)
+        self._check_heal_message_for_ability(split_message)
+        self._check_heal_message_for_item(split_message)
+
+    def _parse_boost_message(self, split_message: List[str]):
+        pokemon, stat, amount = split_message[2:5]
+        self.get_pokemon(pokemon).boost(stat, int(amount))
+
+    def _parse_weather_message(self, split_message: List[str]):
+        weather = split_message[2]
+        if weather == "none":
+            self._weather = {}
+            return
+        else:
+            self._weather = {Weather.from_showdown_message(weather): self.turn}
+
+    def _parse_faint_message(self, split_message: List[str]):
+        pokemon = split_message[2]
+        self.get_pokemon(pokemon).faint()
+
+    def _parse_unboost_message(self, split_message: List[str]):
+        pokemon, stat, amount = split_message[2:5]
+        self.get_pokemon(pokemon).boost(stat, -int(amount))
+
+    def _parse_ability_message(self, split_message: List[str]):
+        pokemon, ability = split_message[2:4]
+        self.get_pokemon(pokemon).ability = ability
+
+    def _parse_effect_start_message(self, split_message: List[str]):
+        pokemon, effect = split_message[2:4]
+        pokemon = self.get_pokemon(pokemon)
+        pokemon.start_effect(effect)
+
+        if pokemon.is_dynamaxed:
+            if pokemon in set(self.team.values()) and self._dynamax_turn is None:
+                self._dynamax_turn = self.turn
+            # self._can_dynamax value is set via _parse_request()
+            elif (
+                pokemon in set(self.opponent_team.values())
+                and self._opponent_dynamax_turn is None
+            ):
+                self._opponent_dynamax_turn = self.turn
+                self.opponent_can_dynamax = False
+
+    def _parse_activate_message(self, split_message: List[str]):
+        target, effect = split_message[2:4]
+        if target:
+            self.get_pokemon(target).start_effect(effect)
+
+    def _parse_status_message(self, split_message: List[str]):
+        pokemon, status = split_message[2:4]
+        self.get_pokemon(pokemon).status = status
+
+    def _parse_rule_message(self, split_message: List[str]):
+        self.rules.append(split_message[2])
+
+    def _parse_clearallboost_message(self, split_message: List[str]):
+        self.clear_all_boosts()
+
+    def _parse_clearboost_message(self, split_message: List[str]):
+        pokemon = split_message[2]
+        self.get_pokemon(pokemon).clear_boosts()
+
+    def _parse_clearnegativeboost_message(self, split_message: List[str]):
+        pokemon = split_message[2]
+        self.get_pokemon(pokemon).clear_negative_boosts()
+
+    def _parse_clearpositiveboost_message(self, split_message: List[str]):
+        pokemon = split_message[2]
+        self.get_pokemon(pokemon).clear_positive_boosts()
+
+    def _parse_copyboost_message(self, split_message: List[str]):
+        source, target = split_message[2:4]
+        self.get_pokemon(target).copy_boosts(self.get_pokemon(source))
+
+    def _parse_curestatus_message(self, split_message: List[str]):
+        pokemon, status = split_message[2:4]
+        self.get_pokemon(pokemon).cure_status(status)
+
+    def _parse_cureteam_message(self, split_message: List[str]):
+        pokemon = split_message[2]
+        team = (
+            self.team if pokemon[:2] == self._player_role else self._opponent_team
+        )
+        for mon in team.values():
+            mon.cure_status()
+
+    def _parse_effect_end_message(self, split_message: List[str]):
+        pokemon, effect = split_message[2:4]
+        self.get_pokemon(pokemon).end_effect(effect)
+
+    def _parse_endability_message(self, split_message: List[str]):
+        pokemon = split_message[2]
+        self.get_pokemon(pokemon).ability = None
+
+    def _parse_enditem_message(self, split_message: List[str]):
+        pokemon, item = split_message[2:4]
+        self.get_pokemon(pokemon).end_item(item)
+
+    def _parse_fieldend_message(self, split_message: List[str]):
+        condition = split_message[2]
+        self._field_end(condition)
+
+    def _parse_fieldstart_message(self, split_message: List[str]):
+        condition = split_message[2]
+        self.field_start(condition)
+
+    def _parse_forme_change_message(self, split_message: List[str]):
+        pokemon, species = split_message[2:4]
+        self.get_pokemon(pokemon).forme_change(species)
+
+    def _parse_invertboost_message(self, split_message: List[str]):
+        pokemon = split_message[2]
+        self.get_pokemon(pokemon).invert_boosts()
+
+    def _parse_item_message(self, split_message: List[str]):
+        pokemon, item = split_message[2:4]
+        self.get_pokemon(pokemon).item = to_id_str(item)
+
+    def _parse_mega_message(self, split_message: List[str]):
+        if self.player_role is not None and not split_message[2].startswith(
+            self.player_role
+        ):
+            self._opponent_can_mega_evolve = False
+        pokemon, megastone = split_message[2:4]
+        self.get_pokemon(pokemon).mega_evolve(megastone)
+
+    def _parse_mustrecharge_message(self, split_message: List[str]):
+        pokemon = split_message[2]
+        self.get_pokemon(pokemon).must_recharge = True
+
+    def _parse_prepare_message(self, split_message: List[str]):
+        try:
+            attacker, move, defender = split_message[2:5]
+            defender = self.get_pokemon(defender)
+            if to_id_str(move) == "skydrop":
+                defender.start_effect("Sky Drop")
+        except ValueError:
+            attacker, move = split_message[2:4]
+            defender = None
+        self.get_pokemon(attacker).prepare(move, defender)
+
+    def _parse_primal_message(self, split_message: List[str]):
+        pokemon = split_message[2]
+        self.get_pokemon(pokemon).primal()
+
+    def _parse_setboost_message(self, split_message: List[str]):
+        pokemon, stat, amount = split_message[2:5]
+        self.get_pokemon(pokemon).set_boost(stat, int(amount))
+
+    def _parse_sethp_message(self, split_message: List[str]):
+        pokemon, hp_status = split_message[2:4]
+        self.get_pokemon(pokemon).set_hp(hp_status)
+
+    def _parse_sideend_message(self, split_message: List[str]):
+        side, condition = split_message[2:4]
+        self.side_end(side, condition)
+
+    def _parse_sidestart_message(self, split_message: List[str]):
+        side, condition = split_message[2:4]
+        self._side_start(side, condition)
+
+    def _parse_swapboost_message(self, split_message: List[str]):
+        source, target, stats = split_message[2:5]
+        source = self.get_pokemon(source)
+        target = self.get_pokemon(target)
+        for stat in stats.split(", "):
+            source.boosts[stat], target.boosts[stat] = (
+                target.boosts[stat],
+                source.boosts[stat],
             )
-        elif split_message[1] == "title":
-            player_1, player_2 = split_message[2].split(" vs. ")
-            self.players = player_1, player_2
-        elif split_message[1] == "-terastallize":
-            pokemon, type_ = split_message[2:]
-            pokemon = self.get_pokemon(pokemon)
-            pokemon.terastallize(type_)
-
-            if pokemon.terastallized:
-                if pokemon in set(self.opponent_team.values()):
-                    self._opponent_can_terrastallize = False
+
+    def _parse_transform_message(self, split_message: List[str]):
+        pokemon, into = split_message[2:4]
+        self.get_pokemon(pokemon).transform(self.get_pokemon(into))
+
+    def _parse_zpower_message(self, split_message: List[str]):
+        if self._player_role is not None and not split_message[2].startswith(
+            self._player_role
+        ):
+            self._opponent_can_z_move = False
+
+        pokemon = split_message[2]
+        self.get_pokemon(pokemon).used_z_move()
+
+    def _parse_clearpoke_message(self, split_message: List[str]):
+        self.in_team_preview = True
+        for mon in self.team.values():
+            mon.clear_active()
+
+    def _parse_gen_message(self, split_message: List[str]):
+        self._format = split_message[2]
+
+    def _parse_inactive_message(self, split_message: List[str]):
+        if "disconnected" in split_message[2]:
+            self._anybody_inactive = True
+        elif "reconnected" in split_message[2]:
+            self._anybody_inactive = False
+            self._reconnected = True
+
+    def _parse_player_message(self, split_message: List[str]):
+        if len(split_message) == 6:
+            player, username, avatar, rating = split_message[2:6]
         else:
-            raise NotImplementedError(split_message)
+            if not self._anybody_inactive:
+                if self._reconnected:
+                    self._reconnected = False
+                else:
+                    raise RuntimeError(f"Invalid player message: {split_message}")
+            return
+        if username == self._player_username:
+            self._player_role = player
+        return self._players.append(
+            {
+                "username": username,
+                "player": player,
+                "avatar": avatar,
+                "rating": rating,
+            }
+        )
+
+    def _parse_poke_message(self, split_message: List[str]):
+        player, details = split_message[2:4]
+        self._register_teampreview_pokemon(player, details)
+
+    def _parse_raw_message(self, split_message: List[str]):
+        username, rating_info = split_message[2].split("'s rating: ")
+        rating = int(rating_info[:4])
+        if username == self.player_username:
+            self._rating = rating
+        elif username == self.opponent_username:
+            self._opponent_rating = rating
+        elif self.logger is not None:
+            self.logger.warning(
+                "Rating information regarding an unrecognized username received. "
+                "Received '%s', while only known players are '%s' and '%s'",
+                username,
+                self.player_username,
+                self.opponent_username,
+            )
+
+    def _parse_replace_message(self, split_message: List[str]):
+        pokemon = split_message[2]
+        details = split_message[3]
+        self.end_illusion(pokemon, details)
+
+    def _parse_start_message(self, split_message: List[str]):
+        self.in_team_preview = False
+
+    def _parse_swap_message(self, split_message: List[str]):
+        pokemon, position = split_message[2:4]
+        self._swap(pokemon, position)  # type: ignore
+
+    def _parse_teamsize_message(self, split_message: List[str]):
+        player, number = split_message[2:4]
+        number = int(number)
+        self._team_size[player] = number
+
+    def _parse_text_message(self, split_message: List[str]):
+        if self.logger is not None:
+            self.logger.info("Received message: %s", split_message[2])
+
+    def _parse_immune_message(self, split_message: List[str]):
+        if len(split_message) == 4:
+            mon, cause = split_message[2:]
+
+            if cause.startswith("[from] ability:"):
+                ability = cause.replace("[from] ability:", "")
+                self.get_pokemon(mon).ability = to_id_str(ability)
+
+    def _parse_swapsideconditions_message(self, split_message: List[str]):
+        self._side_conditions, self._opponent_side_conditions = (
+            self._opponent_side_conditions,
+            self._side_conditions,
+        )
+
+    def _parse_title_message(self, split_message: List[str]):
+        player_1, player_2 = split_message[2].split(" vs. ")
+        self.players = player_1, player_2
+
+    def _parse_terastallize_message(self, split_message: List[str]):
+        pokemon, type_ = split_message[2:]
+        pokemon = self.get_pokemon(pokemon)
+        pokemon.terastallize(type_)
+
+        if pokemon.terastallized:
+            if pokemon in set(self.opponent_team.values()):
+                self._opponent_can_terrastallize = False
+
+    _message_handlers: Dict[str, Callable[["AbstractBattle", List[str]], Any]] = {
+        "drag": _parse_switch_message,
+        "switch": _parse_switch_message,
+        "-damage": _parse_damage_message,
+        "move": _parse_move_message,
+        "cant": _parse_cant_message,
+        "turn": _parse_turn_message,
+        "-heal": _parse_heal_message,
+        "-boost": _parse_boost_message,
+        "-weather": _parse_weather_message,
+        "faint": _parse_faint_message,
+        "-unboost": _parse_unboost_message,
+        "-ability": _parse_ability_message,
+        "-start": _parse_effect_start_message,
+        "-activate": _parse_activate_message,
+        "-status": _parse_status_message,
+        "rule": _parse_rule_message,
+        "-clearallboost": _parse_clearallboost_message,
+        "-clearboost": _parse_clearboost_message,
+        "-clearnegativeboost": _parse_clearnegativeboost_message,
+        "-clearpositiveboost": _parse_clearpositiveboost_message,
+        "-copyboost": _parse_copyboost_message,
+        "-curestatus": _parse_curestatus_message,
+        "-cureteam": _parse_cureteam_message,
+        "-end": _parse_effect_end_message,
+        "-endability": _parse_endability_message,
+        "-enditem": _parse_enditem_message,
+        "-fieldend": _parse_fieldend_message,
+        "-fieldstart": _parse_fieldstart_message,
+        "-formechange": _parse_forme_change_message,
+        "detailschange": _parse_forme_change_message,
+        "-invertboost": _parse_invertboost_message,
+        "-item": _parse_item_message,
+        "-mega": _parse_mega_message,
+        "-mustrecharge": _parse_mustrecharge_message,
+        "-prepare": _parse_prepare_message,
+        "-primal": _parse_primal_message,
+        "-setboost": _parse_setboost_message,
+        "-sethp": _parse_sethp_message,
+        "-sideend": _parse_sideend_message,
+        "-sidestart": _parse_sidestart_message,
+        "-swapboost": _parse_swapboost_message,
+        "-transform": _parse_transform_message,
+        "-zpower": _parse_zpower_message,
+        "clearpoke": _parse_clearpoke_message,
+        "gen": _parse_gen_message,
+        "inactive": _parse_inactive_message,
+        "player": _parse_player_message,
+        "poke": _parse_poke_message,
+        "raw": _parse_raw_message,
+        "replace": _parse_replace_message,
+        "start": _parse_start_message,
+        "swap": _parse_swap_message,
+        "teamsize": _parse_teamsize_message,
+        "message": _parse_text_message,
+        "-message": _parse_text_message,
+        "-immune": _parse_immune_message,
+        "-swapsideconditions": _parse_swapsideconditions_message,
+        "title": _parse_title_message,
+        "-terastallize": _parse_terastallize_message,
+    }
 
     @abstractmethod
     def parse_request(self, request: Dict[str, Any]):
@@ -783,6 +958,13 @@ class AbstractBattle(ABC):
         elif condition not in conditions:
             conditions[condition] = self.turn
 
+    def snapshot(self) -> BattleSnapshot:
+        """
+        :return: An immutable snapshot of the battle's current state.
+        :rtype: BattleSnapshot
+        """
+        return BattleSnapshot.from_battle(self)
+
     def _swap(self, pokemon_str: str, slot: str):
         if self.logger is not None:
             self.logger.warning("swap method in Battle is not implemented")
@@ -876,6 +1058,25 @@ class AbstractBattle(ABC):
         ):
             return max(3 - (self.turn - self._dynamax_turn), 0)
 
+    @property
+    def battle_msg_history(self) -> str:
+        """Kept for compatibility; prefer event_log, which does not render the
+        whole history.
+
+        :return: The narration of the turns kept in the event log, separated by
+            `[sep]`.
+        :rtype: str
+        """
+        return "[sep]".join(record.text for record in self._event_log)
+
+    @property
+    def event_log(self) -> BattleEventLog:
+        """
+        :return: The log of the battle's narrated events.
+        :rtype: BattleEventLog
+        """
+        return self._event_log
+
     @property
     def fields(self) -> Dict[Field, int]:
         """
@@ -897,6 +1098,14 @@ class AbstractBattle(ABC):
     def force_switch(self) -> Any:
         pass
 
+    @property
+    def hp_timelines(self) -> Dict[str, HPTimeline]:
+        """
+        :return: The HP timelines of the pokemons seen in the battle, by identifier.
+        :rtype: Dict[str, HPTimeline]
+        """
+        return self._hp_timelines
+
     @property
     def lost(self) -> Optional[bool]:
         """
@@ -996,6 +1205,20 @@ class AbstractBattle(ABC):
     def opponent_username(self, value: str):
         self._opponent_username = value
 
+    @property
+    def pokemon_hp_log_dict(self) -> Dict[str, List[str]]:
+        """Kept for compatibility; prefer hp_timelines, which do not format HP
+        values.
+
+        :return: The HP statuses kept in hp timelines, eg. `64/100 par`, by pokemon
+            identifier.
+        :rtype: Dict[str, List[str]]
+        """
+        return {
+            identifier: list(timeline.hp_statuses())
+            for identifier, timeline in self._hp_timelines.items()
+        }
+
     @property
     def player_role(self) -> Optional[str]:
         """
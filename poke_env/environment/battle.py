@@ -33,8 +33,6 @@ class Battle(AbstractBattle):
         self._maybe_trapped: bool = False
         self._trapped: bool = False
 
-        self.battle_msg_history = ""
-        self.pokemon_hp_log_dict = {}
         self.speed_list = []
 
     def clear_all_boosts(self):
@@ -139,6 +137,22 @@ class Battle(AbstractBattle):
                     if not pokemon.active:
                         self._available_switches.append(pokemon)
 
+    def expect_forced_switch(self, available_switches: List[Pokemon]) -> None:
+        """
+        Sets the options of the battle to those of an upcoming forced switch request,
+        before it is received. They are overwritten when the request is parsed.
+
+        :param available_switches: The pokemons expected to be switchable.
+        :type available_switches: List[Pokemon]
+        """
+        self._available_moves = []
+        self._available_switches = list(available_switches)
+        self._can_mega_evolve = False
+        self._can_z_move = False
+        self._can_dynamax = False
+        self._can_tera = None
+        self._force_switch = True
+
     def switch(self, pokemon_str: str, details: str, hp_status: str):
         identifier = pokemon_str.split(":")[0][:2]
 
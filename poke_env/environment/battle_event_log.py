@@ -0,0 +1,130 @@
+"""This module defines the BattleEventLog class, which records the narrated events
+of a battle, turn by turn.
+"""
+from collections import deque
+from typing import Deque, Iterator, List, NamedTuple, Optional, Tuple
+
+
+class BattleEvent(NamedTuple):
+    """A narrated battle message."""
+
+    turn: int
+    message_type: str
+    pokemon: str
+    arguments: Tuple[str, ...]
+    description: str
+
+
+class TurnRecord:
+    """The events of a turn. Turn 0 gathers the events preceding the first turn.
+
+    :param turn: The turn number.
+    :type turn: int
+    """
+
+    __slots__ = ("turn", "events", "_text")
+
+    def __init__(self, turn: int):
+        self.turn = turn
+        self.events: List[BattleEvent] = []
+        self._text: Optional[str] = None
+
+    def add(self, event: BattleEvent):
+        self.events.append(event)
+        self._text = None
+
+    @property
+    def text(self) -> str:
+        """
+        :return: The narration of the turn, rendered on first access and cached
+            until the next event.
+        :rtype: str
+        """
+        if self._text is None:
+            header = f"Turn {self.turn}:" if self.turn else ""
+            self._text = header + "".join(event.description for event in self.events)
+        return self._text
+
+
+class BattleEventLog:
+    """Bounded, structured record of a battle's narrated events.
+
+    The log keeps the records of the last max_turns turns. Events are stored
+    with their message type and arguments, so that they can be consumed without
+    parsing the narration, and the narration of each turn is rendered lazily.
+
+    :param max_turns: Number of turns kept. If None, the log is unbounded.
+    :type max_turns: int, optional
+    """
+
+    DEFAULT_MAX_TURNS = 64
+
+    def __init__(self, max_turns: Optional[int] = DEFAULT_MAX_TURNS):
+        self._turns: Deque[TurnRecord] = deque([TurnRecord(0)], maxlen=max_turns)
+
+    def __iter__(self) -> Iterator[TurnRecord]:
+        return iter(self._turns)
+
+    def __len__(self) -> int:
+        return len(self._turns)
+
+    def record(self, split_message: List[str], description: str = ""):
+        """Records a battle message and its narration. Turn messages close the
+        current turn, with the given description, and open the next one.
+
+        :param split_message: The split battle message.
+        :type split_message: List[str]
+        :param description: The message's narration.
+        :type description: str
+        """
+        current_turn = self._turns[-1]
+        current_turn.add(
+            BattleEvent(
+                current_turn.turn,
+                split_message[1],
+                split_message[2] if len(split_message) > 2 else "",
+                tuple(split_message[3:]),
+                description,
+            )
+        )
+        if split_message[1] == "turn":
+            self._turns.append(TurnRecord(int(split_message[2])))
+
+    @property
+    def current_turn(self) -> TurnRecord:
+        """
+        :return: The record of the turn in progress.
+        :rtype: TurnRecord
+        """
+        return self._turns[-1]
+
+    def last_turns(self, n_turns: int) -> List[TurnRecord]:
+        """
+        :param n_turns: The number of turns.
+        :type n_turns: int
+        :return: The records of the last n_turns turns, including the current one.
+        :rtype: List[TurnRecord]
+        """
+        start = max(len(self._turns) - n_turns, 0)
+        return [self._turns[i] for i in range(start, len(self._turns))]
+
+    def narration(self, n_turns: int, separator: str = "\n") -> str:
+        """Renders the narration of the last n_turns turns.
+
+        :param n_turns: The number of turns.
+        :type n_turns: int
+        :param separator: Separates turns. Defaults to a line break.
+        :type separator: str
+        :return: The narration.
+        :rtype: str
+        """
+        return separator.join(record.text for record in self.last_turns(n_turns))
+
+    @property
+    def events(self) -> Iterator[BattleEvent]:
+        """
+        :return: The recorded events, oldest first.
+        :rtype: Iterator[BattleEvent]
+        """
+        for record in self._turns:
+            yield from record.events
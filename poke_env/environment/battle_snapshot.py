@@ -0,0 +1,110 @@
+"""This module defines immutable snapshots of battle states.
+"""
+from __future__ import annotations
+
+from types import MappingProxyType
+from typing import TYPE_CHECKING, Mapping, NamedTuple, Optional
+
+from poke_env.environment.field import Field
+from poke_env.environment.side_condition import SideCondition
+from poke_env.environment.status import Status
+from poke_env.environment.weather import Weather
+
+if TYPE_CHECKING:
+    from poke_env.environment.abstract_battle import AbstractBattle
+    from poke_env.environment.pokemon import Pokemon
+
+
+class PokemonSnapshot(NamedTuple):
+    """The state of a pokemon at a given point of a battle."""
+
+    species: str
+    active: bool
+    current_hp: int
+    max_hp: int
+    current_hp_fraction: float
+    fainted: bool
+    status: Optional[Status]
+    boosts: Mapping[str, int]
+
+    def __hash__(self) -> int:
+        return hash(self[:-1])
+
+    @classmethod
+    def from_pokemon(cls, pokemon: Pokemon) -> PokemonSnapshot:
+        return cls(
+            species=pokemon.species,
+            active=bool(pokemon.active),
+            current_hp=pokemon.current_hp,
+            max_hp=pokemon.max_hp,
+            current_hp_fraction=pokemon.current_hp_fraction,
+            fainted=pokemon.fainted,
+            status=pokemon.status,
+            boosts=MappingProxyType(dict(pokemon.boosts)),
+        )
+
+
+class BattleSnapshot(NamedTuple):
+    """The state of a battle at a given point, as needed to compute rewards.
+
+    Snapshots are built in time linear in the size of the teams, and expose the
+    attributes of battles read by Player.reward_computing_helper, with the same
+    names, so that they can be compared with live battles. They are immutable and
+    do not follow later updates of the battle.
+    """
+
+    battle_tag: str
+    turn: int
+    finished: bool
+    won: Optional[bool]
+    lost: Optional[bool]
+    team: Mapping[str, PokemonSnapshot]
+    opponent_team: Mapping[str, PokemonSnapshot]
+    side_conditions: Mapping[SideCondition, int]
+    opponent_side_conditions: Mapping[SideCondition, int]
+    weather: Mapping[Weather, int]
+    fields: Mapping[Field, int]
+
+    def __hash__(self) -> int:
+        return hash((self.battle_tag, self.turn, self.finished))
+
+    @classmethod
+    def from_battle(cls, battle: AbstractBattle) -> BattleSnapshot:
+        return cls(
+            battle_tag=battle.battle_tag,
+            turn=battle.turn,
+            finished=battle.finished,
+            won=battle.won,
+            lost=battle.lost,
+            team=_snapshot_team(battle.team),
+            opponent_team=_snapshot_team(battle.opponent_team),
+            side_conditions=MappingProxyType(dict(battle.side_conditions)),
+            opponent_side_conditions=MappingProxyType(
+                dict(battle.opponent_side_conditions)
+            ),
+            weather=MappingProxyType(dict(battle.weather)),
+            fields=MappingProxyType(dict(battle.fields)),
+        )
+
+    @property
+    def active_pokemon(self) -> Optional[PokemonSnapshot]:
+        for pokemon in self.team.values():
+            if pokemon.active:
+                return pokemon
+        return None
+
+    @property
+    def opponent_active_pokemon(self) -> Optional[PokemonSnapshot]:
+        for pokemon in self.opponent_team.values():
+            if pokemon.active:
+                return pokemon
+        return None
+
+
+def _snapshot_team(team: Mapping[str, Pokemon]) -> Mapping[str, PokemonSnapshot]:
+    return MappingProxyType(
+        {
+            identifier: PokemonSnapshot.from_pokemon(pokemon)
+            for identifier, pokemon in team.items()
+        }
+    )
@@ -0,0 +1,146 @@
+"""This module defines the HPTimeline class, which records the HP values of a
+pokemon over a battle.
+"""
+from array import array
+from typing import Iterator, Optional, Tuple
+
+from poke_env.environment.status import Status
+
+
+def parse_hp_status(hp_status: str) -> Tuple[int, int]:
+    """Parses the HP part of a showdown HP status, eg. `64/100 par` or `0 fnt`.
+
+    :param hp_status: The HP status.
+    :type hp_status: str
+    :return: The current and max HP. The max HP is 0 when the status does not
+        give it, which only happens for fainted pokemons.
+    :rtype: Tuple[int, int]
+    """
+    hp = hp_status.split(" ")[0]
+    if "/" in hp:
+        current_hp, max_hp = hp.split("/")
+        return int(current_hp), int(max_hp)
+    return int(hp), 0
+
+
+def parse_status(hp_status: str) -> Optional[Status]:
+    """Parses the status part of a showdown HP status, eg. `64/100 par`.
+
+    :param hp_status: The HP status.
+    :type hp_status: str
+    :return: The status, if any.
+    :rtype: Status, optional
+    """
+    parts = hp_status.split(" ")
+    if len(parts) > 1 and parts[1].upper() in Status.__members__:
+        return Status[parts[1].upper()]
+    return None
+
+
+def hp_percentage(current_hp: int, max_hp: int) -> int:
+    """
+    :param current_hp: The current HP.
+    :type current_hp: int
+    :param max_hp: The max HP.
+    :type max_hp: int
+    :return: The current HP, as a rounded percentage of the max HP.
+    :rtype: int
+    """
+    if current_hp == 0:
+        return 0
+    return round(current_hp / max_hp * 100)
+
+
+class HPTimeline:
+    """Successive HP values of a pokemon, stored as pairs of integers, along with
+    the status reported with each value.
+
+    When max_length is set, older values are dropped in batches once the timeline
+    holds twice as many, so that appending stays O(1) amortized: at least the
+    last max_length values are always kept.
+
+    :param max_length: Minimum number of values kept. If None, every value is
+        kept.
+    :type max_length: int, optional
+    """
+
+    __slots__ = ("_values", "_statuses", "max_length")
+
+    def __init__(self, max_length: Optional[int] = None):
+        self._values = array("i")
+        # Status values, 0 standing for no status
+        self._statuses = array("b")
+        self.max_length = max_length
+
+    def __getitem__(self, index: int) -> Tuple[int, int]:
+        index = range(len(self))[index]
+        return self._values[2 * index], self._values[2 * index + 1]
+
+    def __iter__(self) -> Iterator[Tuple[int, int]]:
+        values = self._values
+        return ((values[i], values[i + 1]) for i in range(0, len(values), 2))
+
+    def __len__(self) -> int:
+        return len(self._values) // 2
+
+    def append(self, current_hp: int, max_hp: int, status: Optional[Status] = None):
+        """Records an HP value.
+
+        :param current_hp: The current HP.
+        :type current_hp: int
+        :param max_hp: The max HP.
+        :type max_hp: int
+        :param status: The status reported with the value, if any.
+        :type status: Status, optional
+        """
+        self._values.append(current_hp)
+        self._values.append(max_hp)
+        self._statuses.append(status.value if status else 0)
+        if self.max_length is not None and len(self._statuses) >= 2 * self.max_length:
+            del self._values[: -2 * self.max_length]
+            del self._statuses[: -self.max_length]
+
+    def append_hp_status(self, hp_status: str):
+        """Records an HP value and its status from a showdown HP status.
+
+        :param hp_status: The HP status, eg. `64/100 par`.
+        :type hp_status: str
+        """
+        self.append(*parse_hp_status(hp_status), parse_status(hp_status))
+
+    def statuses(self) -> Iterator[Optional[Status]]:
+        """
+        :return: The statuses reported with each value, oldest first.
+        :rtype: Iterator[Status, optional]
+        """
+        return (Status(value) if value else None for value in self._statuses)
+
+    def hp_statuses(self) -> Iterator[str]:
+        """
+        :return: The recorded values, formatted back as showdown HP statuses, eg.
+            `64/100 par` or `0 fnt`.
+        :rtype: Iterator[str]
+        """
+        for (current_hp, max_hp), status in zip(self, self.statuses()):
+            hp = f"{current_hp}/{max_hp}" if max_hp else str(current_hp)
+            yield f"{hp} {status.name.lower()}" if status else hp
+
+    @property
+    def last(self) -> Optional[Tuple[int, int]]:
+        """
+        :return: The last current and max HP recorded, if any.
+        :rtype: Tuple[int, int], optional
+        """
+        if not self._values:
+            return None
+        return self._values[-2], self._values[-1]
+
+    @property
+    def last_percentage(self) -> Optional[int]:
+        """
+        :return: The last HP recorded, as a rounded percentage of the max HP.
+        :rtype: int, optional
+        """
+        if not self._values:
+            return None
+        return hp_percentage(self._values[-2], self._values[-1])
@@ -1,6 +1,6 @@
 """poke_env.player module init.
 """
-from poke_env.concurrency import POKE_LOOP
+from poke_env.concurrency import POKE_LOOP, LoopWorkerPool
 from poke_env.player import random_player, utils
 from poke_env.player.baselines import MaxBasePowerPlayer, SimpleHeuristicsPlayer
 from poke_env.player.gpt_player import LLMPlayer
@@ -12,14 +12,30 @@ from poke_env.player.battle_order import (
     DoubleBattleOrder,
     ForfeitBattleOrder,
 )
+from poke_env.player.model_adapters import (
+    BedrockModelAdapter,
+    MockModelAdapter,
+    ModelAdapter,
+    ModelResponse,
+    register_model_adapter,
+)
+from poke_env.player.observation_encoder import ObservationEncoder
 from poke_env.player.openai_api import ActType, ObsType, OpenAIGymEnv
 from poke_env.player.player import Player
 from poke_env.player.random_player import RandomPlayer
+from poke_env.player.response_cache import ResponseCache
+from poke_env.player.sharding import (
+    BattleRecord,
+    ShardedBattlesResult,
+    run_sharded_battles,
+)
+from poke_env.player.vector_env import VectorOpenAIGymEnv
 from poke_env.player.utils import (
     background_cross_evaluate,
     background_evaluate_player,
     cross_evaluate,
     evaluate_player,
+    stream_cross_evaluate,
 )
 from poke_env.ps_client import PSClient
 
@@ -32,7 +48,9 @@ __all__ = [
     "ObsType",
     "ForfeitBattleOrder",
     "POKE_LOOP",
+    "LoopWorkerPool",
     "OpenAIGymEnv",
+    "VectorOpenAIGymEnv",
     "PSClient",
     "Player",
     "RandomPlayer",
@@ -40,9 +58,20 @@ __all__ = [
     "background_cross_evaluate",
     "background_evaluate_player",
     "evaluate_player",
+    "stream_cross_evaluate",
     "BattleOrder",
     "DefaultBattleOrder",
     "DoubleBattleOrder",
     "MaxBasePowerPlayer",
     "SimpleHeuristicsPlayer",
+    "BedrockModelAdapter",
+    "MockModelAdapter",
+    "ModelAdapter",
+    "ModelResponse",
+    "register_model_adapter",
+    "ResponseCache",
+    "BattleRecord",
+    "ShardedBattlesResult",
+    "run_sharded_battles",
+    "ObservationEncoder",
 ]
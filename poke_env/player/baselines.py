@@ -2,63 +2,23 @@ from typing import List
 import json
 import os
 
+import numpy as np
+
+from poke_env.damage import boost_multiplier, calculate_damages
 from poke_env.environment.abstract_battle import AbstractBattle
 from poke_env.environment.double_battle import DoubleBattle
-from poke_env.environment.move_category import MoveCategory
 from poke_env.environment.pokemon import Pokemon
 from poke_env.environment.side_condition import SideCondition
 from poke_env.player.player import Player
 from poke_env.data.gen_data import GenData
-
-with open("./poke_env/data/static/moves/moves_effect.json", "r") as f:
-    move_effect = json.load(f)
-
-def calculate_move_type_damage_multipier(type_1, type_2, type_chart, constraint_type_list):
-    TYPE_list = 'BUG,DARK,DRAGON,ELECTRIC,FAIRY,FIGHTING,FIRE,FLYING,GHOST,GRASS,GROUND,ICE,NORMAL,POISON,PSYCHIC,ROCK,STEEL,WATER'.split(",")
-
-    move_type_damage_multiplier_list = []
-
-    if type_2:
-        for type in TYPE_list:
-            move_type_damage_multiplier_list.append(type_chart[type_1][type] * type_chart[type_2][type])
-        move_type_damage_multiplier_dict = dict(zip(TYPE_list, move_type_damage_multiplier_list))
-    else:
-        move_type_damage_multiplier_dict = type_chart[type_1]
-
-    effective_type_list = []
-    extreme_type_list = []
-    resistant_type_list = []
-    extreme_resistant_type_list = []
-    immune_type_list = []
-    for type, value in move_type_damage_multiplier_dict.items():
-        if value == 2:
-            effective_type_list.append(type)
-        elif value == 4:
-            extreme_type_list.append(type)
-        elif value == 1 / 2:
-            resistant_type_list.append(type)
-        elif value == 1 / 4:
-            extreme_resistant_type_list.append(type)
-        elif value == 0:
-            immune_type_list.append(type)
-        else:  # value == 1
-            continue
-
-    if constraint_type_list:
-        extreme_type_list = list(set(extreme_type_list).intersection(set(constraint_type_list)))
-        effective_type_list = list(set(effective_type_list).intersection(set(constraint_type_list)))
-        resistant_type_list = list(set(resistant_type_list).intersection(set(constraint_type_list)))
-        extreme_resistant_type_list = list(set(extreme_resistant_type_list).intersection(set(constraint_type_list)))
-        immune_type_list = list(set(immune_type_list).intersection(set(constraint_type_list)))
-
-    return extreme_type_list, effective_type_list, resistant_type_list, extreme_resistant_type_list, immune_type_list
-
+from poke_env.data.knowledge_base import KnowledgeBase
+from poke_env.data.type_matchup import TypeMatchup
 
 def move_type_damage_wraper(pokemon_name, type_1, type_2, type_chart, constraint_type_list=None):
 
     move_type_damage_prompt = ""
-    extreme_effective_type_list, effective_type_list, resistant_type_list, extreme_resistant_type_list, immune_type_list = calculate_move_type_damage_multipier(
-        type_1, type_2, type_chart, constraint_type_list)
+    extreme_effective_type_list, effective_type_list, resistant_type_list, extreme_resistant_type_list, immune_type_list = TypeMatchup.from_type_chart(
+        type_chart).types_by_multiplier(type_1, type_2, constraint_type_list)
 
     if effective_type_list or resistant_type_list or immune_type_list:
 
@@ -104,10 +64,9 @@ class SimpleHeuristicsPlayer(Player):
     SWITCH_OUT_MATCHUP_THRESHOLD = -2
 
     def _estimate_matchup(self, mon: Pokemon, opponent: Pokemon):
-        score = max([opponent.damage_multiplier(t) for t in mon.types if t is not None])
-        score -= max(
-            [mon.damage_multiplier(t) for t in opponent.types if t is not None]
-        )
+        matchup = TypeMatchup.from_format(self.format)
+        score = matchup.best_multiplier(mon, opponent)
+        score -= matchup.best_multiplier(opponent, mon)
         if mon.base_stats["spe"] > opponent.base_stats["spe"]:
             score += self.SPEED_TIER_COEFICIENT
         elif opponent.base_stats["spe"] > mon.base_stats["spe"]:
@@ -118,6 +77,24 @@ class SimpleHeuristicsPlayer(Player):
 
         return score
 
+    def _estimate_matchups(self, mons: List[Pokemon], opponent: Pokemon) -> np.ndarray:
+        matchup = TypeMatchup.from_format(self.format)
+        scores = matchup.best_multipliers(mons, opponent)
+        scores -= matchup.multipliers(
+            [t for t in (opponent.type_1, opponent.type_2) if t is not None], mons
+        ).max(axis=0)
+
+        speeds = np.array([mon.base_stats["spe"] for mon in mons])
+        scores += np.sign(speeds - opponent.base_stats["spe"]) * (
+            self.SPEED_TIER_COEFICIENT
+        )
+
+        hp_fractions = np.array([mon.current_hp_fraction for mon in mons])
+        scores += hp_fractions * self.HP_FRACTION_COEFICIENT
+        scores -= opponent.current_hp_fraction * self.HP_FRACTION_COEFICIENT
+
+        return scores
+
     def _should_dynamax(self, battle: AbstractBattle, n_remaining_mons: int):
         if battle.can_dynamax and self._dynamax_disable is False:
             # Last full HP mon
@@ -145,11 +122,7 @@ class SimpleHeuristicsPlayer(Player):
         active = battle.active_pokemon
         opponent = battle.opponent_active_pokemon
         # If there is a decent switch in...
-        if [
-            m
-            for m in battle.available_switches
-            if self._estimate_matchup(m, opponent) > 0
-        ]:
+        if (self._estimate_matchups(battle.available_switches, opponent) > 0).any():
             # ...and a 'good' reason to switch out
             if active.boosts["def"] <= -3 or active.boosts["spd"] <= -3:
                 return True
@@ -170,14 +143,6 @@ class SimpleHeuristicsPlayer(Player):
                 return True
         return False
 
-    def _stat_estimation(self, mon: Pokemon, stat: str):
-        # Stats boosts value
-        if mon.boosts[stat] > 1:
-            boost = (2 + mon.boosts[stat]) / 2
-        else:
-            boost = 2 / (2 - mon.boosts[stat])
-        return ((2 * mon.base_stats[stat] + 31) + 5) * boost
-
     def calc_reward(
             self, current_battle: AbstractBattle
     ) -> float:
@@ -248,12 +213,10 @@ class SimpleHeuristicsPlayer(Player):
         # with open("./poke_env/data/static/moves/gen7pokemon_move_dict.json", "w") as f:
         #     json.dump(self.pokemon_move_dict, f, indent=4)
 
-        with open("./poke_env/data/static/moves/moves_effect.json", "r") as f:
-            self.move_effect = json.load(f)
-        with open("./poke_env/data/static/abilities/ability_effect.json", "r") as f:
-            self.ability_effect = json.load(f)
-        with open("./poke_env/data/static/items/item_effect.json", "r") as f:
-            self.item_effect = json.load(f)
+        knowledge_base = KnowledgeBase.from_format(self.format)
+        self.move_effect = knowledge_base.move_effect
+        self.ability_effect = knowledge_base.ability_effect
+        self.item_effect = knowledge_base.item_effect
 
         set(self.move_effect.keys())
 
@@ -267,14 +230,6 @@ class SimpleHeuristicsPlayer(Player):
         active = battle.active_pokemon
         opponent = battle.opponent_active_pokemon
 
-        # Rough estimation of damage ratio
-        physical_ratio = self._stat_estimation(active, "atk") / self._stat_estimation(
-            opponent, "def"
-        )
-        special_ratio = self._stat_estimation(active, "spa") / self._stat_estimation(
-            opponent, "spd"
-        )
-
         next_action = None
         if battle.available_moves and (
             not self._should_switch_out(battle) or not battle.available_switches
@@ -328,19 +283,18 @@ class SimpleHeuristicsPlayer(Player):
                         break
 
             if next_action is None:
-                move = max(
-                    battle.available_moves,
-                    key=lambda m: m.base_power
-                    * (1.5 if m.type in active.types else 1)
-                    * (
-                        physical_ratio
-                        if m.category == MoveCategory.PHYSICAL
-                        else special_ratio
-                    )
-                    * m.accuracy
-                    * m.expected_hits
-                    * opponent.damage_multiplier(m),
+                moves = battle.available_moves
+                _, damages = calculate_damages(
+                    active,
+                    moves,
+                    [opponent],
+                    self.gen.gen,
+                    next(iter(battle.weather), None),
                 )
+                expected_damages = damages[:, 0] * [
+                    m.accuracy * m.expected_hits for m in moves
+                ]
+                move = moves[int(np.argmax(expected_damages))]
                 next_action = self.create_order(
                     move, dynamax=self._should_dynamax(battle, n_remaining_mons)
                 )
@@ -348,10 +302,7 @@ class SimpleHeuristicsPlayer(Player):
         if next_action is None and battle.available_switches:
             switches: List[Pokemon] = battle.available_switches
             next_action = self.create_order(
-                max(
-                    switches,
-                    key=lambda s: self._estimate_matchup(s, opponent),
-                )
+                switches[int(np.argmax(self._estimate_matchups(switches, opponent)))]
             )
 
         if next_action:
@@ -380,9 +331,9 @@ class SimpleHeuristicsPlayer(Player):
         system_prompt = "You are a pokemon master that targets to win the pokemon battle.\n"
         n_turn = 5
         if "p1" in list(battle.team.keys())[0]:
-            context_prompt = f"Historical turns:\n" + "\n".join(battle.battle_msg_history.split("[sep]")[-1 * (n_turn + 1):]).replace("p1a: ", "").replace("p2a:","opposing").replace("Player1", "You").replace("Player2", "Opponent")
+            context_prompt = f"Historical turns:\n" + battle.event_log.narration(n_turn + 1).replace("p1a: ", "").replace("p2a:","opposing").replace("Player1", "You").replace("Player2", "Opponent")
         else:
-            context_prompt = f"Historical turns:\n" + "\n".join(battle.battle_msg_history.split("[sep]")[-1 * (n_turn + 1):]).replace("p2a: ", "").replace("p1a:","opposing").replace("Player2", "You").replace("Player1", "Opponent")
+            context_prompt = f"Historical turns:\n" + battle.event_log.narration(n_turn + 1).replace("p2a: ", "").replace("p1a:","opposing").replace("Player2", "You").replace("Player1", "Opponent")
 
         if battle.active_pokemon.fainted:
             battle_prompt = system_prompt + context_prompt + f" Your {battle.active_pokemon.species} fainted. You need to decide which pokemon to switch.\nCurrent battle state:\n"
@@ -428,7 +379,7 @@ class SimpleHeuristicsPlayer(Player):
         opponent_boost_list = []
         for ability in ability_list:
             if opponent_boosts[ability] != 0:
-                multiplier = str(int(self.boost_multiplier(ability, opponent_boosts[ability]) * 100))
+                multiplier = str(int(boost_multiplier(ability, opponent_boosts[ability]) * 100))
                 if ability == "atk":
                     opponent_boost_list.append(f"attack: {opponent_boosts[ability]} (*{multiplier}%)")
                 elif ability == "def":
@@ -491,17 +442,17 @@ class SimpleHeuristicsPlayer(Player):
         active_pokemon_prompt = (f"Your current pokemon: {battle.active_pokemon.species}, {active_type}, HP: {active_hp_fraction}%, Status: {self.check_status(active_status)}. "
                                  f"Attack: {active_base_states['atk']}, Defense: {active_base_states['def']}, Special attack: {active_base_states['spa']}, Special defense: {active_base_states['spd']}, Speed: {active_base_states['spe']}.")
 
-        rela_attack = active_base_states['atk'] * self.boost_multiplier('atk', active_boosts['atk']) / (opponent_base_states['def'] * self.boost_multiplier('def', opponent_boosts['def']))
-        rela_defense = active_base_states['def'] * self.boost_multiplier('def', active_boosts['def']) / (opponent_base_states['atk'] * self.boost_multiplier('atk', opponent_boosts['atk']))
-        rela_spe_attack = active_base_states['spa'] * self.boost_multiplier('spa', active_boosts['spa']) / (opponent_base_states['spd'] * self.boost_multiplier('spd', opponent_boosts['spd']))
-        rela_spe_defense = active_base_states['spd'] * self.boost_multiplier('spd', active_boosts['spd']) / (opponent_base_states['spa'] * self.boost_multiplier('spa', opponent_boosts['spa']))
-        rela_speed = active_base_states['spe'] * self.boost_multiplier('spe', active_boosts['spe']) / (opponent_base_states['spe'] * self.boost_multiplier('spe', opponent_boosts['spe']))
+        rela_attack = active_base_states['atk'] * boost_multiplier('atk', active_boosts['atk']) / (opponent_base_states['def'] * boost_multiplier('def', opponent_boosts['def']))
+        rela_defense = active_base_states['def'] * boost_multiplier('def', active_boosts['def']) / (opponent_base_states['atk'] * boost_multiplier('atk', opponent_boosts['atk']))
+        rela_spe_attack = active_base_states['spa'] * boost_multiplier('spa', active_boosts['spa']) / (opponent_base_states['spd'] * boost_multiplier('spd', opponent_boosts['spd']))
+        rela_spe_defense = active_base_states['spd'] * boost_multiplier('spd', active_boosts['spd']) / (opponent_base_states['spa'] * boost_multiplier('spa', opponent_boosts['spa']))
+        rela_speed = active_base_states['spe'] * boost_multiplier('spe', active_boosts['spe']) / (opponent_base_states['spe'] * boost_multiplier('spe', opponent_boosts['spe']))
 
         ability_list = ["atk", "def", "spa", "spd", "spe"]
         active_boost_list = []
         for ability in ability_list:
             if active_boosts[ability]!=0:
-                multiplier = str(int(self.boost_multiplier(ability, active_boosts[ability]) * 100))
+                multiplier = str(int(boost_multiplier(ability, active_boosts[ability]) * 100))
                 if ability == "atk":
                     active_boost_list.append(f"attack: {active_boosts[ability]} (*{multiplier}%)")
                 elif ability == "def":
@@ -552,7 +503,7 @@ class SimpleHeuristicsPlayer(Player):
             except:
                 effect = ""
 
-            move_prompt += f"Move: {move.id}, {move.type.name}, Class: {move.category.name.lower()}, Power: {move.base_power}, Accuracy: {round(move.accuracy * self.boost_multiplier('accuracy', active_boosts['accuracy'])*100)}%"
+            move_prompt += f"Move: {move.id}, {move.type.name}, Class: {move.category.name.lower()}, Power: {move.base_power}, Accuracy: {round(move.accuracy * boost_multiplier('accuracy', active_boosts['accuracy'])*100)}%"
             if effect:
                 move_prompt += f", Effect: {effect}\n"
             else:
@@ -579,11 +530,11 @@ class SimpleHeuristicsPlayer(Player):
             hp_fraction = round(pokemon.current_hp / pokemon.max_hp * 100)
 
             base_states = pokemon._base_stats
-            rela_attack = base_states['atk'] / (opponent_base_states['def'] * self.boost_multiplier('def', opponent_boosts['def']))
-            rela_defense = base_states['def'] / (opponent_base_states['atk'] * self.boost_multiplier('atk', opponent_boosts['atk']))
-            rela_spe_attack = base_states['spa'] / (opponent_base_states['spd'] * self.boost_multiplier('spd', opponent_boosts['spd']))
-            rela_spe_defense = base_states['spd'] / (opponent_base_states['spa'] * self.boost_multiplier('spa', opponent_boosts['spa']))
-            rela_speed = base_states['spe'] / (opponent_base_states['spe'] * self.boost_multiplier('spe', opponent_boosts['spe']))
+            rela_attack = base_states['atk'] / (opponent_base_states['def'] * boost_multiplier('def', opponent_boosts['def']))
+            rela_defense = base_states['def'] / (opponent_base_states['atk'] * boost_multiplier('atk', opponent_boosts['atk']))
+            rela_spe_attack = base_states['spa'] / (opponent_base_states['spd'] * boost_multiplier('spd', opponent_boosts['spd']))
+            rela_spe_defense = base_states['spd'] / (opponent_base_states['spa'] * boost_multiplier('spa', opponent_boosts['spa']))
+            rela_speed = base_states['spe'] / (opponent_base_states['spe'] * boost_multiplier('spe', opponent_boosts['spe']))
 
             switch_move_prompt = f" Moves:"
             for _, move in pokemon.moves.items():
@@ -629,62 +580,6 @@ class SimpleHeuristicsPlayer(Player):
 
         return state_prompt
 
-    def boost_multiplier(self, state, level):
-        if state == "accuracy":
-            if level == 0:
-                return 1.0
-            if level == 1:
-                return 1.33
-            if level == 2:
-                return 1.66
-            if level == 3:
-                return 2.0
-            if level == 4:
-                return 2.5
-            if level == 5:
-                return 2.66
-            if level == 6:
-                return 3.0
-            if level == -1:
-                return 0.75
-            if level == -2:
-                return 0.6
-            if level == -3:
-                return 0.5
-            if level == -4:
-                return 0.43
-            if level == -5:
-                return 0.36
-            if level == -6:
-                return 0.33
-        else:
-            if level == 0:
-                return 1.0
-            if level == 1:
-                return 1.5
-            if level == 2:
-                return 2.0
-            if level == 3:
-                return 2.5
-            if level == 4:
-                return 3.0
-            if level == 5:
-                return 3.5
-            if level == 6:
-                return 4.0
-            if level == -1:
-                return 0.67
-            if level == -2:
-                return 0.5
-            if level == -3:
-                return 0.4
-            if level == -4:
-                return 0.33
-            if level == -5:
-                return 0.29
-            if level == -6:
-                return 0.25
-
     def check_status(self, status):
         if status:
             if status.value == 1:
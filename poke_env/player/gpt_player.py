@@ -1,91 +1,41 @@
+import asyncio
 import json
 import os
 import random
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import ContextVar
+from functools import lru_cache, partial
 from typing import Dict, List, Optional, Union
 
-import boto3
+import numpy as np
 
+from poke_env.damage import boost_multiplier, calculate_damages, estimate_stats
 from poke_env.data.gen_data import GenData
+from poke_env.data.knowledge_base import KnowledgeBase
+from poke_env.data.type_matchup import TypeMatchup
 from poke_env.environment.abstract_battle import AbstractBattle
 from poke_env.environment.double_battle import DoubleBattle
 from poke_env.environment.move import Move
 from poke_env.environment.move_category import MoveCategory
 from poke_env.environment.pokemon import Pokemon
 from poke_env.environment.side_condition import SideCondition
+from poke_env.environment.weather import Weather
+from poke_env.player.model_adapters import (
+    ModelAdapter,
+    call_bedrock_model,
+    get_model_adapter,
+)
 from poke_env.player.player import BattleOrder, Player
+from poke_env.player.response_cache import ResponseCache
 
-bedrock_runtime = boto3.client(
-    service_name="bedrock-runtime",
-    region_name="us-east-1",
+# Monotonic time after which the current decision stops making model calls
+_decision_deadline: ContextVar[Optional[float]] = ContextVar(
+    "decision_deadline", default=None
 )
 
 
-def calculate_move_type_damage_multipier(
-    type_1, type_2, type_chart, constraint_type_list
-):
-    TYPE_list = "BUG,DARK,DRAGON,ELECTRIC,FAIRY,FIGHTING,FIRE,FLYING,GHOST,GRASS,GROUND,ICE,NORMAL,POISON,PSYCHIC,ROCK,STEEL,WATER".split(
-        ","
-    )
-
-    move_type_damage_multiplier_list = []
-
-    if type_2:
-        for type in TYPE_list:
-            move_type_damage_multiplier_list.append(
-                type_chart[type_1][type] * type_chart[type_2][type]
-            )
-        move_type_damage_multiplier_dict = dict(
-            zip(TYPE_list, move_type_damage_multiplier_list)
-        )
-    else:
-        move_type_damage_multiplier_dict = type_chart[type_1]
-
-    effective_type_list = []
-    extreme_type_list = []
-    resistant_type_list = []
-    extreme_resistant_type_list = []
-    immune_type_list = []
-    for type, value in move_type_damage_multiplier_dict.items():
-        if value == 2:
-            effective_type_list.append(type)
-        elif value == 4:
-            extreme_type_list.append(type)
-        elif value == 1 / 2:
-            resistant_type_list.append(type)
-        elif value == 1 / 4:
-            extreme_resistant_type_list.append(type)
-        elif value == 0:
-            immune_type_list.append(type)
-        else:  # value == 1
-            continue
-
-    if constraint_type_list:
-        extreme_type_list = list(
-            set(extreme_type_list).intersection(set(constraint_type_list))
-        )
-        effective_type_list = list(
-            set(effective_type_list).intersection(set(constraint_type_list))
-        )
-        resistant_type_list = list(
-            set(resistant_type_list).intersection(set(constraint_type_list))
-        )
-        extreme_resistant_type_list = list(
-            set(extreme_resistant_type_list).intersection(set(constraint_type_list))
-        )
-        immune_type_list = list(
-            set(immune_type_list).intersection(set(constraint_type_list))
-        )
-
-    return (
-        list(map(lambda x: x.capitalize(), extreme_type_list)),
-        list(map(lambda x: x.capitalize(), effective_type_list)),
-        list(map(lambda x: x.capitalize(), resistant_type_list)),
-        list(map(lambda x: x.capitalize(), extreme_resistant_type_list)),
-        list(map(lambda x: x.capitalize(), immune_type_list)),
-    )
-
-
 def move_type_damage_wraper(pokemon, type_chart, constraint_type_list=None):
 
     type_1 = None
@@ -95,15 +45,23 @@ def move_type_damage_wraper(pokemon, type_chart, constraint_type_list=None):
         if pokemon.type_2:
             type_2 = pokemon.type_2.name
 
-    move_type_damage_prompt = ""
+    return _move_type_damage_prompt(
+        pokemon.species, type_1, type_2, type_chart, constraint_type_list
+    )
+
+
+def _move_type_damage_prompt(species, type_1, type_2, type_chart, constraint_type_list):
     (
         extreme_effective_type_list,
         effective_type_list,
         resistant_type_list,
         extreme_resistant_type_list,
         immune_type_list,
-    ) = calculate_move_type_damage_multipier(
-        type_1, type_2, type_chart, constraint_type_list
+    ) = (
+        [type_.capitalize() for type_ in types]
+        for types in TypeMatchup.from_type_chart(type_chart).types_by_multiplier(
+            type_1, type_2, constraint_type_list
+        )
     )
 
     move_type_damage_prompt = ""
@@ -112,7 +70,7 @@ def move_type_damage_wraper(pokemon, type_chart, constraint_type_list=None):
             move_type_damage_prompt
             + " "
             + ", ".join(extreme_effective_type_list)
-            + f"-type attack is extremely-effective (4x damage) to {pokemon.species}."
+            + f"-type attack is extremely-effective (4x damage) to {species}."
         )
 
     if effective_type_list:
@@ -120,7 +78,7 @@ def move_type_damage_wraper(pokemon, type_chart, constraint_type_list=None):
             move_type_damage_prompt
             + " "
             + ", ".join(effective_type_list)
-            + f"-type attack is super-effective (2x damage) to {pokemon.species}."
+            + f"-type attack is super-effective (2x damage) to {species}."
         )
 
     if resistant_type_list:
@@ -128,7 +86,7 @@ def move_type_damage_wraper(pokemon, type_chart, constraint_type_list=None):
             move_type_damage_prompt
             + " "
             + ", ".join(resistant_type_list)
-            + f"-type attack is ineffective (0.5x damage) to {pokemon.species}."
+            + f"-type attack is ineffective (0.5x damage) to {species}."
         )
 
     if extreme_resistant_type_list:
@@ -136,7 +94,7 @@ def move_type_damage_wraper(pokemon, type_chart, constraint_type_list=None):
             move_type_damage_prompt
             + " "
             + ", ".join(extreme_resistant_type_list)
-            + f"-type attack is highly ineffective (0.25x damage) to {pokemon.species}."
+            + f"-type attack is highly ineffective (0.25x damage) to {species}."
         )
 
     if immune_type_list:
@@ -144,12 +102,20 @@ def move_type_damage_wraper(pokemon, type_chart, constraint_type_list=None):
             move_type_damage_prompt
             + " "
             + ", ".join(immune_type_list)
-            + f"-type attack is zero effect (0x damage) to {pokemon.species}."
+            + f"-type attack is zero effect (0x damage) to {species}."
         )
 
     return move_type_damage_prompt
 
 
+@lru_cache(maxsize=8192)
+def _cached_move_type_damage_prompt(species, type_1, type_2, constraint_types, gen):
+    type_chart = GenData.from_gen(gen).type_chart
+    return _move_type_damage_prompt(
+        species, type_1, type_2, type_chart, constraint_types
+    )
+
+
 class LLMPlayer(Player):
     def __init__(
         self,
@@ -163,6 +129,10 @@ class LLMPlayer(Player):
         save_replays=None,
         account_configuration=None,
         server_configuration=None,
+        max_concurrent_battles=1,
+        decision_timeout=None,
+        speculative_decisions=False,
+        response_cache: Optional[ResponseCache] = None,
     ):
 
         super().__init__(
@@ -171,38 +141,62 @@ class LLMPlayer(Player):
             save_replays=save_replays,
             account_configuration=account_configuration,
             server_configuration=server_configuration,
+            max_concurrent_battles=max_concurrent_battles,
+            speculative_decisions=speculative_decisions,
         )
 
         self._reward_buffer: Dict[AbstractBattle, float] = {}
-        self._battle_last_action: Dict[AbstractBattle, Dict] = {}
+        self._battle_last_action: Dict[AbstractBattle, BattleOrder] = {}
+        self._anytime_orders: Dict[AbstractBattle, BattleOrder] = {}
+        self._prompt_fragments: Dict[AbstractBattle, Dict] = {}
+        self._possible_moves_prompts: Dict[str, tuple] = {}
+        self.decision_timeout = decision_timeout
+        self._llm_executor = self._create_llm_executor()
+        self.response_cache = response_cache
         self.last_action = ""
         self.completion_tokens = 0
         self.prompt_tokens = 0
+        self._token_count_lock = threading.Lock()
         self.backend = backend
         self.temperature = temperature
         self.log_dir = log_dir
         # self.api_key = api_key
         self.prompt_algo = prompt_algo
         self.gen = GenData.from_format(battle_format)
-        with open("./poke_env/data/static/moves/moves_effect.json", "r") as f:
-            self.move_effect = json.load(f)
-        with open("./poke_env/data/static/moves/gen8pokemon_move_dict.json", "r") as f:
-            self.pokemon_move_dict = json.load(f)
-        with open("./poke_env/data/static/abilities/ability_effect.json", "r") as f:
-            self.ability_effect = json.load(f)
-        with open(
-            "./poke_env/data/static/abilities/gen8pokemon_ability_dict.json", "r"
-        ) as f:
-            self.pokemon_ability_dict = json.load(f)
-        with open("./poke_env/data/static/items/item_effect.json", "r") as f:
-            self.item_effect = json.load(f)
-        with open("./poke_env/data/static/items/gen8pokemon_item_dict.json", "r") as f:
-            self.pokemon_item_dict = json.load(f)
+        knowledge_base = KnowledgeBase.from_format(battle_format)
+        self.move_effect = knowledge_base.move_effect
+        self.pokemon_move_dict = knowledge_base.pokemon_move_dict
+        self.ability_effect = knowledge_base.ability_effect
+        self.pokemon_ability_dict = knowledge_base.pokemon_ability_dict
+        self.item_effect = knowledge_base.item_effect
+        self.pokemon_item_dict = knowledge_base.pokemon_item_dict
 
         self.last_plan = ""
         self.SPEED_TIER_COEFICIENT = 0.1
         self.HP_FRACTION_COEFICIENT = 0.4
 
+    def _create_llm_executor(self) -> ThreadPoolExecutor:
+        # Model calls are blocking network round-trips: they run on this pool so
+        # that the event loop stays free and concurrent battles overlap. Calls
+        # already sent when a decision times out cannot be interrupted and keep
+        # their thread until the model answers, so the pool has room for the
+        # calls of a late decision on top of those of the next one.
+        return ThreadPoolExecutor(
+            max_workers=(3 if self.decision_timeout is None else 6)
+            * max(1, self._max_concurrent_battles),
+            thread_name_prefix=f"{self.username}-llm",
+        )
+
+    async def _stop_listening(self):
+        await super()._stop_listening()
+        self._llm_executor.shutdown(wait=False, cancel_futures=True)
+
+    def reset_battles(self):
+        super().reset_battles()
+        # Drops the model calls left running by timed out decisions
+        self._llm_executor.shutdown(wait=False, cancel_futures=True)
+        self._llm_executor = self._create_llm_executor()
+
     def bedrock(
         self,
         system_prompt,
@@ -213,10 +207,31 @@ class LLMPlayer(Player):
         seed=None,
         stop=[],
         max_tokens=200,
+        attempt=0,
     ) -> str:
 
-        output = call_bedrock_model(model, system_prompt, user_prompt, bedrock_runtime)
-        return output
+        adapter = model if isinstance(model, ModelAdapter) else get_model_adapter(model)
+
+        # Answers are keyed on the adapter's configuration rather than on the
+        # backend name, which can be re-registered. Retries pass their attempt
+        # index: they are new samples, rather than the cached answer their caller
+        # failed to use.
+        if self.response_cache is not None:
+            cache_key = self.response_cache.make_key(
+                repr(adapter), system_prompt, user_prompt, [seed, attempt]
+            )
+            output = self.response_cache.get(cache_key)
+            if output is not None:
+                return output
+
+        response = adapter.invoke(system_prompt, user_prompt)
+        with self._token_count_lock:
+            self.prompt_tokens += response.prompt_tokens
+            self.completion_tokens += response.completion_tokens
+
+        if self.response_cache is not None:
+            self.response_cache.put(cache_key, response.text)
+        return response.text
         # client = OpenAI(api_key=self.api_key)
         # print(client)
         # if json_format:
@@ -253,11 +268,36 @@ class LLMPlayer(Player):
 
         # return outputs
 
-    def _estimate_matchup(self, mon: Pokemon, opponent: Pokemon):
-        score = max([opponent.damage_multiplier(t) for t in mon.types if t is not None])
-        score -= max(
-            [mon.damage_multiplier(t) for t in opponent.types if t is not None]
+    async def async_bedrock(self, *args, **kwargs) -> str:
+        """Awaitable version of :meth:`bedrock`.
+
+        The model call is run in the player's LLM executor, so that it does not
+        block the event loop while waiting for the model's answer.
+
+        :return: The model's output.
+        :rtype: str
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._llm_executor,
+            partial(
+                self._bedrock_before_deadline,
+                _decision_deadline.get(),
+                *args,
+                **kwargs,
+            ),
         )
+
+    def _bedrock_before_deadline(self, deadline: Optional[float], *args, **kwargs):
+        # Calls queued in the executor past their decision's deadline are skipped
+        if deadline is not None and time.monotonic() >= deadline:
+            raise TimeoutError("The decision deadline has passed.")
+        return self.bedrock(*args, **kwargs)
+
+    def _estimate_matchup(self, mon: Pokemon, opponent: Pokemon):
+        matchup = TypeMatchup.from_format(self.format)
+        score = matchup.best_multiplier(mon, opponent)
+        score -= matchup.best_multiplier(opponent, mon)
         if mon.base_stats["spe"] > opponent.base_stats["spe"]:
             score += self.SPEED_TIER_COEFICIENT
         elif opponent.base_stats["spe"] > mon.base_stats["spe"]:
@@ -268,6 +308,24 @@ class LLMPlayer(Player):
 
         return score
 
+    def _estimate_matchups(self, mons: List[Pokemon], opponent: Pokemon) -> np.ndarray:
+        matchup = TypeMatchup.from_format(self.format)
+        scores = matchup.best_multipliers(mons, opponent)
+        scores -= matchup.multipliers(
+            [t for t in (opponent.type_1, opponent.type_2) if t is not None], mons
+        ).max(axis=0)
+
+        speeds = np.array([mon.base_stats["spe"] for mon in mons])
+        scores += np.sign(speeds - opponent.base_stats["spe"]) * (
+            self.SPEED_TIER_COEFICIENT
+        )
+
+        hp_fractions = np.array([mon.current_hp_fraction for mon in mons])
+        scores += hp_fractions * self.HP_FRACTION_COEFICIENT
+        scores -= opponent.current_hp_fraction * self.HP_FRACTION_COEFICIENT
+
+        return scores
+
     def _should_dynamax(self, battle: AbstractBattle):
         n_remaining_mons = len([m for m in battle.team.values() if m.fainted is False])
         if battle.can_dynamax and self._dynamax_disable is False:
@@ -296,16 +354,16 @@ class LLMPlayer(Player):
 
         n_turn = 5
         if "p1" in list(battle.team.keys())[0]:
-            context_prompt = f"Historical turns:\n" + "\n".join(
-                battle.battle_msg_history.split("[sep]")[-1 * (n_turn + 1) :]
+            context_prompt = f"Historical turns:\n" + battle.event_log.narration(
+                n_turn + 1
             ).replace("p1a: ", "").replace("p2a:", "opposing").replace(
                 "Player1", "You"
             ).replace(
                 "Player2", "Opponent"
             )
         else:
-            context_prompt = f"Historical turns:\n" + "\n".join(
-                battle.battle_msg_history.split("[sep]")[-1 * (n_turn + 1) :]
+            context_prompt = f"Historical turns:\n" + battle.event_log.narration(
+                n_turn + 1
             ).replace("p2a: ", "").replace("p1a:", "opposing").replace(
                 "Player2", "You"
             ).replace(
@@ -381,32 +439,32 @@ class LLMPlayer(Player):
             + (
                 f"Attack:{opponent_stats['atk']},"
                 if opponent_boosts["atk"] == 0
-                else f"Attack:{round(opponent_stats['atk'] * self.boost_multiplier('atk', opponent_boosts['atk']))}({opponent_boosts['atk']} stage boosted),"
+                else f"Attack:{round(opponent_stats['atk'] * boost_multiplier('atk', opponent_boosts['atk']))}({opponent_boosts['atk']} stage boosted),"
             )
             + (
                 f"Defense:{opponent_stats['def']},"
                 if opponent_boosts["def"] == 0
-                else f"Defense:{round(opponent_stats['def'] * self.boost_multiplier('def', opponent_boosts['def']))}({opponent_boosts['def']} stage boosted),"
+                else f"Defense:{round(opponent_stats['def'] * boost_multiplier('def', opponent_boosts['def']))}({opponent_boosts['def']} stage boosted),"
             )
             + (
                 f"Special attack:{opponent_stats['spa']},"
                 if opponent_boosts["spa"] == 0
-                else f"Special attack:{round(opponent_stats['spa'] * self.boost_multiplier('spa', opponent_boosts['spa']))}({opponent_boosts['spa']} stage boosted),"
+                else f"Special attack:{round(opponent_stats['spa'] * boost_multiplier('spa', opponent_boosts['spa']))}({opponent_boosts['spa']} stage boosted),"
             )
             + (
                 f"Special defense:{opponent_stats['spd']},"
                 if opponent_boosts["spd"] == 0
-                else f"Special defense:{round(opponent_stats['spd'] * self.boost_multiplier('spd', opponent_boosts['spd']))}({opponent_boosts['spd']} stage boosted),"
+                else f"Special defense:{round(opponent_stats['spd'] * boost_multiplier('spd', opponent_boosts['spd']))}({opponent_boosts['spd']} stage boosted),"
             )
             + (
                 f"Speed:{opponent_stats['spe']},"
                 if opponent_boosts["spe"] == 0
-                else f"Speed:{round(opponent_stats['spe'] * self.boost_multiplier('spe', opponent_boosts['spe']))}({opponent_boosts['spe']} stage boosted),"
+                else f"Speed:{round(opponent_stats['spe'] * boost_multiplier('spe', opponent_boosts['spe']))}({opponent_boosts['spe']} stage boosted),"
             )
             + (f"Ability:{opponent_ability}" if opponent_ability else "")
         )
         opponent_speed = round(
-            opponent_stats["spe"] * self.boost_multiplier("spe", opponent_boosts["spe"])
+            opponent_stats["spe"] * boost_multiplier("spe", opponent_boosts["spe"])
         )
 
         team_move_type = []
@@ -419,8 +477,8 @@ class LLMPlayer(Player):
                 if move.base_power > 0:
                     team_move_type.append(move.type.name)
 
-        opponent_move_type_damage_prompt = move_type_damage_wraper(
-            battle.opponent_active_pokemon, self.gen.type_chart, team_move_type
+        opponent_move_type_damage_prompt = self._type_damage_prompt(
+            battle.opponent_active_pokemon, team_move_type
         )
 
         if opponent_move_type_damage_prompt:
@@ -428,32 +486,22 @@ class LLMPlayer(Player):
 
         # Opponent active pokemon move
         opponent_move_prompt = ""
-        if battle.opponent_active_pokemon.moves:
-            for move_id, opponent_move in battle.opponent_active_pokemon.moves.items():
-                if opponent_move.base_power == 0:
-                    continue  # only count attack move
-
-                if opponent_move.category.name == "SPECIAL":
-                    opponent_spa = opponent_stats["spa"] * self.boost_multiplier(
-                        "spa", opponent_boosts["spa"]
-                    )
-                    active_spd = active_stats["spd"] * self.boost_multiplier(
-                        "spd", active_boosts["spd"]
-                    )
-                    power = round(opponent_spa / active_spd * opponent_move.base_power)
-
-                elif opponent_move.category.name == "PHYSICAL":
-                    opponent_atk = opponent_stats["atk"] * self.boost_multiplier(
-                        "atk", opponent_boosts["atk"]
-                    )
-                    active_def = active_stats["atk"] * self.boost_multiplier(
-                        "atk", active_boosts["atk"]
-                    )
-                    power = round(opponent_atk / active_def * opponent_move.base_power)
-                else:
-                    power = 0
-
-                opponent_move_prompt += f"[{opponent_move.id},{opponent_move.type.name.capitalize()},Power:{power}],"
+        weather = next(iter(battle.weather), None)
+        # only count attack move
+        opponent_moves = [
+            move
+            for move in battle.opponent_active_pokemon.moves.values()
+            if move.base_power > 0
+        ]
+        if opponent_moves:
+            opponent_damages = self._damage_prompts(
+                battle.opponent_active_pokemon,
+                opponent_moves,
+                battle.active_pokemon,
+                weather,
+            )
+            for opponent_move, damage in zip(opponent_moves, opponent_damages):
+                opponent_move_prompt += f"[{opponent_move.id},{opponent_move.type.name.capitalize()},Damage:{damage}],"
                 opponent_type_list.append(opponent_move.type.name)
 
         if opponent_move_prompt:
@@ -463,21 +511,10 @@ class LLMPlayer(Player):
                 + opponent_move_prompt
             )
 
-        possible_move_prompt = ""
-        try:
-            possible_move_list = list(
-                self.pokemon_move_dict[battle.opponent_active_pokemon.species].values()
-            )
-            possible_move_list.sort(key=lambda x: x[3], reverse=True)
-            for move in possible_move_list:
-                if move[2] > 0:
-                    possible_move_prompt = (
-                        possible_move_prompt
-                        + f"[{move[0]},{move[1].lower()},Power:{move[2]}],"
-                    )
-                    opponent_type_list.append(move[1].upper())
-        except:
-            possible_move_prompt = ""
+        possible_move_prompt, possible_move_types = self._possible_moves_prompt(
+            battle.opponent_active_pokemon.species
+        )
+        opponent_type_list.extend(possible_move_types)
 
         if possible_move_prompt:
             opponent_prompt = (
@@ -520,11 +557,11 @@ class LLMPlayer(Player):
                     + battle.active_pokemon.type_2.name.capitalize()
                 )
 
-        active_move_type_damage_prompt = move_type_damage_wraper(
-            battle.active_pokemon, self.gen.type_chart, opponent_type_list
+        active_move_type_damage_prompt = self._type_damage_prompt(
+            battle.active_pokemon, opponent_type_list
         )
         active_speed = round(
-            active_stats["spe"] * self.boost_multiplier("spe", active_boosts["spe"])
+            active_stats["spe"] * boost_multiplier("spe", active_boosts["spe"])
         )
 
         try:
@@ -557,27 +594,27 @@ class LLMPlayer(Player):
             + (
                 f"Attack:{active_stats['atk']},"
                 if active_boosts["atk"] == 0
-                else f"Attack:{round(active_stats['atk']*self.boost_multiplier('atk', active_boosts['atk']))}({active_boosts['atk']} stage boosted),"
+                else f"Attack:{round(active_stats['atk']*boost_multiplier('atk', active_boosts['atk']))}({active_boosts['atk']} stage boosted),"
             )
             + (
                 f"Defense:{active_stats['def']},"
                 if active_boosts["def"] == 0
-                else f"Defense:{round(active_stats['def']*self.boost_multiplier('def', active_boosts['def']))}({active_boosts['def']} stage boosted),"
+                else f"Defense:{round(active_stats['def']*boost_multiplier('def', active_boosts['def']))}({active_boosts['def']} stage boosted),"
             )
             + (
                 f"Special attack:{active_stats['spa']},"
                 if active_boosts["spa"] == 0
-                else f"Special attack:{round(active_stats['spa']*self.boost_multiplier('spa', active_boosts['spa']))}({active_boosts['spa']} stage boosted),"
+                else f"Special attack:{round(active_stats['spa']*boost_multiplier('spa', active_boosts['spa']))}({active_boosts['spa']} stage boosted),"
             )
             + (
                 f"Special defense:{active_stats['spd']},"
                 if active_boosts["spd"] == 0
-                else f"Special defense:{round(active_stats['spd']*self.boost_multiplier('spd', active_boosts['spd']))}({active_boosts['spd']} stage boosted),"
+                else f"Special defense:{round(active_stats['spd']*boost_multiplier('spd', active_boosts['spd']))}({active_boosts['spd']} stage boosted),"
             )
             + (
                 f"Speed:{active_stats['spe']}"
                 if active_boosts["spe"] == 0
-                else f"Speed:{round(active_stats['spe']*self.boost_multiplier('spe', active_boosts['spe']))}({active_boosts['spe']} stage boosted),"
+                else f"Speed:{round(active_stats['spe']*boost_multiplier('spe', active_boosts['spe']))}({active_boosts['spe']} stage boosted),"
             )
             + (
                 f"(slower than {battle.opponent_active_pokemon.species})."
@@ -629,120 +666,65 @@ class LLMPlayer(Player):
 
         # Move
         move_prompt = f"Your {battle.active_pokemon.species} has {len(battle.available_moves)} moves:\n"
-        for i, move in enumerate(battle.available_moves):
-            try:
-                effect = self.move_effect[move.id]
-            except:
-                effect = ""
-
-            if move.category.name == "SPECIAL":
-                active_spa = active_stats["spa"] * self.boost_multiplier(
-                    "spa", active_boosts["spa"]
-                )
-                opponent_spd = opponent_stats["spd"] * self.boost_multiplier(
-                    "spd", active_boosts["spd"]
-                )
-                power = round(active_spa / opponent_spd * move.base_power)
-                move_category = ""
-            elif move.category.name == "PHYSICAL":
-                active_atk = active_stats["atk"] * self.boost_multiplier(
-                    "atk", active_boosts["atk"]
-                )
-                opponent_def = opponent_stats["def"] * self.boost_multiplier(
-                    "def", active_boosts["def"]
-                )
-                power = round(active_atk / opponent_def * move.base_power)
-                move_category = ""
-            else:
-                move_category = move.category.name.capitalize()
-                power = 0
-
-            move_prompt += (
-                f"Move:{move.id},Type:{move.type.name.capitalize()},"
-                + (f"{move_category}-move," if move_category else "")
-                + f"Power:{power},Acc:{round(move.accuracy * self.boost_multiplier('accuracy', active_boosts['accuracy'])*100)}%"
-            )
-
-            if effect:
-                move_prompt += f",Effect:{effect}"
-            # whether is effective to the target.
-            move_type_damage_prompt = move_type_damage_wraper(
-                battle.opponent_active_pokemon, self.gen.type_chart, [move.type.name]
+        move_damages = self._damage_prompts(
+            battle.active_pokemon,
+            battle.available_moves,
+            battle.opponent_active_pokemon,
+            weather,
+        )
+        move_prompt += "".join(
+            self._cached_fragment(
+                battle,
+                ("move", move.id),
+                (
+                    move.type,
+                    move.base_power,
+                    move.accuracy,
+                    active_boosts["accuracy"],
+                    damage,
+                    battle.opponent_active_pokemon.species,
+                    battle.opponent_active_pokemon.types,
+                ),
+                partial(
+                    self._move_prompt_line,
+                    battle,
+                    move,
+                    active_boosts,
+                    damage,
+                ),
             )
-            if move_type_damage_prompt and move.base_power:
-                move_prompt += f'({move_type_damage_prompt.split("is ")[-1][:-1]})\n'
-            else:
-                move_prompt += "\n"
+            for move, damage in zip(battle.available_moves, move_damages)
+        )
 
         # Switch
         switch_prompt = f"You have {len(battle.available_switches)} pokemons:\n"
-
-        for i, pokemon in enumerate(battle.available_switches):
-
-            type = ""
-            if pokemon.type_1:
-                type_1 = pokemon.type_1.name
-                type += type_1.capitalize()
-                if pokemon.type_2:
-                    type_2 = pokemon.type_2.name
-                    type = type + " and " + type_2.capitalize()
-
-            hp_fraction = round(pokemon.current_hp / pokemon.max_hp * 100)
-
-            stats = pokemon.stats
-            switch_move_prompt = f" Moves:"
-            for _, move in pokemon.moves.items():
-                if move.base_power == 0:
-                    continue  # only output attack move
-                move_type_damage_prompt = move_type_damage_wraper(
-                    battle.opponent_active_pokemon,
-                    self.gen.type_chart,
-                    [move.type.name],
-                )
-                if "2x" in move_type_damage_prompt:
-                    damage_multiplier = "2"
-                elif "4x" in move_type_damage_prompt:
-                    damage_multiplier = "4"
-                elif "0.5x" in move_type_damage_prompt:
-                    damage_multiplier = "0.5"
-                elif "0.25x" in move_type_damage_prompt:
-                    damage_multiplier = "0.25"
-                elif "0x" in move_type_damage_prompt:
-                    damage_multiplier = "0"
-                else:
-                    damage_multiplier = "1"
-
-                switch_move_prompt += f"[{move.id},{move.type.name.capitalize()},{damage_multiplier}x damage],"
-
-            if stats["spe"] < opponent_speed:
-                speed_prompt = (
-                    f"(slower than {battle.opponent_active_pokemon.species})."
-                )
-            else:
-                speed_prompt = (
-                    f"(faster than {battle.opponent_active_pokemon.species})."
-                )
-
-            switch_prompt += (
-                f"Pokemon:{pokemon.species},Type:{type},HP:{hp_fraction}%,"
-                + (
-                    f"Status:{self.check_status(pokemon.status)}, "
-                    if self.check_status(pokemon.status)
-                    else ""
-                )
-                + f"Attack:{stats['atk']},Defense:{stats['def']},Special attack:{stats['spa']},Special defense:{stats['spd']},Speed:{stats['spe']}"
-                + speed_prompt
-                + switch_move_prompt
+        opponent_constraint = frozenset(opponent_type_list)
+        switch_prompt += "".join(
+            self._cached_fragment(
+                battle,
+                ("switch", pokemon.species),
+                (
+                    pokemon.types,
+                    pokemon.current_hp,
+                    pokemon.max_hp,
+                    pokemon.status,
+                    tuple(pokemon.stats.values()),
+                    tuple(pokemon.moves),
+                    battle.opponent_active_pokemon.species,
+                    battle.opponent_active_pokemon.types,
+                    opponent_speed,
+                    opponent_constraint,
+                ),
+                partial(
+                    self._switch_prompt_line,
+                    battle,
+                    pokemon,
+                    opponent_speed,
+                    opponent_constraint,
+                ),
             )
-
-            pokemon_move_type_damage_prompt = move_type_damage_wraper(
-                pokemon, self.gen.type_chart, opponent_type_list
-            )  # for defense
-
-            if pokemon_move_type_damage_prompt:
-                switch_prompt = switch_prompt + pokemon_move_type_damage_prompt + "\n"
-            else:
-                switch_prompt += "\n"
+            for pokemon in battle.available_switches
+        )
 
         if battle.active_pokemon.fainted:  # passive switching
 
@@ -847,7 +829,7 @@ Output move: Flash Cannon
 </examples>
 
 For reference here was your last move: 
-{self.last_action}
+{self._battle_last_action.get(battle, "")}
 
 Remember, your goal is to win. Be decisive and go for KOs whenever possible. Switching should be a last resort, not a go-to option. If you do switch, choose a Pokemon that can threaten the opponent or tank their hits. Seize every opportunity to deal big damage and remove opposing threats from the field. Maintain offensive pressure and don't allow unnecessary free turns. 
 
@@ -864,6 +846,190 @@ If your previous move was a switch think long and hard before saying to switch a
 
             return system_prompt, state_prompt
 
+    def _cached_fragment(self, battle: AbstractBattle, name, key, build) -> str:
+        """Returns a prompt fragment, only rebuilding it when its key changes.
+
+        :param battle: The battle the fragment describes.
+        :type battle: AbstractBattle
+        :param name: Identifies the fragment within the battle.
+        :param key: Everything the fragment's text depends on.
+        :param build: Callable building the fragment's text.
+        :return: The fragment.
+        :rtype: str
+        """
+        fragments = self._prompt_fragments.setdefault(battle, {})
+        cached = fragments.get(name)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+        fragment = build()
+        fragments[name] = (key, fragment)
+        return fragment
+
+    def _type_damage_prompt(self, pokemon: Pokemon, constraint_type_list=None) -> str:
+        type_1 = pokemon.type_1.name if pokemon.type_1 else None
+        type_2 = pokemon.type_2.name if pokemon.type_1 and pokemon.type_2 else None
+        return _cached_move_type_damage_prompt(
+            pokemon.species,
+            type_1,
+            type_2,
+            frozenset(constraint_type_list) if constraint_type_list else None,
+            self.gen.gen,
+        )
+
+    def _possible_moves_prompt(self, species: str):
+        """Describes the attacks a species can learn. As this only depends on the
+        species, it is computed once per species."""
+        if species not in self._possible_moves_prompts:
+            possible_move_prompt = []
+            possible_move_types = []
+            try:
+                possible_move_list = list(self.pokemon_move_dict[species].values())
+                possible_move_list.sort(key=lambda x: x[3], reverse=True)
+                for move in possible_move_list:
+                    if move[2] > 0:
+                        possible_move_prompt.append(
+                            f"[{move[0]},{move[1].lower()},Power:{move[2]}],"
+                        )
+                        possible_move_types.append(move[1].upper())
+            except:
+                possible_move_prompt = []
+                possible_move_types = []
+            self._possible_moves_prompts[species] = (
+                "".join(possible_move_prompt),
+                tuple(possible_move_types),
+            )
+        return self._possible_moves_prompts[species]
+
+    def _move_prompt_line(
+        self,
+        battle: AbstractBattle,
+        move: Move,
+        active_boosts,
+        damage: str,
+    ) -> str:
+        try:
+            effect = self.move_effect[move.id]
+        except:
+            effect = ""
+
+        if move.category == MoveCategory.STATUS:
+            move_category = move.category.name.capitalize()
+        else:
+            move_category = ""
+
+        move_prompt = (
+            f"Move:{move.id},Type:{move.type.name.capitalize()},"
+            + (f"{move_category}-move," if move_category else "")
+            + f"Damage:{damage},Acc:{round(move.accuracy * boost_multiplier('accuracy', active_boosts['accuracy'])*100)}%"
+        )
+
+        if effect:
+            move_prompt += f",Effect:{effect}"
+        # whether is effective to the target.
+        move_type_damage_prompt = self._type_damage_prompt(
+            battle.opponent_active_pokemon, [move.type.name]
+        )
+        if move_type_damage_prompt and move.base_power:
+            move_prompt += f'({move_type_damage_prompt.split("is ")[-1][:-1]})\n'
+        else:
+            move_prompt += "\n"
+        return move_prompt
+
+    def _damage_prompts(
+        self,
+        attacker: Pokemon,
+        moves: List[Move],
+        defender: Pokemon,
+        weather: Optional[Weather],
+    ) -> List[str]:
+        # Damage range of each move, in percentage of the defender's max HP
+        if not moves:
+            return []
+        min_damages, max_damages = calculate_damages(
+            attacker, moves, [defender], self.gen.gen, weather
+        )
+        max_hp = estimate_stats(defender)["hp"]
+        prompts = []
+        for min_damage, max_damage in zip(min_damages[:, 0], max_damages[:, 0]):
+            min_percent = round(min_damage / max_hp * 100)
+            max_percent = round(max_damage / max_hp * 100)
+            if min_percent == max_percent:
+                prompts.append(f"{max_percent}%")
+            else:
+                prompts.append(f"{min_percent}-{max_percent}%")
+        return prompts
+
+    def _switch_prompt_line(
+        self,
+        battle: AbstractBattle,
+        pokemon: Pokemon,
+        opponent_speed,
+        opponent_type_list,
+    ) -> str:
+        type = ""
+        if pokemon.type_1:
+            type_1 = pokemon.type_1.name
+            type += type_1.capitalize()
+            if pokemon.type_2:
+                type_2 = pokemon.type_2.name
+                type = type + " and " + type_2.capitalize()
+
+        hp_fraction = round(pokemon.current_hp / pokemon.max_hp * 100)
+
+        stats = pokemon.stats
+        switch_move_prompt = [" Moves:"]
+        for _, move in pokemon.moves.items():
+            if move.base_power == 0:
+                continue  # only output attack move
+            move_type_damage_prompt = self._type_damage_prompt(
+                battle.opponent_active_pokemon, [move.type.name]
+            )
+            if "2x" in move_type_damage_prompt:
+                damage_multiplier = "2"
+            elif "4x" in move_type_damage_prompt:
+                damage_multiplier = "4"
+            elif "0.5x" in move_type_damage_prompt:
+                damage_multiplier = "0.5"
+            elif "0.25x" in move_type_damage_prompt:
+                damage_multiplier = "0.25"
+            elif "0x" in move_type_damage_prompt:
+                damage_multiplier = "0"
+            else:
+                damage_multiplier = "1"
+
+            switch_move_prompt.append(
+                f"[{move.id},{move.type.name.capitalize()},{damage_multiplier}x damage],"
+            )
+
+        if stats["spe"] < opponent_speed:
+            speed_prompt = f"(slower than {battle.opponent_active_pokemon.species})."
+        else:
+            speed_prompt = f"(faster than {battle.opponent_active_pokemon.species})."
+
+        switch_prompt = (
+            f"Pokemon:{pokemon.species},Type:{type},HP:{hp_fraction}%,"
+            + (
+                f"Status:{self.check_status(pokemon.status)}, "
+                if self.check_status(pokemon.status)
+                else ""
+            )
+            + f"Attack:{stats['atk']},Defense:{stats['def']},Special attack:{stats['spa']},Special defense:{stats['spd']},Speed:{stats['spe']}"
+            + speed_prompt
+            + "".join(switch_move_prompt)
+        )
+
+        pokemon_move_type_damage_prompt = self._type_damage_prompt(
+            pokemon, opponent_type_list
+        )  # for defense
+
+        if pokemon_move_type_damage_prompt:
+            return switch_prompt + pokemon_move_type_damage_prompt + "\n"
+        return switch_prompt + "\n"
+
+    def _battle_finished_callback(self, battle: AbstractBattle):
+        self._prompt_fragments.pop(battle, None)
+        super()._battle_finished_callback(battle)
+
     def parse(self, llm_output, battle):
         json_start = llm_output.find("{")
         json_end = llm_output.rfind("}") + 1  # find the first }
@@ -934,62 +1100,6 @@ If your previous move was a switch think long and hard before saying to switch a
         else:
             return ""
 
-    def boost_multiplier(self, state, level):
-        if state == "accuracy":
-            if level == 0:
-                return 1.0
-            if level == 1:
-                return 1.33
-            if level == 2:
-                return 1.66
-            if level == 3:
-                return 2.0
-            if level == 4:
-                return 2.5
-            if level == 5:
-                return 2.66
-            if level == 6:
-                return 3.0
-            if level == -1:
-                return 0.75
-            if level == -2:
-                return 0.6
-            if level == -3:
-                return 0.5
-            if level == -4:
-                return 0.43
-            if level == -5:
-                return 0.36
-            if level == -6:
-                return 0.33
-        else:
-            if level == 0:
-                return 1.0
-            if level == 1:
-                return 1.5
-            if level == 2:
-                return 2.0
-            if level == 3:
-                return 2.5
-            if level == 4:
-                return 3.0
-            if level == 5:
-                return 3.5
-            if level == 6:
-                return 4.0
-            if level == -1:
-                return 0.67
-            if level == -2:
-                return 0.5
-            if level == -3:
-                return 0.4
-            if level == -4:
-                return 0.33
-            if level == -5:
-                return 0.29
-            if level == -6:
-                return 0.25
-
     def choose_move(self, battle: AbstractBattle):
 
         # state_prompt = self.state_translate(battle)
@@ -999,6 +1109,35 @@ If your previous move was a switch think long and hard before saying to switch a
             next_action = BattleOrder(battle.available_switches[0])
             return next_action
 
+        # The model round-trip is awaited by Player._handle_battle_request, so
+        # that other battles keep being processed while this one is thinking.
+        if self.decision_timeout is None:
+            return self._llm_choose_move(battle)
+        return self._llm_choose_move_before_deadline(battle)
+
+    async def _llm_choose_move_before_deadline(self, battle: AbstractBattle):
+        # Anytime decision: start from a heuristic pick, which is upgraded as
+        # soon as the model gives a usable answer, and send whatever is best
+        # when the deadline expires.
+        # Cancelling the decision does not stop model calls already running in
+        # the executor: the deadline keeps it from starting new ones.
+        self._anytime_orders[battle] = self.choose_max_damage_move(battle)
+        deadline = _decision_deadline.set(time.monotonic() + self.decision_timeout)
+        try:
+            return await asyncio.wait_for(
+                self._llm_choose_move(battle), timeout=self.decision_timeout
+            )
+        except asyncio.TimeoutError:
+            print(
+                f"{self.backend} did not decide within {self.decision_timeout}s, "
+                "sending the best action found so far."
+            )
+            return self._anytime_orders[battle]
+        finally:
+            _decision_deadline.reset(deadline)
+            del self._anytime_orders[battle]
+
+    async def _llm_choose_move(self, battle: AbstractBattle):
         # state_prompt = self.state_translate(battle)
         system_prompt, state_prompt = self.state_translate(battle)  # add lower case
 
@@ -1017,7 +1156,7 @@ If your previous move was a switch think long and hard before saying to switch a
 
         remind_again = f"""
 For reference here was your last move: 
-{self.last_action}
+{self._battle_last_action.get(battle, "")}
 
 Remember, your goal is to win. Be decisive and go for KOs whenever possible. Switching should be a last resort, not a go-to option. If you do switch, choose a Pokemon that can threaten the opponent or tank their hits. Seize every opportunity to deal big damage and remove opposing threats from the field. Maintain offensive pressure and don't allow unnecessary free turns. 
 
@@ -1041,7 +1180,7 @@ If your previous move was a switch think long and hard before saying to switch a
                 try:
 
                     start_time = time.time()
-                    llm_output = self.bedrock(
+                    llm_output = await self.async_bedrock(
                         system_prompt=system_prompt,
                         user_prompt=state_prompt_io,
                         model=self.backend,
@@ -1049,6 +1188,7 @@ If your previous move was a switch think long and hard before saying to switch a
                         max_tokens=100,
                         # stop=["reason"],
                         json_format=True,
+                        attempt=i,
                     )
                     print(f"LLM call to {self.backend}: {time.time() - start_time}s")
                     print("LLM output:", llm_output)
@@ -1069,102 +1209,68 @@ If your previous move was a switch think long and hard before saying to switch a
                             + "\n"
                         )
                     break
-                except:
+                except Exception:
                     continue
             if next_action is None:
                 next_action = self.choose_max_damage_move(battle)
+            self._battle_last_action[battle] = next_action
             self.last_action = next_action
             return next_action
 
         # Self-consistency with k = 3
         elif self.prompt_algo == "sc":
-            next_action1 = None
-            next_action2 = None
-            for i in range(2):
-                try:
-                    llm_output1 = self.bedrock(
+            # The samples are independent: they are requested concurrently and
+            # we stop waiting as soon as a majority agrees on an action.
+            n_samples = 3
+            samples = [
+                asyncio.ensure_future(
+                    self._sample_action(
+                        battle,
                         system_prompt=system_prompt,
                         user_prompt=state_prompt_io,
-                        model=self.backend,
-                        temperature=self.temperature,
                         max_tokens=100,
-                        json_format=True,
+                        seed=i,
                     )
-                    print("llm_output1:", llm_output1)
-                    next_action1 = self.parse(llm_output1, battle)
-                    break
-                except:
-                    continue
-
-            for i in range(2):
-                try:
-                    llm_output2 = self.bedrock(
-                        system_prompt=system_prompt,
-                        user_prompt=state_prompt_io,
-                        model=self.backend,
-                        temperature=self.temperature,
-                        max_tokens=100,
-                        json_format=True,
+                )
+                for i in range(n_samples)
+            ]
+            next_action = None
+            llm_outputs: List[Optional[str]] = [None] * n_samples
+            actions: List[Optional[BattleOrder]] = [None] * n_samples
+            pending = set(samples)
+            try:
+                while pending:
+                    done, pending = await asyncio.wait(
+                        pending, return_when=asyncio.FIRST_COMPLETED
                     )
-                    print("llm_output2:", llm_output2)
-                    next_action2 = self.parse(llm_output2, battle)
-                    break
-                except:
-                    continue
-            if next_action1 and next_action2:
-                if next_action1.message == next_action2.message:
-                    with open(f"{self.log_dir}/output.jsonl", "a") as f:
-                        f.write(
-                            json.dumps(
-                                {
-                                    "turn": battle.turn,
-                                    "system_prompt": system_prompt,
-                                    "user_prompt": state_prompt_io,
-                                    "llm_output1": llm_output1,
-                                    "llm_output2": llm_output2,
-                                    "battle_tag": battle.battle_tag,
-                                }
-                            )
-                            + "\n"
-                        )
-                    return next_action1
-                else:
-                    next_action3 = None
-                    for i in range(2):
-                        try:
-                            llm_output3 = self.bedrock(
-                                system_prompt=system_prompt,
-                                user_prompt=state_prompt_io,
-                                model=self.backend,
-                                temperature=self.temperature,
-                                max_tokens=100,
-                                json_format=True,
-                            )
-                            print("llm_output3:", llm_output3)
-                            next_action3 = self.parse(llm_output3, battle)
-                            break
-                        except:
-                            continue
-                    if next_action3:
-                        with open(f"{self.log_dir}/output.jsonl", "a") as f:
-                            f.write(
-                                json.dumps(
-                                    {
-                                        "turn": battle.turn,
-                                        "system_prompt": system_prompt,
-                                        "user_prompt": state_prompt_io,
-                                        "llm_output1": llm_output1,
-                                        "llm_output2": llm_output2,
-                                        "llm_output3": llm_output3,
-                                        "battle_tag": battle.battle_tag,
-                                    }
-                                )
-                                + "\n"
-                            )
-                        return next_action3
-                    else:
-                        return next_action1
-            next_action = self.choose_max_damage_move(battle)
+                    for sample in done:
+                        i = samples.index(sample)
+                        llm_outputs[i], actions[i] = sample.result()
+                        if actions[i] is not None:
+                            print(f"llm_output{i + 1}:", llm_outputs[i])
+                    next_action, votes = self._sc_vote(actions)
+                    if next_action is not None and battle in self._anytime_orders:
+                        self._anytime_orders[battle] = next_action
+                    if votes > n_samples // 2:
+                        break
+            finally:
+                for sample in samples:
+                    sample.cancel()
+
+            if next_action is None:
+                return self.choose_max_damage_move(battle)
+
+            log = {
+                "turn": battle.turn,
+                "system_prompt": system_prompt,
+                "user_prompt": state_prompt_io,
+            }
+            for i, (llm_output, action) in enumerate(zip(llm_outputs, actions)):
+                if action is not None:
+                    log[f"llm_output{i + 1}"] = llm_output
+            log["battle_tag"] = battle.battle_tag
+            with open(f"{self.log_dir}/output.jsonl", "a") as f:
+                f.write(json.dumps(log) + "\n")
             return next_action
 
         # Chain-of-thought
@@ -1172,7 +1278,7 @@ If your previous move was a switch think long and hard before saying to switch a
             next_action = None
             for i in range(3):
                 try:
-                    llm_output = self.bedrock(
+                    llm_output = await self.async_bedrock(
                         system_prompt=system_prompt,
                         user_prompt=state_prompt_cot,
                         model=self.backend,
@@ -1180,6 +1286,7 @@ If your previous move was a switch think long and hard before saying to switch a
                         max_tokens=500,
                         # stop=["reason"],
                         json_format=True,
+                        attempt=i,
                     )
                     print("LLM output:", llm_output)
                     next_action = self.parse(llm_output, battle)
@@ -1197,7 +1304,7 @@ If your previous move was a switch think long and hard before saying to switch a
                             + "\n"
                         )
                     break
-                except:
+                except Exception:
                     continue
             if next_action is None:
                 next_action = self.choose_max_damage_move(battle)
@@ -1209,17 +1316,18 @@ If your previous move was a switch think long and hard before saying to switch a
             next_action = None
             for i in range(2):
                 try:
-                    llm_output1 = self.bedrock(
+                    llm_output1 = await self.async_bedrock(
                         system_prompt=system_prompt,
                         user_prompt=state_prompt_tot_1,
                         model=self.backend,
                         temperature=self.temperature,
                         max_tokens=200,
                         json_format=True,
+                        attempt=i,
                     )
                     print("Phase 1 output:", llm_output1)
                     break
-                except:
+                except Exception:
                     continue
 
             if llm_output1 == "":
@@ -1227,7 +1335,7 @@ If your previous move was a switch think long and hard before saying to switch a
 
             for i in range(2):
                 try:
-                    llm_output2 = self.bedrock(
+                    llm_output2 = await self.async_bedrock(
                         system_prompt=system_prompt,
                         user_prompt=state_prompt_tot_2.replace(
                             "[OPTIONS]", llm_output1
@@ -1236,6 +1344,7 @@ If your previous move was a switch think long and hard before saying to switch a
                         temperature=self.temperature,
                         max_tokens=100,
                         json_format=True,
+                        attempt=i,
                     )
 
                     print("Phase 2 output:", llm_output2)
@@ -1256,13 +1365,66 @@ If your previous move was a switch think long and hard before saying to switch a
                             + "\n"
                         )
                     break
-                except:
+                except Exception:
                     continue
 
             if next_action is None:
                 next_action = self.choose_max_damage_move(battle)
             return next_action
 
+    @staticmethod
+    def _sc_vote(actions: List[Optional[BattleOrder]]):
+        """Picks the most voted action among self-consistency samples.
+
+        Ties are broken by sample index rather than by arrival order: the last
+        sample decides between the others, as it is the tie-breaking sample when
+        they disagree, and the first tied sample wins otherwise.
+
+        :param actions: The action parsed from each sample, or None for samples
+            that failed or are still pending.
+        :type actions: List[Optional[BattleOrder]]
+        :return: The winning action and its number of votes, or (None, 0) if no
+            sample has an action.
+        :rtype: tuple
+        """
+        votes: Dict[str, int] = {}
+        for action in actions:
+            if action is not None:
+                votes[action.message] = votes.get(action.message, 0) + 1
+        if not votes:
+            return None, 0
+        best = max(votes.values())
+        tied = [
+            i
+            for i, action in enumerate(actions)
+            if action is not None and votes[action.message] == best
+        ]
+        winner = tied[-1] if tied[-1] == len(actions) - 1 else tied[0]
+        return actions[winner], best
+
+    async def _sample_action(self, battle: AbstractBattle, tries: int = 2, **kwargs):
+        """Queries the model until its output can be parsed into an order.
+
+        :param battle: The battle the order is for.
+        :type battle: AbstractBattle
+        :param tries: Number of model calls to make before giving up.
+        :type tries: int
+        :param kwargs: Arguments forwarded to :meth:`bedrock`.
+        :return: The model's output and the parsed order, or (None, None) if
+            every try failed.
+        :rtype: tuple
+        """
+        kwargs.setdefault("model", self.backend)
+        kwargs.setdefault("temperature", self.temperature)
+        kwargs.setdefault("json_format", True)
+        for attempt in range(tries):
+            try:
+                llm_output = await self.async_bedrock(attempt=attempt, **kwargs)
+                return llm_output, self.parse(llm_output, battle)
+            except Exception:
+                continue
+        return None, None
+
     def battle_summary(self):
 
         beat_list = []
@@ -1337,503 +1499,20 @@ If your previous move was a switch think long and hard before saying to switch a
 
     def choose_max_damage_move(self, battle: AbstractBattle):
         if battle.available_moves:
-            best_move = max(battle.available_moves, key=lambda move: move.base_power)
+            moves = battle.available_moves
+            if battle.active_pokemon and battle.opponent_active_pokemon:
+                _, damages = calculate_damages(
+                    battle.active_pokemon,
+                    moves,
+                    [battle.opponent_active_pokemon],
+                    self.gen.gen,
+                    next(iter(battle.weather), None),
+                )
+                expected_damages = damages[:, 0] * [
+                    move.accuracy * move.expected_hits for move in moves
+                ]
+                best_move = moves[int(np.argmax(expected_damages))]
+            else:
+                best_move = max(moves, key=lambda move: move.base_power)
             return self.create_order(best_move)
         return self.choose_random_move(battle)
-
-
-# Call Mistral model
-def call_mistral_large(system_prompt, prompt, bedrock_runtime):
-    prompt_config = {
-        "prompt": f"<s>[INST]{system_prompt} {prompt}[/INST]",
-        "max_tokens": 4096,
-        "temperature": 0.7,
-        "top_p": 0.8,
-    }
-
-    body = json.dumps(prompt_config)
-
-    modelId = "mistral.mistral-large-2402-v1:0"
-    accept = "application/json"
-    contentType = "application/json"
-
-    response = bedrock_runtime.invoke_model(
-        body=body, modelId=modelId, accept=accept, contentType=contentType
-    )
-    response_body = json.loads(response.get("body").read())
-
-    results = response_body.get("outputs")[0].get("text")
-    return results
-
-
-def call_mistral_8x7b(system_prompt, prompt, bedrock_runtime):
-    prompt_config = {
-        "prompt": system_prompt + prompt,
-        "max_tokens": 4096,
-        "temperature": 0.7,
-        "top_p": 0.8,
-    }
-
-    body = json.dumps(prompt_config)
-
-    modelId = "mistral.mixtral-8x7b-instruct-v0:1"
-    accept = "application/json"
-    contentType = "application/json"
-
-    response = bedrock_runtime.invoke_model(
-        body=body, modelId=modelId, accept=accept, contentType=contentType
-    )
-    response_body = json.loads(response.get("body").read())
-
-    results = response_body.get("outputs")[0].get("text")
-    return results
-
-
-# Call Mistral model
-def call_mistral_7b(system_prompt, prompt, bedrock_runtime):
-    prompt_config = {
-        "prompt": system_prompt + prompt,
-        "max_tokens": 4096,
-        "temperature": 0.7,
-        "top_p": 0.8,
-    }
-
-    body = json.dumps(prompt_config)
-
-    modelId = "mistral.mistral-7b-instruct-v0:2"
-    accept = "application/json"
-    contentType = "application/json"
-
-    response = bedrock_runtime.invoke_model(
-        body=body, modelId=modelId, accept=accept, contentType=contentType
-    )
-    response_body = json.loads(response.get("body").read())
-
-    results = response_body.get("outputs")[0].get("text")
-    return results
-
-
-# Call AI21 labs model
-def call_ai21_ultra(system_prompt, prompt, bedrock_runtime):
-    prompt_config = {
-        "prompt": system_prompt + prompt,
-        "maxTokens": 5147,
-        "temperature": 0.7,
-        "stopSequences": [],
-    }
-
-    body = json.dumps(prompt_config)
-
-    modelId = "ai21.j2-ultra-v1"
-    accept = "application/json"
-    contentType = "application/json"
-
-    response = bedrock_runtime.invoke_model(
-        body=body, modelId=modelId, accept=accept, contentType=contentType
-    )
-    response_body = json.loads(response.get("body").read())
-
-    results = response_body.get("completions")[0].get("data").get("text")
-    return results
-
-
-def call_ai21_mid(system_prompt, prompt, bedrock_runtime):
-    prompt_config = {
-        "prompt": system_prompt + prompt,
-        "maxTokens": 5147,
-        "temperature": 0.7,
-        "stopSequences": [],
-    }
-
-    body = json.dumps(prompt_config)
-
-    modelId = "ai21.j2-mid-v1"
-    accept = "application/json"
-    contentType = "application/json"
-
-    response = bedrock_runtime.invoke_model(
-        body=body, modelId=modelId, accept=accept, contentType=contentType
-    )
-    response_body = json.loads(response.get("body").read())
-
-    results = response_body.get("completions")[0].get("data").get("text")
-    return results
-
-
-def claude_2_prompt_format(prompt: str) -> str:
-    # Add headers to start and end of prompt
-    return "\n\nHuman: " + prompt + "\n\nAssistant:"
-
-
-# Call Claude model
-def call_claude_3_opus(system_prompt, prompt, bedrock_runtime):
-
-    prompt_config = {
-        "anthropic_version": "bedrock-2023-05-31",
-        "max_tokens": 4096,
-        "system": system_prompt,
-        "messages": [
-            {
-                "role": "user",
-                "content": [
-                    {"type": "text", "text": prompt},
-                ],
-            }
-        ],
-    }
-
-    body = json.dumps(prompt_config)
-
-    modelId = "anthropic.claude-3-opus-20240229-v1:0"
-    accept = "application/json"
-    contentType = "application/json"
-
-    response = bedrock_runtime.invoke_model(
-        body=body, modelId=modelId, accept=accept, contentType=contentType
-    )
-    response_body = json.loads(response.get("body").read())
-
-    results = response_body.get("content")[0].get("text")
-    return results
-
-
-def call_claude_3_sonnet(system_prompt, prompt, bedrock_runtime):
-
-    prompt_config = {
-        "anthropic_version": "bedrock-2023-05-31",
-        "max_tokens": 4096,
-        "system": system_prompt,
-        "messages": [
-            {
-                "role": "user",
-                "content": [
-                    {"type": "text", "text": prompt},
-                ],
-            }
-        ],
-    }
-
-    body = json.dumps(prompt_config)
-
-    modelId = "anthropic.claude-3-sonnet-20240229-v1:0"
-    accept = "application/json"
-    contentType = "application/json"
-
-    response = bedrock_runtime.invoke_model(
-        body=body, modelId=modelId, accept=accept, contentType=contentType
-    )
-    response_body = json.loads(response.get("body").read())
-
-    results = response_body.get("content")[0].get("text")
-    return results
-
-
-def call_claude_3_haiku(system_prompt, prompt, bedrock_runtime):
-
-    prompt_config = {
-        "anthropic_version": "bedrock-2023-05-31",
-        "max_tokens": 4096,
-        "system": system_prompt,
-        "messages": [
-            {
-                "role": "user",
-                "content": [
-                    {"type": "text", "text": prompt},
-                ],
-            }
-        ],
-    }
-
-    body = json.dumps(prompt_config)
-
-    modelId = "anthropic.claude-3-haiku-20240307-v1:0"
-    accept = "application/json"
-    contentType = "application/json"
-
-    response = bedrock_runtime.invoke_model(
-        body=body, modelId=modelId, accept=accept, contentType=contentType
-    )
-    response_body = json.loads(response.get("body").read())
-
-    results = response_body.get("content")[0].get("text")
-    return results
-
-
-# Call Claude model
-def call_claude_2_1(system_prompt, prompt, bedrock_runtime):
-    prompt_config = {
-        "prompt": claude_2_prompt_format(system_prompt + prompt),
-        "max_tokens_to_sample": 4096,
-        "temperature": 0.7,
-        "top_k": 250,
-        "top_p": 0.5,
-        "stop_sequences": [],
-    }
-
-    body = json.dumps(prompt_config)
-
-    modelId = "anthropic.claude-v2:1"
-    accept = "application/json"
-    contentType = "application/json"
-
-    response = bedrock_runtime.invoke_model(
-        body=body, modelId=modelId, accept=accept, contentType=contentType
-    )
-    response_body = json.loads(response.get("body").read())
-
-    results = response_body.get("completion")
-    return results
-
-
-# Call Claude model
-def call_claude_2(system_prompt, prompt, bedrock_runtime):
-    prompt_config = {
-        "prompt": claude_2_prompt_format(system_prompt + prompt),
-        "max_tokens_to_sample": 4096,
-        "temperature": 0.7,
-        "top_k": 250,
-        "top_p": 0.5,
-        "stop_sequences": [],
-    }
-
-    body = json.dumps(prompt_config)
-
-    modelId = "anthropic.claude-v2"
-    accept = "application/json"
-    contentType = "application/json"
-
-    response = bedrock_runtime.invoke_model(
-        body=body, modelId=modelId, accept=accept, contentType=contentType
-    )
-    response_body = json.loads(response.get("body").read())
-
-    results = response_body.get("completion")
-    return results
-
-
-# Call Claude model
-def call_claude_instant(system_prompt, prompt, bedrock_runtime):
-    prompt_config = {
-        "prompt": claude_2_prompt_format(system_prompt + prompt),
-        "max_tokens_to_sample": 4096,
-        "temperature": 0.7,
-        "top_k": 250,
-        "top_p": 0.5,
-        "stop_sequences": [],
-    }
-
-    body = json.dumps(prompt_config)
-
-    modelId = "anthropic.claude-instant-v1"
-    accept = "application/json"
-    contentType = "application/json"
-
-    response = bedrock_runtime.invoke_model(
-        body=body, modelId=modelId, accept=accept, contentType=contentType
-    )
-    response_body = json.loads(response.get("body").read())
-
-    results = response_body.get("completion")
-    return results
-
-
-# Call Cohere model
-def call_cohere_command(system_prompt, prompt, bedrock_runtime):
-    prompt_config = {
-        "prompt": system_prompt + prompt,
-        "max_tokens": 2048,
-        "temperature": 0.7,
-    }
-
-    body = json.dumps(prompt_config)
-
-    modelId = "cohere.command-text-v14"
-    accept = "application/json"
-    contentType = "application/json"
-
-    response = bedrock_runtime.invoke_model(
-        body=body, modelId=modelId, accept=accept, contentType=contentType
-    )
-    response_body = json.loads(response.get("body").read())
-
-    results = response_body.get("generations")[0].get("text")
-    return results
-
-
-def call_cohere_light(system_prompt, prompt, bedrock_runtime):
-    prompt_config = {
-        "prompt": system_prompt + prompt,
-        "max_tokens": 2048,
-        "temperature": 0.7,
-    }
-
-    body = json.dumps(prompt_config)
-
-    modelId = "cohere.command-light-text-v14"
-    accept = "application/json"
-    contentType = "application/json"
-
-    response = bedrock_runtime.invoke_model(
-        body=body, modelId=modelId, accept=accept, contentType=contentType
-    )
-    response_body = json.loads(response.get("body").read())
-
-    results = response_body.get("generations")[0].get("text")
-    return results
-
-
-# Call Titan model
-def call_titan_express(system_prompt, prompt, bedrock_runtime):
-    prompt_config = {
-        "inputText": system_prompt + prompt,
-        "textGenerationConfig": {
-            "maxTokenCount": 4096,
-            "stopSequences": [],
-            "temperature": 0.7,
-            "topP": 1,
-        },
-    }
-
-    body = json.dumps(prompt_config)
-
-    modelId = "amazon.titan-text-express-v1"
-    accept = "application/json"
-    contentType = "application/json"
-
-    response = bedrock_runtime.invoke_model(
-        body=body, modelId=modelId, accept=accept, contentType=contentType
-    )
-    response_body = json.loads(response.get("body").read())
-
-    results = response_body.get("results")[0].get("outputText")
-    return results
-
-
-def call_titan_lite(system_prompt, prompt, bedrock_runtime):
-    prompt_config = {
-        "inputText": system_prompt + prompt,
-        "textGenerationConfig": {
-            "maxTokenCount": 4096,
-            "stopSequences": [],
-            "temperature": 0.7,
-            "topP": 1,
-        },
-    }
-
-    body = json.dumps(prompt_config)
-
-    modelId = "amazon.titan-text-lite-v1"
-    accept = "application/json"
-    contentType = "application/json"
-
-    response = bedrock_runtime.invoke_model(
-        body=body, modelId=modelId, accept=accept, contentType=contentType
-    )
-    response_body = json.loads(response.get("body").read())
-
-    results = response_body.get("results")[0].get("outputText")
-    return results
-
-
-def call_llama2_13b(system_prompt, prompt, bedrock_runtime):
-    prompt_config = {
-        "prompt": system_prompt + prompt,
-        "max_gen_len": 2048,
-        "top_p": 0.9,
-        "temperature": 0.7,
-    }
-
-    body = json.dumps(prompt_config)
-
-    modelId = "meta.llama2-13b-chat-v1"
-    accept = "application/json"
-    contentType = "application/json"
-
-    response = bedrock_runtime.invoke_model(
-        body=body, modelId=modelId, accept=accept, contentType=contentType
-    )
-    response_body = json.loads(response.get("body").read())
-
-    results = response_body["generation"].strip()
-    return results
-
-
-def call_llama2_70b(system_prompt, prompt, bedrock_runtime):
-    prompt_config = {
-        "prompt": system_prompt + prompt,
-        "max_gen_len": 2048,
-        "top_p": 0.9,
-        "temperature": 0.7,
-    }
-
-    body = json.dumps(prompt_config)
-
-    modelId = "meta.llama2-70b-chat-v1"
-    accept = "application/json"
-    contentType = "application/json"
-
-    response = bedrock_runtime.invoke_model(
-        body=body, modelId=modelId, accept=accept, contentType=contentType
-    )
-    response_body = json.loads(response.get("body").read())
-
-    results = response_body["generation"].strip()
-    return results
-
-
-def call_bedrock_model(model: str, system_prompt: str, prompt: str, bedrock_runtime):
-
-    # switch statement for models
-
-    if model == "mistral_large":
-        return call_mistral_large(system_prompt, prompt, bedrock_runtime)
-
-    if model == "mistral_8x7b":
-        return call_mistral_8x7b(system_prompt, prompt, bedrock_runtime)
-
-    if model == "mistral_7b":
-        return call_mistral_7b(system_prompt, prompt, bedrock_runtime)
-
-    if model == "ai21_ultra":
-        return call_ai21_ultra(system_prompt, prompt, bedrock_runtime)
-
-    if model == "ai21_mid":
-        return call_ai21_mid(system_prompt, prompt, bedrock_runtime)
-
-    if model == "claude_3_opus":
-        return call_claude_3_opus(system_prompt, prompt, bedrock_runtime)
-
-    if model == "claude_3_sonnet":
-        return call_claude_3_sonnet(system_prompt, prompt, bedrock_runtime)
-
-    if model == "claude_3_haiku":
-        return call_claude_3_haiku(system_prompt, prompt, bedrock_runtime)
-
-    if model == "claude_2_1":
-        return call_claude_2_1(system_prompt, prompt, bedrock_runtime)
-
-    if model == "claude_2":
-        return call_claude_2(system_prompt, prompt, bedrock_runtime)
-
-    if model == "claude_instant":
-        return call_claude_instant(system_prompt, prompt, bedrock_runtime)
-
-    if model == "cohere_command":
-        return call_cohere_command(system_prompt, prompt, bedrock_runtime)
-
-    if model == "cohere_light":
-        return call_cohere_light(system_prompt, prompt, bedrock_runtime)
-
-    if model == "titan_express":
-        return call_titan_express(system_prompt, prompt, bedrock_runtime)
-
-    if model == "titan_lite":
-        return call_titan_lite(system_prompt, prompt, bedrock_runtime)
-
-    if model == "llama2_13b":
-        return call_llama2_13b(system_prompt, prompt, bedrock_runtime)
-
-    if model == "llama2_70b":
-        return call_llama2_70b(system_prompt, prompt, bedrock_runtime)
-
-    return None
@@ -0,0 +1,447 @@
+"""This module defines model adapters, which translate LLMPlayer's prompts into
+backend-specific requests, and the registry mapping backend names to them.
+"""
+import random
+import re
+import time
+from abc import ABC, abstractmethod
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+
+import orjson
+
+SYSTEM_PROMPT = "<system_prompt>"
+PROMPT = "<prompt>"
+
+_PLACEHOLDERS = {
+    orjson.dumps(SYSTEM_PROMPT): SYSTEM_PROMPT,
+    orjson.dumps(PROMPT): PROMPT,
+}
+_PLACEHOLDERS_PATTERN = re.compile(
+    b"(" + b"|".join(re.escape(p) for p in _PLACEHOLDERS) + b")"
+)
+
+
+class ModelResponse(NamedTuple):
+    """A model's answer, along with the token usage reported for it."""
+
+    text: str
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+
+
+class ModelAdapter(ABC):
+    """Base class of model adapters.
+
+    An adapter receives the system and user prompts built by LLMPlayer and
+    returns the model's answer. Adapters can be made available to
+    ``LLMPlayer(backend=...)`` with :func:`register_model_adapter`.
+
+    LLMPlayer's response cache keys answers on the adapter's repr, which should
+    therefore describe everything that determines the answers, such as the model
+    and its sampling parameters.
+    """
+
+    @abstractmethod
+    def invoke(self, system_prompt: str, prompt: str) -> ModelResponse:
+        """Queries the model.
+
+        :param system_prompt: The system prompt.
+        :type system_prompt: str
+        :param prompt: The user prompt.
+        :type prompt: str
+        :return: The model's response.
+        :rtype: ModelResponse
+        """
+
+
+class BedrockModelAdapter(ModelAdapter):
+    """Adapter for models served through Amazon Bedrock's ``invoke_model``.
+
+    The request body is described by a JSON-serializable template, in which the
+    ``SYSTEM_PROMPT`` and ``PROMPT`` placeholders mark where the prompts go. The
+    template is serialized once, at creation: requests are then built by
+    splicing the encoded prompts between the pre-serialized static parts.
+
+    :param model_id: The Bedrock model identifier.
+    :type model_id: str
+    :param template: The request body template.
+    :type template: Dict[str, Any]
+    :param extract: Function returning the generated text from the decoded
+        response body.
+    :type extract: Callable[[Dict[str, Any]], str]
+    :param prompt_format: Format string used to fill the ``PROMPT``
+        placeholder. It receives ``system_prompt`` and ``prompt`` keyword
+        arguments. Defaults to their concatenation.
+    :type prompt_format: str
+    """
+
+    def __init__(
+        self,
+        model_id: str,
+        template: Dict[str, Any],
+        extract: Callable[[Dict[str, Any]], str],
+        prompt_format: str = "{system_prompt}{prompt}",
+    ):
+        self.model_id = model_id
+        self.extract = extract
+        self.prompt_format = prompt_format
+
+        serialized_template = orjson.dumps(template, option=orjson.OPT_SORT_KEYS)
+        self._repr = (
+            f"BedrockModelAdapter({model_id!r}, {serialized_template.decode()}, "
+            f"prompt_format={prompt_format!r})"
+        )
+        self._body_parts: List[bytes] = []
+        self._body_placeholders: List[Optional[str]] = []
+        for part in _PLACEHOLDERS_PATTERN.split(orjson.dumps(template)):
+            if part in _PLACEHOLDERS:
+                self._body_parts.append(b"")
+                self._body_placeholders.append(_PLACEHOLDERS[part])
+            elif part:
+                self._body_parts.append(part)
+                self._body_placeholders.append(None)
+
+    def __repr__(self) -> str:
+        return self._repr
+
+    def build_body(self, system_prompt: str, prompt: str) -> bytes:
+        """Builds the serialized request body for the given prompts.
+
+        :param system_prompt: The system prompt.
+        :type system_prompt: str
+        :param prompt: The user prompt.
+        :type prompt: str
+        :return: The JSON request body.
+        :rtype: bytes
+        """
+        values = {
+            SYSTEM_PROMPT: orjson.dumps(system_prompt),
+            PROMPT: orjson.dumps(
+                self.prompt_format.format(system_prompt=system_prompt, prompt=prompt)
+            ),
+        }
+        return b"".join(
+            part if placeholder is None else values[placeholder]
+            for part, placeholder in zip(self._body_parts, self._body_placeholders)
+        )
+
+    def invoke(
+        self, system_prompt: str, prompt: str, bedrock_runtime: Any = None
+    ) -> ModelResponse:
+        if bedrock_runtime is None:
+            bedrock_runtime = get_bedrock_runtime()
+
+        response = bedrock_runtime.invoke_model(
+            body=self.build_body(system_prompt, prompt),
+            modelId=self.model_id,
+            accept="application/json",
+            contentType="application/json",
+        )
+        text = self.extract(orjson.loads(response["body"].read()))
+
+        headers = response.get("ResponseMetadata", {}).get("HTTPHeaders", {})
+        return ModelResponse(
+            text=text,
+            prompt_tokens=int(headers.get("x-amzn-bedrock-input-token-count", 0)),
+            completion_tokens=int(headers.get("x-amzn-bedrock-output-token-count", 0)),
+        )
+
+
+class MockModelAdapter(ModelAdapter):
+    """Local stand-in for a language model, for benchmarks and load tests.
+
+    Answers are derived from the prompt built by LLMPlayer: the mock picks the
+    listed move with the highest estimated damage, or one of the listed switches
+    when no move is available. Each answer only depends on the seed and the prompts, so that
+    runs are reproducible regardless of how calls interleave.
+
+    :param latency: Average simulated response time, in seconds.
+    :type latency: float
+    :param jitter: Maximum deviation from the average response time, in
+        seconds.
+    :type jitter: float
+    :param malformed_rate: Probability of answering with output that cannot be
+        parsed into an action.
+    :type malformed_rate: float
+    :param seed: Seed mixed into every answer's random draws.
+    :type seed: int
+    """
+
+    _MOVE_PATTERN = re.compile(r"Move:([^,]+),.*?Damage:(?:\d+-)?(\d+)%")
+    _SWITCH_PATTERN = re.compile(r"Pokemon:([^,]+),")
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        malformed_rate: float = 0.0,
+        seed: int = 0,
+    ):
+        self.latency = latency
+        self.jitter = jitter
+        self.malformed_rate = malformed_rate
+        self.seed = seed
+
+    def __repr__(self) -> str:
+        return (
+            f"MockModelAdapter(latency={self.latency}, jitter={self.jitter}, "
+            f"malformed_rate={self.malformed_rate}, seed={self.seed})"
+        )
+
+    def _answer(self, prompt: str, rng: random.Random) -> str:
+        if rng.random() < self.malformed_rate:
+            return rng.choice(
+                ["I would switch to", '{"move": ', "Let me think about it."]
+            )
+
+        moves = [
+            (int(damage), move_id)
+            for move_id, damage in self._MOVE_PATTERN.findall(prompt)
+        ]
+        if moves:
+            action, target = "move", max(moves)[1]
+        else:
+            switches = self._SWITCH_PATTERN.findall(prompt)
+            if not switches:
+                return "{}"
+            action, target = "switch", rng.choice(switches)
+
+        if '"decision"' in prompt:
+            answer: Dict[str, Any] = {
+                "decision": {"action": action, "target": target}
+            }
+        elif '"option_1"' in prompt:
+            answer = {"option_1": {"action": action, "target": target}}
+        else:
+            answer = {action: target}
+        return orjson.dumps(answer).decode()
+
+    def invoke(self, system_prompt: str, prompt: str) -> ModelResponse:
+        rng = random.Random(f"{self.seed}\n{system_prompt}\n{prompt}")
+        text = self._answer(prompt, rng)
+
+        delay = self.latency + rng.uniform(-self.jitter, self.jitter)
+        if delay > 0:
+            time.sleep(delay)
+
+        # Roughly four characters per token
+        return ModelResponse(
+            text=text,
+            prompt_tokens=(len(system_prompt) + len(prompt)) // 4,
+            completion_tokens=len(text) // 4,
+        )
+
+
+@lru_cache(None)
+def get_bedrock_runtime(region_name: str = "us-east-1"):
+    """Returns a shared Bedrock runtime client, created on first use.
+
+    :param region_name: The AWS region to use.
+    :type region_name: str
+    :return: The boto3 bedrock-runtime client.
+    """
+    import boto3
+
+    return boto3.client(service_name="bedrock-runtime", region_name=region_name)
+
+
+MODEL_ADAPTERS: Dict[str, ModelAdapter] = {}
+
+
+def register_model_adapter(name: str, adapter: ModelAdapter) -> None:
+    """Makes an adapter available under the given backend name.
+
+    :param name: The backend name, as passed to ``LLMPlayer(backend=...)``.
+    :type name: str
+    :param adapter: The adapter.
+    :type adapter: ModelAdapter
+    """
+    MODEL_ADAPTERS[name] = adapter
+
+
+def get_model_adapter(name: str) -> ModelAdapter:
+    """Returns the adapter registered under the given backend name.
+
+    :param name: The backend name.
+    :type name: str
+    :raises ValueError: If no adapter is registered under that name.
+    :return: The adapter.
+    :rtype: ModelAdapter
+    """
+    try:
+        return MODEL_ADAPTERS[name]
+    except KeyError:
+        raise ValueError(
+            f"Unknown model backend {name}. Available backends are: "
+            f"{', '.join(sorted(MODEL_ADAPTERS))}"
+        )
+
+
+def call_bedrock_model(
+    model: str, system_prompt: str, prompt: str, bedrock_runtime: Any = None
+) -> Optional[str]:
+    adapter = MODEL_ADAPTERS.get(model)
+    if adapter is None:
+        return None
+    if isinstance(adapter, BedrockModelAdapter):
+        return adapter.invoke(system_prompt, prompt, bedrock_runtime).text
+    return adapter.invoke(system_prompt, prompt).text
+
+
+def _mistral_output(response_body: Dict[str, Any]) -> str:
+    return response_body["outputs"][0]["text"]
+
+
+def _ai21_output(response_body: Dict[str, Any]) -> str:
+    return response_body["completions"][0]["data"]["text"]
+
+
+def _claude_3_output(response_body: Dict[str, Any]) -> str:
+    return response_body["content"][0]["text"]
+
+
+def _claude_2_output(response_body: Dict[str, Any]) -> str:
+    return response_body["completion"]
+
+
+def _cohere_output(response_body: Dict[str, Any]) -> str:
+    return response_body["generations"][0]["text"]
+
+
+def _titan_output(response_body: Dict[str, Any]) -> str:
+    return response_body["results"][0]["outputText"]
+
+
+def _llama2_output(response_body: Dict[str, Any]) -> str:
+    return response_body["generation"].strip()
+
+
+_MISTRAL_TEMPLATE = {
+    "prompt": PROMPT,
+    "max_tokens": 4096,
+    "temperature": 0.7,
+    "top_p": 0.8,
+}
+_AI21_TEMPLATE = {
+    "prompt": PROMPT,
+    "maxTokens": 5147,
+    "temperature": 0.7,
+    "stopSequences": [],
+}
+_CLAUDE_3_TEMPLATE = {
+    "anthropic_version": "bedrock-2023-05-31",
+    "max_tokens": 4096,
+    "system": SYSTEM_PROMPT,
+    "messages": [
+        {
+            "role": "user",
+            "content": [
+                {"type": "text", "text": PROMPT},
+            ],
+        }
+    ],
+}
+_CLAUDE_2_TEMPLATE = {
+    "prompt": PROMPT,
+    "max_tokens_to_sample": 4096,
+    "temperature": 0.7,
+    "top_k": 250,
+    "top_p": 0.5,
+    "stop_sequences": [],
+}
+_CLAUDE_2_PROMPT_FORMAT = "\n\nHuman: {system_prompt}{prompt}\n\nAssistant:"
+_COHERE_TEMPLATE = {
+    "prompt": PROMPT,
+    "max_tokens": 2048,
+    "temperature": 0.7,
+}
+_TITAN_TEMPLATE = {
+    "inputText": PROMPT,
+    "textGenerationConfig": {
+        "maxTokenCount": 4096,
+        "stopSequences": [],
+        "temperature": 0.7,
+        "topP": 1,
+    },
+}
+_LLAMA2_TEMPLATE = {
+    "prompt": PROMPT,
+    "max_gen_len": 2048,
+    "top_p": 0.9,
+    "temperature": 0.7,
+}
+
+for _name, _adapter in {
+    "mistral_large": BedrockModelAdapter(
+        "mistral.mistral-large-2402-v1:0",
+        _MISTRAL_TEMPLATE,
+        _mistral_output,
+        prompt_format="<s>[INST]{system_prompt} {prompt}[/INST]",
+    ),
+    "mistral_8x7b": BedrockModelAdapter(
+        "mistral.mixtral-8x7b-instruct-v0:1", _MISTRAL_TEMPLATE, _mistral_output
+    ),
+    "mistral_7b": BedrockModelAdapter(
+        "mistral.mistral-7b-instruct-v0:2", _MISTRAL_TEMPLATE, _mistral_output
+    ),
+    "ai21_ultra": BedrockModelAdapter("ai21.j2-ultra-v1", _AI21_TEMPLATE, _ai21_output),
+    "ai21_mid": BedrockModelAdapter("ai21.j2-mid-v1", _AI21_TEMPLATE, _ai21_output),
+    "claude_3_opus": BedrockModelAdapter(
+        "anthropic.claude-3-opus-20240229-v1:0",
+        _CLAUDE_3_TEMPLATE,
+        _claude_3_output,
+        prompt_format="{prompt}",
+    ),
+    "claude_3_sonnet": BedrockModelAdapter(
+        "anthropic.claude-3-sonnet-20240229-v1:0",
+        _CLAUDE_3_TEMPLATE,
+        _claude_3_output,
+        prompt_format="{prompt}",
+    ),
+    "claude_3_haiku": BedrockModelAdapter(
+        "anthropic.claude-3-haiku-20240307-v1:0",
+        _CLAUDE_3_TEMPLATE,
+        _claude_3_output,
+        prompt_format="{prompt}",
+    ),
+    "claude_2_1": BedrockModelAdapter(
+        "anthropic.claude-v2:1",
+        _CLAUDE_2_TEMPLATE,
+        _claude_2_output,
+        prompt_format=_CLAUDE_2_PROMPT_FORMAT,
+    ),
+    "claude_2": BedrockModelAdapter(
+        "anthropic.claude-v2",
+        _CLAUDE_2_TEMPLATE,
+        _claude_2_output,
+        prompt_format=_CLAUDE_2_PROMPT_FORMAT,
+    ),
+    "claude_instant": BedrockModelAdapter(
+        "anthropic.claude-instant-v1",
+        _CLAUDE_2_TEMPLATE,
+        _claude_2_output,
+        prompt_format=_CLAUDE_2_PROMPT_FORMAT,
+    ),
+    "cohere_command": BedrockModelAdapter(
+        "cohere.command-text-v14", _COHERE_TEMPLATE, _cohere_output
+    ),
+    "cohere_light": BedrockModelAdapter(
+        "cohere.command-light-text-v14", _COHERE_TEMPLATE, _cohere_output
+    ),
+    "titan_express": BedrockModelAdapter(
+        "amazon.titan-text-express-v1", _TITAN_TEMPLATE, _titan_output
+    ),
+    "titan_lite": BedrockModelAdapter(
+        "amazon.titan-text-lite-v1", _TITAN_TEMPLATE, _titan_output
+    ),
+    "llama2_13b": BedrockModelAdapter(
+        "meta.llama2-13b-chat-v1", _LLAMA2_TEMPLATE, _llama2_output
+    ),
+    "llama2_70b": BedrockModelAdapter(
+        "meta.llama2-70b-chat-v1", _LLAMA2_TEMPLATE, _llama2_output
+    ),
+    "mock": MockModelAdapter(),
+}.items():
+    register_model_adapter(_name, _adapter)
+del _name, _adapter
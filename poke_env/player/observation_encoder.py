@@ -0,0 +1,384 @@
+"""This module defines the ObservationEncoder class, which encodes singles battles
+into preallocated NumPy arrays, for use in embed_battle.
+"""
+from __future__ import annotations
+
+from operator import itemgetter
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Sequence
+
+import numpy as np
+from gymnasium.spaces import Box
+
+from poke_env.data.gen_data import GenData
+from poke_env.data.type_matchup import TypeMatchup
+from poke_env.environment.abstract_battle import AbstractBattle
+from poke_env.environment.pokemon import Pokemon
+from poke_env.environment.side_condition import STACKABLE_CONDITIONS, SideCondition
+from poke_env.environment.status import Status
+from poke_env.environment.weather import Weather
+
+
+class _Block(NamedTuple):
+    name: str
+    size: int
+    low: float
+    high: float
+    # Extracts the inputs of the block from a battle and its active pokemons. Blocks
+    # are only rewritten when their inputs change
+    inputs: Callable[[AbstractBattle, Optional[Pokemon], Optional[Pokemon]], Any]
+    write: Callable[[np.ndarray, Any], None]
+
+
+class _BattleState(NamedTuple):
+    buffer: np.ndarray
+    views: List[np.ndarray]
+    inputs: List[Any]
+
+
+_UNSET = object()
+
+
+class ObservationEncoder:
+    """Encodes singles battles into flat arrays of features.
+
+    The features are made of the following blocks, in the order given by features:
+
+    - ``hp``: the HP fractions of the team_size pokemons of each team. Pokemons the
+      opponent has not revealed yet count as healthy.
+    - ``boosts``: the boosts of both active pokemons, in the order of BOOSTS, divided
+      by 6.
+    - ``types``: the types of both active pokemons, as multi-hot vectors.
+    - ``status``: the status of both active pokemons, as one-hot vectors.
+    - ``moves``: for each of the n_moves first available moves, its base power
+      divided by 100 times its type multiplier on the opponent's active pokemon, or
+      -1 if there is no such move.
+    - ``side_conditions``: the side conditions of both sides - their number of
+      layers over their maximum for stackable conditions, 1 for the others.
+    - ``weather``: the weather, as a one-hot vector.
+
+    Each battle is encoded into an array allocated on its first encoding, and
+    reused by the following ones: only the blocks whose inputs changed are
+    rewritten. The returned arrays are therefore overwritten by the next encoding
+    of the same battle, and must be copied to be kept. Arrays of finished battles
+    are released after their last encoding.
+
+    :param battle_format: The battle format, which sets the type chart. Defaults to
+        gen8randombattle.
+    :type battle_format: str
+    :param features: The feature blocks, among FEATURES. Defaults to all of them.
+    :type features: Sequence[str]
+    :param team_size: The number of pokemons per team. Defaults to 6.
+    :type team_size: int
+    :param n_moves: The number of move slots. Defaults to 4.
+    :type n_moves: int
+    :param dtype: The dtype of the arrays. Defaults to float32.
+    :type dtype: type
+    """
+
+    FEATURES = (
+        "hp",
+        "boosts",
+        "types",
+        "status",
+        "moves",
+        "side_conditions",
+        "weather",
+    )
+    BOOSTS = ("atk", "def", "spa", "spd", "spe", "accuracy", "evasion")
+
+    def __init__(
+        self,
+        battle_format: str = "gen8randombattle",
+        features: Sequence[str] = FEATURES,
+        team_size: int = 6,
+        n_moves: int = 4,
+        dtype: Any = np.float32,
+    ):
+        unknown_features = [name for name in features if name not in self.FEATURES]
+        if unknown_features:
+            raise ValueError(
+                f"Unknown features {unknown_features}. Features must be among "
+                f"{self.FEATURES}."
+            )
+
+        self.team_size = team_size
+        self.n_moves = n_moves
+        self.dtype = dtype
+        self._matchup = TypeMatchup.from_format(battle_format)
+        self._n_types = len(self._matchup.types)
+        self._get_boosts = itemgetter(*self.BOOSTS)
+        self._status_index = {status: i for i, status in enumerate(Status)}
+        self._side_condition_index = {
+            condition: i for i, condition in enumerate(SideCondition)
+        }
+        self._weather_index = {weather: i for i, weather in enumerate(Weather)}
+        max_base_power = max(
+            move.get("basePower", 0)
+            for move in GenData.from_format(battle_format).moves.values()
+        )
+
+        blocks = {
+            "hp": _Block("hp", 2 * team_size, 0, 1, self._hp_inputs, self._write_hp),
+            "boosts": _Block(
+                "boosts",
+                2 * len(self.BOOSTS),
+                -1,
+                1,
+                self._boosts_inputs,
+                self._write_boosts,
+            ),
+            "types": _Block(
+                "types",
+                2 * self._n_types,
+                0,
+                1,
+                self._types_inputs,
+                self._write_types,
+            ),
+            "status": _Block(
+                "status",
+                2 * len(Status),
+                0,
+                1,
+                self._status_inputs,
+                self._write_status,
+            ),
+            "moves": _Block(
+                "moves",
+                n_moves,
+                -1,
+                max_base_power / 100 * 4,
+                self._moves_inputs,
+                self._write_moves,
+            ),
+            "side_conditions": _Block(
+                "side_conditions",
+                2 * len(SideCondition),
+                0,
+                1,
+                self._side_conditions_inputs,
+                self._write_side_conditions,
+            ),
+            "weather": _Block(
+                "weather",
+                len(Weather),
+                0,
+                1,
+                self._weather_inputs,
+                self._write_weather,
+            ),
+        }
+        self._blocks = [blocks[name] for name in features]
+
+        self.slices: Dict[str, slice] = {}
+        start = 0
+        for block in self._blocks:
+            self.slices[block.name] = slice(start, start + block.size)
+            start += block.size
+        self.size = start
+
+        self._low = np.empty(self.size, dtype=dtype)
+        self._high = np.empty(self.size, dtype=dtype)
+        for block in self._blocks:
+            self._low[self.slices[block.name]] = block.low
+            self._high[self.slices[block.name]] = block.high
+        self._states: Dict[str, _BattleState] = {}
+
+    def describe_embedding(self) -> Box:
+        """
+        :return: The space of the encoded battles.
+        :rtype: Box
+        """
+        return Box(self._low, self._high, dtype=self.dtype)  # type: ignore
+
+    def encode(self, battle: AbstractBattle) -> np.ndarray:
+        """Encodes a battle, updating the blocks whose inputs changed since its
+        previous encoding.
+
+        :param battle: The battle.
+        :type battle: AbstractBattle
+        :return: The battle's array, which is overwritten by its next encoding.
+        :rtype: np.ndarray
+        """
+        state = self._states.get(battle.battle_tag)
+        if state is None:
+            buffer = np.zeros(self.size, dtype=self.dtype)
+            state = _BattleState(
+                buffer,
+                [buffer[self.slices[block.name]] for block in self._blocks],
+                [_UNSET] * len(self._blocks),
+            )
+            self._states[battle.battle_tag] = state
+
+        active = battle.active_pokemon
+        opponent = battle.opponent_active_pokemon
+        for i, block in enumerate(self._blocks):
+            inputs = block.inputs(battle, active, opponent)
+            if inputs != state.inputs[i]:
+                block.write(state.views[i], inputs)
+                state.inputs[i] = inputs
+
+        if battle.finished:
+            del self._states[battle.battle_tag]
+        return state.buffer
+
+    def encode_batch(
+        self, battles: Iterable[AbstractBattle], out: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        """Encodes several battles into the rows of an array.
+
+        :param battles: The battles.
+        :type battles: Iterable[AbstractBattle]
+        :param out: The array to write into, of shape (number of battles, size). If
+            None, a new array is allocated.
+        :type out: np.ndarray, optional
+        :return: The encoded battles.
+        :rtype: np.ndarray
+        """
+        battles = list(battles)
+        if out is None:
+            out = np.empty((len(battles), self.size), dtype=self.dtype)
+        for row, battle in zip(out, battles):
+            row[:] = self.encode(battle)
+        return out
+
+    def forget(self, battle_tag: str):
+        """Releases the array of a battle, which will be fully encoded again if it
+        is encoded later.
+
+        :param battle_tag: The battle's tag.
+        :type battle_tag: str
+        """
+        self._states.pop(battle_tag, None)
+
+    def _hp_inputs(
+        self,
+        battle: AbstractBattle,
+        active: Optional[Pokemon],
+        opponent: Optional[Pokemon],
+    ) -> Any:
+        return (
+            tuple(mon.current_hp_fraction for mon in battle.team.values()),
+            tuple(mon.current_hp_fraction for mon in battle.opponent_team.values()),
+        )
+
+    def _write_hp(self, out: np.ndarray, inputs: Any):
+        team, opponent_team = inputs
+        team = team[: self.team_size]
+        opponent_team = opponent_team[: self.team_size]
+        out[: len(team)] = team
+        out[len(team) : self.team_size] = 0
+        out[self.team_size : self.team_size + len(opponent_team)] = opponent_team
+        out[self.team_size + len(opponent_team) :] = 1
+
+    def _boosts_inputs(
+        self,
+        battle: AbstractBattle,
+        active: Optional[Pokemon],
+        opponent: Optional[Pokemon],
+    ) -> Any:
+        return (
+            self._get_boosts(active.boosts) if active else None,
+            self._get_boosts(opponent.boosts) if opponent else None,
+        )
+
+    def _write_boosts(self, out: np.ndarray, inputs: Any):
+        n_boosts = len(self.BOOSTS)
+        for i, boosts in enumerate(inputs):
+            out[i * n_boosts : (i + 1) * n_boosts] = (
+                0 if boosts is None else [boost / 6 for boost in boosts]
+            )
+
+    def _types_inputs(
+        self,
+        battle: AbstractBattle,
+        active: Optional[Pokemon],
+        opponent: Optional[Pokemon],
+    ) -> Any:
+        return (
+            active.types if active else (),
+            opponent.types if opponent else (),
+        )
+
+    def _write_types(self, out: np.ndarray, inputs: Any):
+        out[:] = 0
+        for i, types in enumerate(inputs):
+            for type_ in types:
+                if type_ is None:
+                    continue
+                index = self._matchup.type_index(type_)
+                if index < self._n_types:
+                    out[i * self._n_types + index] = 1
+
+    def _status_inputs(
+        self,
+        battle: AbstractBattle,
+        active: Optional[Pokemon],
+        opponent: Optional[Pokemon],
+    ) -> Any:
+        return (
+            active.status if active else None,
+            opponent.status if opponent else None,
+        )
+
+    def _write_status(self, out: np.ndarray, inputs: Any):
+        out[:] = 0
+        for i, status in enumerate(inputs):
+            if status is not None:
+                out[i * len(self._status_index) + self._status_index[status]] = 1
+
+    def _moves_inputs(
+        self,
+        battle: AbstractBattle,
+        active: Optional[Pokemon],
+        opponent: Optional[Pokemon],
+    ) -> Any:
+        return (
+            tuple(
+                (move.base_power, move.type)
+                for move in battle.available_moves[: self.n_moves]
+            ),
+            opponent.types if opponent else (None, None),
+        )
+
+    def _write_moves(self, out: np.ndarray, inputs: Any):
+        moves, opponent_types = inputs
+        out[:] = -1
+        for i, (base_power, type_) in enumerate(moves):
+            out[i] = (
+                base_power / 100 * self._matchup.multiplier(type_, *opponent_types)
+            )
+
+    def _side_conditions_inputs(
+        self,
+        battle: AbstractBattle,
+        active: Optional[Pokemon],
+        opponent: Optional[Pokemon],
+    ) -> Any:
+        return (
+            tuple(battle.side_conditions.items()),
+            tuple(battle.opponent_side_conditions.items()),
+        )
+
+    def _write_side_conditions(self, out: np.ndarray, inputs: Any):
+        out[:] = 0
+        n_conditions = len(self._side_condition_index)
+        for i, conditions in enumerate(inputs):
+            for condition, value in conditions:
+                max_layers = STACKABLE_CONDITIONS.get(condition)
+                out[i * n_conditions + self._side_condition_index[condition]] = (
+                    1 if max_layers is None else min(value / max_layers, 1)
+                )
+
+    def _weather_inputs(
+        self,
+        battle: AbstractBattle,
+        active: Optional[Pokemon],
+        opponent: Optional[Pokemon],
+    ) -> Any:
+        return tuple(battle.weather)
+
+    def _write_weather(self, out: np.ndarray, inputs: Any):
+        out[:] = 0
+        for weather in inputs:
+            out[self._weather_index[weather]] = 1
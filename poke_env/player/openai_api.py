@@ -4,18 +4,33 @@ For a black-box implementation consider using the module env_player.
 from __future__ import annotations
 
 import asyncio
+import concurrent.futures
 import copy
 import random
+import threading
 import time
 from abc import ABC, abstractmethod
+from collections import deque
 from logging import Logger
-from typing import Any, Awaitable, Callable, Dict, Generic, List, Optional, Tuple, Union
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Deque,
+    Dict,
+    Generic,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
 
 from gymnasium.core import ActType, Env, ObsType
 from gymnasium.spaces import Discrete, Space
 
-from poke_env.concurrency import POKE_LOOP, create_in_poke_loop
+from poke_env.concurrency import POKE_LOOP
 from poke_env.environment.abstract_battle import AbstractBattle
+from poke_env.environment.battle_snapshot import BattleSnapshot
 from poke_env.player.battle_order import BattleOrder, ForfeitBattleOrder
 from poke_env.player.player import Player
 from poke_env.ps_client import AccountConfiguration
@@ -27,32 +42,113 @@ from poke_env.teambuilder.teambuilder import Teambuilder
 
 
 class _AsyncQueue:
-    def __init__(self, queue: asyncio.Queue[Any]):
-        self.queue = queue
+    """FIFO queue shared by event loops and synchronous threads.
+
+    Items are exchanged under a lock: synchronous calls wait on a condition and
+    coroutines on futures of their own loop, which are woken from whichever thread
+    changes the queue. No call goes through POKE_LOOP, so handing an action or an
+    observation over only costs a thread wakeup.
+
+    :param maxsize: Maximum number of items. If 0, the queue is unbounded.
+    :type maxsize: int
+    """
+
+    def __init__(self, maxsize: int = 0):
+        self.maxsize = maxsize
+        self._items: Deque[Any] = deque()
+        self._unfinished_tasks = 0
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+        self._waiters: List[Tuple[asyncio.AbstractEventLoop, asyncio.Future[None]]] = []
+
+    def _notify(self):
+        # Called with the lock held. Every waiter re-checks the queue, so wakeups
+        # consumed by cancelled coroutines are not lost
+        self._changed.notify_all()
+        for loop, waiter in self._waiters:
+            loop.call_soon_threadsafe(_wake_up, waiter)
+        self._waiters.clear()
+
+    def _add_waiter(self) -> asyncio.Future[None]:
+        # Called with the lock held
+        loop = asyncio.get_running_loop()
+        waiter = loop.create_future()
+        self._waiters.append((loop, waiter))
+        return waiter
+
+    def _full(self) -> bool:
+        return 0 < self.maxsize <= len(self._items)
+
+    def _put_locked(self, item: Any):
+        self._items.append(item)
+        self._unfinished_tasks += 1
+        self._notify()
+
+    def _get_locked(self) -> Any:
+        item = self._items.popleft()
+        self._notify()
+        return item
 
     async def async_get(self):
-        return await self.queue.get()
+        while True:
+            with self._lock:
+                if self._items:
+                    return self._get_locked()
+                waiter = self._add_waiter()
+            await waiter
 
     def get(self):
-        res = asyncio.run_coroutine_threadsafe(self.queue.get(), POKE_LOOP)
-        return res.result()
+        with self._changed:
+            self._changed.wait_for(lambda: self._items)
+            return self._get_locked()
 
     async def async_put(self, item: Any):
-        await self.queue.put(item)
+        while True:
+            with self._lock:
+                if not self._full():
+                    self._put_locked(item)
+                    return
+                waiter = self._add_waiter()
+            await waiter
 
     def put(self, item: Any):
-        task = asyncio.run_coroutine_threadsafe(self.queue.put(item), POKE_LOOP)
-        task.result()
+        with self._changed:
+            self._changed.wait_for(lambda: not self._full())
+            self._put_locked(item)
+
+    def put_nowait(self, item: Any):
+        with self._lock:
+            if self._full():
+                raise asyncio.QueueFull()
+            self._put_locked(item)
 
     def empty(self):
-        return self.queue.empty()
+        return not self._items
+
+    def task_done(self):
+        with self._lock:
+            if self._unfinished_tasks <= 0:
+                raise ValueError("task_done() called too many times")
+            self._unfinished_tasks -= 1
+            if not self._unfinished_tasks:
+                self._notify()
 
     def join(self):
-        task = asyncio.run_coroutine_threadsafe(self.queue.join(), POKE_LOOP)
-        task.result()
+        with self._changed:
+            self._changed.wait_for(lambda: not self._unfinished_tasks)
 
     async def async_join(self):
-        await self.queue.join()
+        while True:
+            with self._lock:
+                if not self._unfinished_tasks:
+                    return
+                waiter = self._add_waiter()
+            await waiter
+
+
+def _wake_up(waiter: asyncio.Future[None]):
+    if not waiter.done():
+        waiter.set_result(None)
 
 
 class _AsyncPlayer(Generic[ObsType, ActType], Player):
@@ -68,9 +164,10 @@ class _AsyncPlayer(Generic[ObsType, ActType], Player):
         self.__class__.__name__ = username
         super().__init__(**kwargs)
         self.__class__.__name__ = "_AsyncPlayer"
-        self.observations = _AsyncQueue(create_in_poke_loop(asyncio.Queue, 1))
-        self.actions = _AsyncQueue(create_in_poke_loop(asyncio.Queue, 1))
+        self.observations = _AsyncQueue(1)
+        self.actions = _AsyncQueue(1)
         self.current_battle: Optional[AbstractBattle] = None
+        self._battle_changed = threading.Condition()
         self._user_funcs = user_funcs
 
     def choose_move(self, battle: AbstractBattle) -> Awaitable[BattleOrder]:
@@ -78,7 +175,9 @@ class _AsyncPlayer(Generic[ObsType, ActType], Player):
 
     async def _env_move(self, battle: AbstractBattle) -> BattleOrder:
         if not self.current_battle or self.current_battle.finished:
-            self.current_battle = battle
+            with self._battle_changed:
+                self.current_battle = battle
+                self._battle_changed.notify_all()
         if not self.current_battle == battle:
             raise RuntimeError("Using different battles for queues")
         battle_to_send = self._user_funcs.embed_battle(battle)
@@ -92,6 +191,42 @@ class _AsyncPlayer(Generic[ObsType, ActType], Player):
         to_put = self._user_funcs.embed_battle(battle)
         asyncio.run_coroutine_threadsafe(self.observations.async_put(to_put), POKE_LOOP)
 
+    def wait_for_battle(
+        self, previous: Optional[AbstractBattle], timeout: Optional[float] = None
+    ) -> Optional[AbstractBattle]:
+        """Waits for the agent to start playing a battle other than previous.
+
+        :param previous: The battle to wait past, if any.
+        :type previous: AbstractBattle, optional
+        :param timeout: Maximum number of seconds to wait. If None, waits forever.
+        :type timeout: float, optional
+        :return: The current battle, which is previous if the timeout expired.
+        :rtype: AbstractBattle, optional
+        """
+        with self._battle_changed:
+            self._battle_changed.wait_for(
+                lambda: self.current_battle is not None
+                and self.current_battle is not previous,
+                timeout,
+            )
+            return self.current_battle
+
+
+def _episode_end(battle: AbstractBattle) -> Tuple[bool, bool]:
+    """Returns whether the episode of a battle is terminated or truncated. Finished
+    battles are terminated when exactly one side has no pokemon left, and truncated
+    otherwise, eg. after a forfeit or a tie."""
+    if not battle.finished:
+        return False, False
+    size = battle.team_size
+    remaining_mons = size - len([mon for mon in battle.team.values() if mon.fainted])
+    remaining_opponent_mons = size - len(
+        [mon for mon in battle.opponent_team.values() if mon.fainted]
+    )
+    if (remaining_mons == 0) != (remaining_opponent_mons == 0):
+        return True, False
+    return False, True
+
 
 class _ABCMetaclass(type(ABC)):
     pass
@@ -200,7 +335,7 @@ class OpenAIGymEnv(
         self.action_space = Discrete(self.action_space_size())  # type: ignore
         self.observation_space = self.describe_embedding()
         self.current_battle: Optional[AbstractBattle] = None
-        self.last_battle: Optional[AbstractBattle] = None
+        self.last_battle: Optional[BattleSnapshot] = None
         self._keep_challenging: bool = False
         self._challenge_task = None
         self._seed_initialized: bool = False
@@ -212,14 +347,14 @@ class OpenAIGymEnv(
 
     @abstractmethod
     def calc_reward(
-        self, last_battle: AbstractBattle, current_battle: AbstractBattle
+        self, last_battle: BattleSnapshot, current_battle: AbstractBattle
     ) -> float:
         """
         Returns the reward for the current battle state. The battle state in the previous
         turn is given as well and can be used for comparisons.
 
-        :param last_battle: The battle state in the previous turn.
-        :type last_battle: AbstractBattle
+        :param last_battle: A snapshot of the battle state in the previous turn.
+        :type last_battle: BattleSnapshot
         :param current_battle: The current battle state.
         :type current_battle: AbstractBattle
 
@@ -249,6 +384,9 @@ class OpenAIGymEnv(
         Returns the embedding of the current battle state in a format compatible with
         the OpenAI gym API.
 
+        ObservationEncoder provides a configurable encoding into NumPy arrays, with
+        the matching describe_embedding.
+
         :param battle: The current battle state.
         :type battle: AbstractBattle
 
@@ -311,13 +449,10 @@ class OpenAIGymEnv(
         elif not self._seed_initialized:
             super().reset(seed=int(time.time()))  # type: ignore
             self._seed_initialized = True
-        if not self.agent.current_battle:
-            count = self._INIT_RETRIES
-            while not self.agent.current_battle:
-                if count == 0:
-                    raise RuntimeError("Agent is not challenging")
-                count -= 1
-                time.sleep(self._TIME_BETWEEN_RETRIES)
+        if not self.agent.wait_for_battle(
+            None, self._INIT_RETRIES * self._TIME_BETWEEN_RETRIES
+        ):
+            raise RuntimeError("Agent is not challenging")
         if self.current_battle and not self.current_battle.finished:
             if self.current_battle == self.agent.current_battle:
                 self._actions.put(-1)
@@ -326,12 +461,8 @@ class OpenAIGymEnv(
                 raise RuntimeError(
                     "Environment and agent aren't synchronized. Try to restart"
                 )
-        while self.current_battle == self.agent.current_battle:
-            time.sleep(0.01)
-        self.current_battle = self.agent.current_battle
-        battle = copy.copy(self.current_battle)
-        battle.logger = None
-        self.last_battle = copy.deepcopy(battle)
+        self.current_battle = self.agent.wait_for_battle(self.current_battle)
+        self.last_battle = self.current_battle.snapshot()
         return self._observations.get(), self.get_additional_info()
 
     def get_additional_info(self) -> Dict[str, Any]:
@@ -359,30 +490,11 @@ class OpenAIGymEnv(
             return obs, 0.0, False, False, info
         if self.current_battle.finished:
             raise RuntimeError("Battle is already finished, call reset")
-        battle = copy.copy(self.current_battle)
-        battle.logger = None
-        self.last_battle = copy.deepcopy(battle)
+        self.last_battle = self.current_battle.snapshot()
         self._actions.put(action)
         observation = self._observations.get()
         reward = self.calc_reward(self.last_battle, self.current_battle)
-        terminated = False
-        truncated = False
-        if self.current_battle.finished:
-            size = self.current_battle.team_size
-            remaining_mons = size - len(
-                [mon for mon in self.current_battle.team.values() if mon.fainted]
-            )
-            remaining_opponent_mons = size - len(
-                [
-                    mon
-                    for mon in self.current_battle.opponent_team.values()
-                    if mon.fainted
-                ]
-            )
-            if (remaining_mons == 0) != (remaining_opponent_mons == 0):
-                terminated = True
-            else:
-                truncated = True
+        terminated, truncated = _episode_end(self.current_battle)
         return observation, reward, terminated, truncated, self.get_additional_info()
 
     def render(self, mode: str = "human"):
@@ -499,13 +611,7 @@ class OpenAIGymEnv(
             the final battle state.
         :type callback: Callable[[AbstractBattle], None], optional
         """
-        if self._challenge_task and not self._challenge_task.done():
-            count = self._SWITCH_CHALLENGE_TASK_RETRIES
-            while not self._challenge_task.done():
-                if count == 0:
-                    raise RuntimeError("Agent is already challenging")
-                count -= 1
-                time.sleep(self._TIME_BETWEEN_SWITCH_RETIRES)
+        self._wait_for_challenge_task()
         if not n_challenges:
             self._keep_challenging = True
         self._challenge_task = asyncio.run_coroutine_threadsafe(
@@ -547,19 +653,23 @@ class OpenAIGymEnv(
             copy of the final battle state.
         :type callback: Callable[[AbstractBattle], None], optional
         """
-        if self._challenge_task and not self._challenge_task.done():
-            count = self._SWITCH_CHALLENGE_TASK_RETRIES
-            while not self._challenge_task.done():
-                if count == 0:
-                    raise RuntimeError("Agent is already challenging")
-                count -= 1
-                time.sleep(self._TIME_BETWEEN_SWITCH_RETIRES)
+        self._wait_for_challenge_task()
         if not n_challenges:
             self._keep_challenging = True
         self._challenge_task = asyncio.run_coroutine_threadsafe(
             self._ladder_loop(n_challenges, callback), POKE_LOOP
         )
 
+    def _wait_for_challenge_task(self):
+        if self._challenge_task and not self._challenge_task.done():
+            concurrent.futures.wait(
+                [self._challenge_task],
+                timeout=self._SWITCH_CHALLENGE_TASK_RETRIES
+                * self._TIME_BETWEEN_SWITCH_RETIRES,
+            )
+            if not self._challenge_task.done():
+                raise RuntimeError("Agent is already challenging")
+
     async def _stop_challenge_loop(
         self, force: bool = True, wait: bool = True, purge: bool = False
     ):
@@ -580,9 +690,7 @@ class OpenAIGymEnv(
                 await self._actions.async_put(-1)
 
         if wait and self._challenge_task:
-            while not self._challenge_task.done():
-                await asyncio.sleep(1)
-            self._challenge_task.result()
+            await asyncio.wrap_future(self._challenge_task)
 
         self._challenge_task = None
         self.current_battle = None
@@ -7,11 +7,16 @@ from abc import ABC, abstractmethod
 from asyncio import Condition, Event, Queue, Semaphore
 from logging import Logger
 from time import perf_counter
-from typing import Any, Awaitable, Dict, List, Optional, Union
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple, Union
 
 import orjson
 
-from poke_env.concurrency import create_in_poke_loop, handle_threaded_coroutines
+from poke_env.concurrency import (
+    LoopWorkerPool,
+    create_in_poke_loop,
+    handle_threaded_coroutines,
+    run_in_poke_loop,
+)
 from poke_env.data import GenData, to_id_str
 from poke_env.environment.abstract_battle import AbstractBattle
 from poke_env.environment.battle import Battle
@@ -62,6 +67,8 @@ class Player(ABC):
         ping_interval: Optional[float] = 20.0,
         ping_timeout: Optional[float] = 20.0,
         team: Optional[Union[str, Teambuilder]] = None,
+        speculative_decisions: bool = False,
+        battle_workers: Union[int, LoopWorkerPool] = 0,
     ):
         """
         :param account_configuration: Player configuration. If empty, defaults to an
@@ -103,6 +110,21 @@ class Player(ABC):
             team string, a showdown packed team string, of a ShowdownTeam object.
             Defaults to None.
         :type team: str or Teambuilder, optional
+        :param speculative_decisions: Whether to start deciding on likely upcoming
+            requests before they are received. Currently, forced switches are
+            anticipated as soon as the active pokemon is seen fainting. The
+            speculative decision is used if the actual request offers the same
+            options, and discarded otherwise. Defaults to False.
+        :type speculative_decisions: bool
+        :param battle_workers: Number of worker threads parsing battle messages and
+            deciding moves, each with its own event loop, or a LoopWorkerPool
+            shared with other players. Messages of a battle are always handled by
+            the same worker, while the websocket stays in POKE_LOOP, which keeps it
+            responsive. Workers share the GIL: to use several cores, run players in
+            several processes, eg. with run_sharded_battles. A pool created from a
+            number of workers is closed when the player stops listening. If 0,
+            battle messages are handled in POKE_LOOP. Defaults to 0.
+        :type battle_workers: int or LoopWorkerPool
         """
         if account_configuration is None:
             account_configuration = self._create_account_configuration()
@@ -123,11 +145,26 @@ class Player(ABC):
         self.ps_client._handle_battle_message = self._handle_battle_message  # type: ignore
         self.ps_client._update_challenges = self._update_challenges  # type: ignore
         self.ps_client._handle_challenge_request = self._handle_challenge_request  # type: ignore
+        self.ps_client._stop_listening = self._stop_listening  # type: ignore
 
         self._format: str = battle_format
         self._max_concurrent_battles: int = max_concurrent_battles
         self._save_replays = save_replays
         self._start_timer_on_battle_start: bool = start_timer_on_battle_start
+        self._speculative_decisions: bool = speculative_decisions
+        self._speculations: Dict[AbstractBattle, Tuple[Tuple, asyncio.Future]] = {}
+        self._last_decision_keys: Dict[AbstractBattle, Tuple] = {}
+        # Pools created here are closed when the player stops listening, while
+        # shared ones are left to their owner
+        self._owns_battle_worker_pool = not isinstance(battle_workers, LoopWorkerPool)
+        if isinstance(battle_workers, LoopWorkerPool):
+            self._battle_worker_pool: Optional[LoopWorkerPool] = battle_workers
+        elif battle_workers:
+            self._battle_worker_pool = LoopWorkerPool(
+                battle_workers, name=f"{account_configuration.username}-battles"
+            )
+        else:
+            self._battle_worker_pool = None
 
         self._battles: Dict[str, AbstractBattle] = {}
         self._battle_semaphore: Semaphore = create_in_poke_loop(Semaphore, 0)
@@ -289,6 +326,14 @@ class Player(ABC):
             async with self._battle_start_condition:
                 await self._battle_start_condition.wait()
 
+    async def _stop_listening(self):
+        await PSClient._stop_listening(self.ps_client)
+        if self._owns_battle_worker_pool and self._battle_worker_pool is not None:
+            # Closing joins the workers' threads, which must not block POKE_LOOP
+            await asyncio.get_running_loop().run_in_executor(
+                None, self._battle_worker_pool.close
+            )
+
     async def _handle_battle_message(self, split_messages: List[List[str]]):
         """Handles a battle message.
 
@@ -306,315 +351,418 @@ class Player(ABC):
         else:
             battle = await self._get_battle(split_messages[0][0])
 
-        if len(split_messages) > 3:
-            msg = split_messages[3:]
-            idx = 0
-            while idx < len(msg):
-                if len(msg[idx]) == 1:
-                    break
+        if self._battle_worker_pool is None:
+            await self._process_battle_message(battle, split_messages)
+            return
+        try:
+            await self._battle_worker_pool.run(
+                battle.battle_tag, self._process_battle_message(battle, split_messages)
+            )
+        finally:
+            if battle.finished:
+                self._battle_worker_pool.release(battle.battle_tag)
 
-                description = ""
-                if msg[idx][1] == "start":
-                    description = "Battle start:"
-                    battle.speed_list = []
-
-                elif msg[idx][1] == "turn":
-                    if len(battle.speed_list) == 2:
-                        description = f" {battle.speed_list[0]} outspeeded {battle.speed_list[1]} in this turn."
-                    description += "[sep]Turn " + msg[idx][2] + ":"
-                    battle.speed_list = []
-
-                elif msg[idx][1] == "switch":
-                    # update hp information
-                    self.switch_set.add(msg[idx][2])
-                    try:
-                        battle.pokemon_hp_log_dict[msg[idx][2]].append(msg[idx][4])
-                    except:
-                        battle.pokemon_hp_log_dict[msg[idx][2]] = [msg[idx][4]]
-
-                    description = " " + msg[idx][2].split(" ")[0] + " sent out " + msg[idx][2].split(": ")[-1] + "."
-                    description = description.replace("p2a:", "Player2").replace("p1a:", "Player1")
-
-                elif msg[idx][1] == "drag":
-                    try:
-                        battle.pokemon_hp_log_dict[msg[idx][2]].append(msg[idx][4])
-                    except:
-                        battle.pokemon_hp_log_dict[msg[idx][2]] = [msg[idx][4]]
-
-                    description = " " + msg[idx][2] + "was dragged out."
-
-                elif msg[idx][1] == "faint":
-                    description = " " + msg[idx][2] + " faint."
-
-                elif msg[idx][1] == "move":
-                    description = " " + msg[idx][2] + " used "+ msg[idx][3] + "."
-                    battle.speed_list.append(msg[idx][2])
-
-                elif msg[idx][1] == "cant":
-                    if msg[idx][3] == "frz":
-                        reason = "frozen"
-                    elif msg[idx][3] == "par":
-                        reason = "paralyzed"
-                    elif msg[idx][3] == "slp":
-                        reason = "sleeping"
-                    else:
-                        reason = msg[idx][3]
-
-                    description = " " + msg[idx][2] + " cannot move because of " + reason + "."
-
-                elif msg[idx][1] == "-sidestart":
-                    if self.username in msg[idx][2]:
-                        target = "your team"
-                    else:
-                        target = "opponent's team"
-
-                    move_name = msg[idx][3]
-                    if move_name.startswith("move: "):
-                        move_name = move_name.replace("move: ", "")
-                    description = " " + move_name + " was set around " + target + "."
-
-                elif msg[idx][1] == "-sideend":
-                    if self.username in msg[idx][2]:
-                        target = "your"
-                    else:
-                        target = "opponent"
-                    description = " " + msg[idx][3] + "was removed from " + target + " team"
-
-                elif msg[idx][1] == "-start":
-                    description = " " + msg[idx][2] + " started " + msg[idx][3] + "."
-                    if len(msg[idx]) > 4:
-                        if msg[idx][4]:
-                            description = " " + msg[idx][2] + " started " + msg[idx][3] + " due to " + msg[idx][4] + "."
-
-                elif msg[idx][1] == "-end":
-                    description = " " + msg[idx][2] + " stop " + msg[idx][3] + "."
-
-                elif msg[idx][1] == "-fieldstart":
-                    description = " Field start: " + msg[idx][2] + " ran across the battlefield."
-
-                elif msg[idx][1] == "-fieldend":
-                    description = " Field end: " + msg[idx][2] + " disappeared from the battlefield."
-
-                elif msg[idx][1] == "-ability":
-                    description = " " + msg[idx][2] + "'s ability: " + msg[idx][3] + "."
-
-                elif msg[idx][1] == "-supereffective":
-                    description = " The move was super effective to " + msg[idx][2] + "."
-
-                elif msg[idx][1] == "-resisted":
-                    description = " The move was ineffective to " + msg[idx][2] + "."
-
-                elif msg[idx][1] == "-heal":
-                    try:
-                        previous_hp = battle.pokemon_hp_log_dict[msg[idx][2]][-1].split(" ")[0]
-                    except:
-                        previous_hp = "100/100"
-
-                    if previous_hp == "0":
-                        previous_hp_fraction = 0
-                    else:
-                        previous_hp_fraction = round(float(previous_hp.split("/")[0]) / float(previous_hp.split("/")[1]) * 100)
-
-                    current_hp = msg[idx][3].split(" ")[0]
-                    if current_hp == "0":
-                        current_hp_fraction = 0
-                    else:
-                        current_hp_fraction = round(float(current_hp.split("/")[0]) / float(current_hp.split("/")[1]) * 100)
-
-                    delta_hp_fraction = current_hp_fraction - previous_hp_fraction
-
-                    if len(msg[idx]) > 4:
-                        description = f" {msg[idx][2]} restored {delta_hp_fraction}% of HP ({current_hp_fraction}% left) {msg[idx][4]}."
-                    else:
-                        description = f" {msg[idx][2]} restored {delta_hp_fraction}% of HP ({current_hp_fraction}% left)."
-                    try:
-                        battle.pokemon_hp_log_dict[msg[idx][2]].append(msg[idx][3])
-                    except:
-                        battle.pokemon_hp_log_dict[msg[idx][2]] = [msg[idx][3]]
-
-                elif msg[idx][1] == "-damage":
-                    try:
-                        previous_hp = battle.pokemon_hp_log_dict[msg[idx][2]][-1].split(" ")[0]
-                    except:
-                        previous_hp = "100/100"
-
-                    if previous_hp == "0":
-                        previous_hp_fraction = 0
-                    else:
-                        previous_hp_fraction = round(float(previous_hp.split("/")[0]) / float(previous_hp.split("/")[1]) * 100)
-
-                    try:
-                        battle.pokemon_hp_log_dict[msg[idx][2]].append(msg[idx][3])
-                    except:
-                        battle.pokemon_hp_log_dict[msg[idx][2]] = [msg[idx][3]]
-
-                    current_hp = msg[idx][3].split(" ")[0]
-                    if current_hp == "0":
-                        current_hp_fraction = 0
-                    else:
-                        current_hp_fraction = round(float(current_hp.split("/")[0]) / float(current_hp.split("/")[1]) * 100)
-
-                    delta_hp_fraction = previous_hp_fraction - current_hp_fraction
-
-                    if current_hp_fraction == 100:
-                        idx += 1  # this is important !!
-                        continue  # no need to output
-
-                    if "oroark" in msg[idx][2]:  # Zoroark
-                        if len(msg[idx]) > 4:
-                            description = f" {msg[idx][2]}'s HP was damaged to {current_hp_fraction}% {msg[idx][4]}."
-                        else:
-                            description = f" It damaged {msg[idx][2]}'s HP to {current_hp_fraction}%."
-                    else:
-                        if len(msg[idx]) > 4:
-                            description = f" {msg[idx][2]}'s HP was damaged by {delta_hp_fraction}% {msg[idx][4]} ({current_hp_fraction}% left)."
-                        else:
-                            description = f" It damaged {msg[idx][2]}'s HP by {delta_hp_fraction}% ({current_hp_fraction}% left)."
-
-                elif msg[idx][1] == "-unboost":
-                    description = " It decreased " + msg[idx][2] + "'s " + msg[idx][3] + " " + msg[idx][4] + " level."
-
-                elif msg[idx][1] == "-boost":
-                    description = " It boosted " + msg[idx][2] + "'s " + msg[idx][3] + " " + msg[idx][4] + " level."
-
-                elif msg[idx][1] == "-fail":
-                    description = " But it failed."
-
-                elif msg[idx][1] == "-miss":
-                    description = " It missed."
-
-                elif msg[idx][1] == "-weather":
-                    # remove weather and put into the state
-                    pass
-                    # if len(msg[idx]) == 3:
-                    #     if msg[idx][2] == "None" or msg[idx][2] == "none":
-                    #         description = " Weather became normal."
-                    #     else:
-                    #         description = " Weather was " + msg[idx][2] + "."
-                    # else:
-                    #     if len(msg[idx]) == 4:
-                    #         description = " Weather was " + msg[idx][2] + " " + msg[idx][3] + "."
-                    #     else:
-                    #         description = " Weather was " + msg[idx][2] + " " + msg[idx][3] + " " + msg[idx][4] + "."
-
-                elif msg[idx][1] == "-activate":
-                    description = " " + msg[idx][2] + " activated " + msg[idx][3] + "."
-
-                elif msg[idx][1] == "-immune":
-                    description = f" but had zero effect to {msg[idx][2]}."
-
-                elif msg[idx][1] == "-crit":
-                    description = " A critical hit."
-
-                elif msg[idx][1] == "-status":
-                    status_dict = {"brn": "burnt", "frz": "frozen", "par": "paralyzed", "slp": "sleeping", "tox": "toxic", "psn": "poisoned"}
-                    description = " It caused " + msg[idx][2] + " " + status_dict[msg[idx][3]] + "."
-
-                if description:
-                    battle.battle_msg_history = battle.battle_msg_history + description
-                    # print(description)
-
-                idx += 1
-
-        for split_message in split_messages[1:]:
+    async def _process_battle_message(
+        self, battle: AbstractBattle, split_messages: List[List[str]]
+    ):
+        """Parses a battle message and reacts to it. Runs in the battle's worker
+        when battle workers are used.
+
+        :param battle: The battle.
+        :type battle: AbstractBattle
+        :param split_messages: The received battle message.
+        :type split_messages: List[List[str]]
+        """
+        # Each line is narrated in the battle's event log, for the history given
+        # to language models, then handled. Narration starts after the battle tag, the blank line and
+        # the timestamp, and stops at the first line without a message type.
+        narrate = True
+        for idx in range(1, len(split_messages)):
+            split_message = split_messages[idx]
             if len(split_message) <= 1:
+                if idx >= 3:
+                    narrate = False
                 continue
-            elif split_message[1] in self.MESSAGES_TO_IGNORE:
-                pass
-            elif split_message[1] == "request":
-                if split_message[2]:
-                    request = orjson.loads(split_message[2])
-                    battle.parse_request(request)
-                    if battle.move_on_next_request:
-                        await self._handle_battle_request(battle)
-                        battle.move_on_next_request = False
-            elif split_message[1] == "win" or split_message[1] == "tie":
-                if split_message[1] == "win":
-                    battle.won_by(split_message[2])
-                else:
-                    battle.tied()
-                await self._battle_count_queue.get()
-                self._battle_count_queue.task_done()
-                self._battle_finished_callback(battle)
-                async with self._battle_end_condition:
-                    self._battle_end_condition.notify_all()
-            elif split_message[1] == "error":
-                self.logger.log(
-                    25, "Error message received: %s", "|".join(split_message)
-                )
-                if split_message[2].startswith(
-                    "[Invalid choice] Sorry, too late to make a different move"
-                ):
-                    if battle.trapped:
-                        await self._handle_battle_request(battle)
-                elif split_message[2].startswith(
-                    "[Unavailable choice] Can't switch: The active Pokémon is "
-                    "trapped"
-                ) or split_message[2].startswith(
-                    "[Invalid choice] Can't switch: The active Pokémon is trapped"
-                ):
-                    battle.trapped = True
-                    await self._handle_battle_request(battle)
-                elif split_message[2].startswith(
-                    "[Invalid choice] Can't switch: You can't switch to an active "
-                    "Pokémon"
-                ):
-                    await self._handle_battle_request(battle, maybe_default_order=True)
-                elif split_message[2].startswith(
-                    "[Invalid choice] Can't switch: You can't switch to a fainted "
-                    "Pokémon"
-                ):
-                    await self._handle_battle_request(battle, maybe_default_order=True)
-                elif split_message[2].startswith(
-                    "[Invalid choice] Can't move: Invalid target for"
-                ):
-                    await self._handle_battle_request(battle, maybe_default_order=True)
-                elif split_message[2].startswith(
-                    "[Invalid choice] Can't move: You can't choose a target for"
-                ):
-                    await self._handle_battle_request(battle, maybe_default_order=True)
-                elif split_message[2].startswith(
-                    "[Invalid choice] Can't move: "
-                ) and split_message[2].endswith("needs a target"):
-                    await self._handle_battle_request(battle, maybe_default_order=True)
-                elif (
-                    split_message[2].startswith("[Invalid choice] Can't move: Your")
-                    and " doesn't have a move matching " in split_message[2]
-                ):
-                    await self._handle_battle_request(battle, maybe_default_order=True)
-                elif split_message[2].startswith(
-                    "[Invalid choice] Incomplete choice: "
-                ):
-                    await self._handle_battle_request(battle, maybe_default_order=True)
-                elif split_message[2].startswith(
-                    "[Unavailable choice]"
-                ) and split_message[2].endswith("is disabled"):
-                    battle.move_on_next_request = True
-                elif split_message[2].startswith("[Invalid choice]") and split_message[
-                    2
-                ].endswith("is disabled"):
-                    battle.move_on_next_request = True
-                elif split_message[2].startswith(
-                    "[Invalid choice] Can't move: You sent more choices than unfainted"
-                    " Pokémon."
-                ):
-                    await self._handle_battle_request(battle, maybe_default_order=True)
-                elif split_message[2].startswith(
-                    "[Invalid choice] Can't move: You can only Terastallize once per battle."
-                ):
-                    await self._handle_battle_request(battle, maybe_default_order=True)
-                else:
-                    self.logger.critical("Unexpected error message: %s", split_message)
-            elif split_message[1] == "turn":
-                battle.parse_message(split_message)
-                await self._handle_battle_request(battle)
-            elif split_message[1] == "teampreview":
+            message_type = split_message[1]
+
+            if narrate and idx >= 3:
+                narrator = self._battle_narrators.get(message_type)
+                if narrator is not None:
+                    battle.event_log.record(
+                        split_message, narrator(self, battle, split_message)
+                    )
+
+            if message_type in self.MESSAGES_TO_IGNORE:
+                continue
+            handler = self._battle_message_handlers.get(message_type)
+            if handler is None:
                 battle.parse_message(split_message)
-                await self._handle_battle_request(battle, from_teampreview_request=True)
-            elif split_message[1] == "bigerror":
-                self.logger.warning("Received 'bigerror' message: %s", split_message)
             else:
-                battle.parse_message(split_message)
+                await handler(self, battle, split_message)
+
+        if self._speculative_decisions:
+            if battle.finished:
+                self._discard_speculation(battle)
+                self._last_decision_keys.pop(battle, None)
+            else:
+                self._maybe_speculate(battle)
+
+    async def _handle_request_message(
+        self, battle: AbstractBattle, split_message: List[str]
+    ):
+        if split_message[2]:
+            request = orjson.loads(split_message[2])
+            battle.parse_request(request)
+            if battle.move_on_next_request:
+                await self._handle_battle_request(battle)
+                battle.move_on_next_request = False
+
+    async def _handle_win_message(
+        self, battle: AbstractBattle, split_message: List[str]
+    ):
+        if split_message[1] == "win":
+            battle.won_by(split_message[2])
+        else:
+            battle.tied()
+        self._battle_finished_callback(battle)
+        await run_in_poke_loop(self._release_battle_slot())
+
+    async def _release_battle_slot(self):
+        await self._battle_count_queue.get()
+        self._battle_count_queue.task_done()
+        async with self._battle_end_condition:
+            self._battle_end_condition.notify_all()
+
+    async def _handle_error_message(
+        self, battle: AbstractBattle, split_message: List[str]
+    ):
+        self.logger.log(
+            25, "Error message received: %s", "|".join(split_message)
+        )
+        if split_message[2].startswith(
+            "[Invalid choice] Sorry, too late to make a different move"
+        ):
+            if battle.trapped:
+                await self._handle_battle_request(battle)
+        elif split_message[2].startswith(
+            "[Unavailable choice] Can't switch: The active Pokémon is "
+            "trapped"
+        ) or split_message[2].startswith(
+            "[Invalid choice] Can't switch: The active Pokémon is trapped"
+        ):
+            battle.trapped = True
+            await self._handle_battle_request(battle)
+        elif split_message[2].startswith(
+            "[Invalid choice] Can't switch: You can't switch to an active "
+            "Pokémon"
+        ):
+            await self._handle_battle_request(battle, maybe_default_order=True)
+        elif split_message[2].startswith(
+            "[Invalid choice] Can't switch: You can't switch to a fainted "
+            "Pokémon"
+        ):
+            await self._handle_battle_request(battle, maybe_default_order=True)
+        elif split_message[2].startswith(
+            "[Invalid choice] Can't move: Invalid target for"
+        ):
+            await self._handle_battle_request(battle, maybe_default_order=True)
+        elif split_message[2].startswith(
+            "[Invalid choice] Can't move: You can't choose a target for"
+        ):
+            await self._handle_battle_request(battle, maybe_default_order=True)
+        elif split_message[2].startswith(
+            "[Invalid choice] Can't move: "
+        ) and split_message[2].endswith("needs a target"):
+            await self._handle_battle_request(battle, maybe_default_order=True)
+        elif (
+            split_message[2].startswith("[Invalid choice] Can't move: Your")
+            and " doesn't have a move matching " in split_message[2]
+        ):
+            await self._handle_battle_request(battle, maybe_default_order=True)
+        elif split_message[2].startswith(
+            "[Invalid choice] Incomplete choice: "
+        ):
+            await self._handle_battle_request(battle, maybe_default_order=True)
+        elif split_message[2].startswith(
+            "[Unavailable choice]"
+        ) and split_message[2].endswith("is disabled"):
+            battle.move_on_next_request = True
+        elif split_message[2].startswith("[Invalid choice]") and split_message[
+            2
+        ].endswith("is disabled"):
+            battle.move_on_next_request = True
+        elif split_message[2].startswith(
+            "[Invalid choice] Can't move: You sent more choices than unfainted"
+            " Pokémon."
+        ):
+            await self._handle_battle_request(battle, maybe_default_order=True)
+        elif split_message[2].startswith(
+            "[Invalid choice] Can't move: You can only Terastallize once per battle."
+        ):
+            await self._handle_battle_request(battle, maybe_default_order=True)
+        else:
+            self.logger.critical("Unexpected error message: %s", split_message)
+    async def _handle_turn_message(
+        self, battle: AbstractBattle, split_message: List[str]
+    ):
+        battle.parse_message(split_message)
+        await self._handle_battle_request(battle)
+
+    async def _handle_teampreview_message(
+        self, battle: AbstractBattle, split_message: List[str]
+    ):
+        battle.parse_message(split_message)
+        await self._handle_battle_request(battle, from_teampreview_request=True)
+
+    async def _handle_bigerror_message(
+        self, battle: AbstractBattle, split_message: List[str]
+    ):
+        self.logger.warning("Received 'bigerror' message: %s", split_message)
+
+    @classmethod
+    def register_battle_message_handler(
+        cls,
+        message_type: str,
+        handler: Callable[["Player", AbstractBattle, List[str]], Awaitable[Any]],
+    ):
+        """Registers the coroutine function handling a type of battle message at
+        the player level, replacing the current one if any. Messages without
+        player level handler are parsed by the battle. The handler is registered
+        on this class and its future subclasses only.
+
+        :param message_type: The message type, eg. `request`.
+        :type message_type: str
+        :param handler: The handler. It is called with the player, the battle and
+            the split message.
+        :type handler: Callable[[Player, AbstractBattle, List[str]], Awaitable]
+        """
+        cls._battle_message_handlers = {
+            **cls._battle_message_handlers,
+            message_type: handler,
+        }
+
+    @classmethod
+    def register_battle_narrator(
+        cls,
+        message_type: str,
+        narrator: Callable[["Player", AbstractBattle, List[str]], str],
+    ):
+        """Registers the function describing a type of battle message in the
+        battle's message history, replacing the current one if any. The narrator
+        is registered on this class and its future subclasses only.
+
+        :param message_type: The message type, eg. `move`.
+        :type message_type: str
+        :param narrator: The narrator. It is called with the player, the battle
+            and the split message, and returns the description to append, if any.
+        :type narrator: Callable[[Player, AbstractBattle, List[str]], str]
+        """
+        cls._battle_narrators = {**cls._battle_narrators, message_type: narrator}
+
+    def __init_subclass__(cls, **kwargs: Any):
+        super().__init_subclass__(**kwargs)
+        # Handlers and narrators overridden by the subclass replace the inherited
+        # ones
+        parent = cls.__mro__[1]
+        for attribute in ("_battle_message_handlers", "_battle_narrators"):
+            setattr(
+                cls,
+                attribute,
+                {
+                    message_type: getattr(cls, handler.__name__)
+                    if getattr(parent, handler.__name__, None) is handler
+                    else handler
+                    for message_type, handler in getattr(cls, attribute).items()
+                },
+            )
+
+    def _narrate_start(self, battle: AbstractBattle, msg: List[str]) -> str:
+        battle.speed_list = []
+        return "Battle start:"
+
+    def _narrate_turn(self, battle: AbstractBattle, msg: List[str]) -> str:
+        description = ""
+        if len(battle.speed_list) == 2:
+            description = f" {battle.speed_list[0]} outspeeded {battle.speed_list[1]} in this turn."
+        battle.speed_list = []
+        return description
+
+    def _narrate_switch(self, battle: AbstractBattle, msg: List[str]) -> str:
+        # update hp information
+        self.switch_set.add(msg[2])
+        battle.hp_timeline(msg[2]).append_hp_status(msg[4])
+
+        description = " " + msg[2].split(" ")[0] + " sent out " + msg[2].split(": ")[-1] + "."
+        return description.replace("p2a:", "Player2").replace("p1a:", "Player1")
+
+    def _narrate_drag(self, battle: AbstractBattle, msg: List[str]) -> str:
+        battle.hp_timeline(msg[2]).append_hp_status(msg[4])
+
+        return " " + msg[2] + "was dragged out."
+
+    def _narrate_faint(self, battle: AbstractBattle, msg: List[str]) -> str:
+        return " " + msg[2] + " faint."
+
+    def _narrate_move(self, battle: AbstractBattle, msg: List[str]) -> str:
+        battle.speed_list.append(msg[2])
+        return " " + msg[2] + " used " + msg[3] + "."
+
+    def _narrate_cant(self, battle: AbstractBattle, msg: List[str]) -> str:
+        if msg[3] == "frz":
+            reason = "frozen"
+        elif msg[3] == "par":
+            reason = "paralyzed"
+        elif msg[3] == "slp":
+            reason = "sleeping"
+        else:
+            reason = msg[3]
+
+        return " " + msg[2] + " cannot move because of " + reason + "."
+
+    def _narrate_side_start(self, battle: AbstractBattle, msg: List[str]) -> str:
+        if self.username in msg[2]:
+            target = "your team"
+        else:
+            target = "opponent's team"
+
+        move_name = msg[3]
+        if move_name.startswith("move: "):
+            move_name = move_name.replace("move: ", "")
+        return " " + move_name + " was set around " + target + "."
+
+    def _narrate_side_end(self, battle: AbstractBattle, msg: List[str]) -> str:
+        if self.username in msg[2]:
+            target = "your"
+        else:
+            target = "opponent"
+        return " " + msg[3] + "was removed from " + target + " team"
+
+    def _narrate_effect_start(self, battle: AbstractBattle, msg: List[str]) -> str:
+        if len(msg) > 4 and msg[4]:
+            return " " + msg[2] + " started " + msg[3] + " due to " + msg[4] + "."
+        return " " + msg[2] + " started " + msg[3] + "."
+
+    def _narrate_effect_end(self, battle: AbstractBattle, msg: List[str]) -> str:
+        return " " + msg[2] + " stop " + msg[3] + "."
+
+    def _narrate_field_start(self, battle: AbstractBattle, msg: List[str]) -> str:
+        return " Field start: " + msg[2] + " ran across the battlefield."
+
+    def _narrate_field_end(self, battle: AbstractBattle, msg: List[str]) -> str:
+        return " Field end: " + msg[2] + " disappeared from the battlefield."
+
+    def _narrate_ability(self, battle: AbstractBattle, msg: List[str]) -> str:
+        return " " + msg[2] + "'s ability: " + msg[3] + "."
+
+    def _narrate_supereffective(self, battle: AbstractBattle, msg: List[str]) -> str:
+        return " The move was super effective to " + msg[2] + "."
+
+    def _narrate_resisted(self, battle: AbstractBattle, msg: List[str]) -> str:
+        return " The move was ineffective to " + msg[2] + "."
+
+    def _narrate_heal(self, battle: AbstractBattle, msg: List[str]) -> str:
+        timeline = battle.hp_timeline(msg[2])
+        previous_hp_fraction = timeline.last_percentage
+        if previous_hp_fraction is None:
+            previous_hp_fraction = 100
+        timeline.append_hp_status(msg[3])
+        current_hp_fraction = timeline.last_percentage
+
+        delta_hp_fraction = current_hp_fraction - previous_hp_fraction
+
+        if len(msg) > 4:
+            description = f" {msg[2]} restored {delta_hp_fraction}% of HP ({current_hp_fraction}% left) {msg[4]}."
+        else:
+            description = f" {msg[2]} restored {delta_hp_fraction}% of HP ({current_hp_fraction}% left)."
+        return description
+
+    def _narrate_damage(self, battle: AbstractBattle, msg: List[str]) -> str:
+        timeline = battle.hp_timeline(msg[2])
+        previous_hp_fraction = timeline.last_percentage
+        if previous_hp_fraction is None:
+            previous_hp_fraction = 100
+        timeline.append_hp_status(msg[3])
+        current_hp_fraction = timeline.last_percentage
+
+        delta_hp_fraction = previous_hp_fraction - current_hp_fraction
+
+        if current_hp_fraction == 100:
+            return ""  # no need to output
+
+        if "oroark" in msg[2]:  # Zoroark
+            if len(msg) > 4:
+                return f" {msg[2]}'s HP was damaged to {current_hp_fraction}% {msg[4]}."
+            return f" It damaged {msg[2]}'s HP to {current_hp_fraction}%."
+        if len(msg) > 4:
+            return f" {msg[2]}'s HP was damaged by {delta_hp_fraction}% {msg[4]} ({current_hp_fraction}% left)."
+        return f" It damaged {msg[2]}'s HP by {delta_hp_fraction}% ({current_hp_fraction}% left)."
+
+    def _narrate_unboost(self, battle: AbstractBattle, msg: List[str]) -> str:
+        return " It decreased " + msg[2] + "'s " + msg[3] + " " + msg[4] + " level."
+
+    def _narrate_boost(self, battle: AbstractBattle, msg: List[str]) -> str:
+        return " It boosted " + msg[2] + "'s " + msg[3] + " " + msg[4] + " level."
+
+    def _narrate_fail(self, battle: AbstractBattle, msg: List[str]) -> str:
+        return " But it failed."
+
+    def _narrate_miss(self, battle: AbstractBattle, msg: List[str]) -> str:
+        return " It missed."
+
+    def _narrate_activate(self, battle: AbstractBattle, msg: List[str]) -> str:
+        return " " + msg[2] + " activated " + msg[3] + "."
+
+    def _narrate_immune(self, battle: AbstractBattle, msg: List[str]) -> str:
+        return f" but had zero effect to {msg[2]}."
+
+    def _narrate_crit(self, battle: AbstractBattle, msg: List[str]) -> str:
+        return " A critical hit."
+
+    def _narrate_status(self, battle: AbstractBattle, msg: List[str]) -> str:
+        status_dict = {"brn": "burnt", "frz": "frozen", "par": "paralyzed", "slp": "sleeping", "tox": "toxic", "psn": "poisoned"}
+        return " It caused " + msg[2] + " " + status_dict[msg[3]] + "."
+
+    # Weather is part of the battle state given to models, not of the narration
+    _battle_narrators: Dict[str, Callable[["Player", AbstractBattle, List[str]], str]] = {
+        "start": _narrate_start,
+        "turn": _narrate_turn,
+        "switch": _narrate_switch,
+        "drag": _narrate_drag,
+        "faint": _narrate_faint,
+        "move": _narrate_move,
+        "cant": _narrate_cant,
+        "-sidestart": _narrate_side_start,
+        "-sideend": _narrate_side_end,
+        "-start": _narrate_effect_start,
+        "-end": _narrate_effect_end,
+        "-fieldstart": _narrate_field_start,
+        "-fieldend": _narrate_field_end,
+        "-ability": _narrate_ability,
+        "-supereffective": _narrate_supereffective,
+        "-resisted": _narrate_resisted,
+        "-heal": _narrate_heal,
+        "-damage": _narrate_damage,
+        "-unboost": _narrate_unboost,
+        "-boost": _narrate_boost,
+        "-fail": _narrate_fail,
+        "-miss": _narrate_miss,
+        "-activate": _narrate_activate,
+        "-immune": _narrate_immune,
+        "-crit": _narrate_crit,
+        "-status": _narrate_status,
+    }
+
+    _battle_message_handlers: Dict[
+        str, Callable[["Player", AbstractBattle, List[str]], Awaitable[Any]]
+    ] = {
+        "request": _handle_request_message,
+        "win": _handle_win_message,
+        "tie": _handle_win_message,
+        "error": _handle_error_message,
+        "turn": _handle_turn_message,
+        "teampreview": _handle_teampreview_message,
+        "bigerror": _handle_bigerror_message,
+    }
 
     async def _handle_battle_request(
         self,
@@ -629,13 +777,109 @@ class Player(ABC):
                 return
             message = self.teampreview(battle)
         else:
-            message = self.choose_move(battle)
-            if isinstance(message, Awaitable):
-                message = await message
-            message = message.message
+            order = None
+            if self._speculative_decisions and isinstance(battle, Battle):
+                key = self._decision_key(
+                    battle,
+                    battle.force_switch,
+                    battle.available_moves,
+                    battle.available_switches,
+                )
+                self._last_decision_keys[battle] = key
+                order = await self._use_speculation(battle, key)
+            if order is None:
+                order = self.choose_move(battle)
+                if isinstance(order, Awaitable):
+                    order = await order
+            message = order.message
 
         await self.ps_client.send_message(message, battle.battle_tag)
 
+    @staticmethod
+    def _decision_key(
+        battle: Battle,
+        force_switch: bool,
+        available_moves: List[Move],
+        available_switches: List[Pokemon],
+    ) -> Tuple:
+        """Summarizes the options offered by a request, to check whether a
+        speculative decision is still relevant."""
+        return (
+            battle.turn,
+            force_switch,
+            tuple(move.id for move in available_moves),
+            tuple(sorted(mon.species for mon in available_switches)),
+        )
+
+    def _maybe_speculate(self, battle: AbstractBattle):
+        """Starts deciding on the request that most likely comes next, if it can
+        be anticipated from the battle events received so far."""
+        if not isinstance(battle, Battle) or battle.teampreview:
+            return
+        active = battle.active_pokemon
+        if active is None or not active.fainted:
+            return
+
+        # The active pokemon fainted: the next request will be a forced switch,
+        # to one of the pokemons that could already be switched in.
+        switches = [mon for mon in battle.available_switches if not mon.fainted]
+        if len(switches) < 2 or len(switches) != len(battle.available_switches):
+            return
+        key = self._decision_key(battle, True, [], switches)
+        if self._last_decision_keys.get(battle) == key:
+            return
+        if battle in self._speculations and self._speculations[battle][0] == key:
+            return
+
+        self._discard_speculation(battle)
+        self.logger.debug("Speculating on forced switch in %s", battle.battle_tag)
+        # The options of the previous request, such as the fainted pokemon's moves,
+        # are stale: decide on those of the expected request instead
+        battle.expect_forced_switch(switches)
+        self._speculations[battle] = (
+            key,
+            asyncio.ensure_future(self._speculate(battle)),
+        )
+
+    async def _speculate(self, battle: AbstractBattle) -> BattleOrder:
+        order = self.choose_move(battle)
+        if isinstance(order, Awaitable):
+            order = await order
+        return order
+
+    async def _use_speculation(
+        self, battle: AbstractBattle, key: Tuple
+    ) -> Optional[BattleOrder]:
+        speculation = self._speculations.pop(battle, None)
+        if speculation is None:
+            return None
+        speculated_key, task = speculation
+        if speculated_key != key:
+            task.cancel()
+            return None
+        try:
+            order = await task
+        except Exception:
+            self.logger.exception(
+                "Speculative decision failed in %s", battle.battle_tag
+            )
+            return None
+
+        # Only switches to one of the requested pokemons answer a forced switch
+        if not isinstance(order.order, Pokemon) or (
+            order.order not in battle.available_switches
+        ):
+            self.logger.debug(
+                "Dropping speculative order %s in %s", order, battle.battle_tag
+            )
+            return None
+        return order
+
+    def _discard_speculation(self, battle: AbstractBattle):
+        speculation = self._speculations.pop(battle, None)
+        if speculation is not None:
+            speculation[1].cancel()
+
     async def _handle_challenge_request(self, split_message: List[str]):
         """Handles an individual challenge."""
         challenging_player = split_message[2].strip()
@@ -705,7 +949,7 @@ class Player(ABC):
                 opponent = [to_id_str(o) for o in opponent]
             else:
                 opponent = to_id_str(opponent)
-        await self.ps_client.logged_in.wait()
+        await self.ps_client.wait_for_login(timeout=None)
         self.logger.debug("Event logged in received in accept_challenge")
 
         for _ in range(n_challenges):
@@ -897,7 +1141,7 @@ class Player(ABC):
         await handle_threaded_coroutines(self._ladder(n_games))
 
     async def _ladder(self, n_games: int):
-        await self.ps_client.logged_in.wait()
+        await self.ps_client.wait_for_login(timeout=None)
         start_time = perf_counter()
 
         for _ in range(n_games):
@@ -965,7 +1209,7 @@ class Player(ABC):
     async def _send_challenges(
         self, opponent: str, n_challenges: int, to_wait: Optional[Event] = None
     ):
-        await self.ps_client.logged_in.wait()
+        await self.ps_client.wait_for_login(timeout=None)
         self.logger.info("Event logged in received in send challenge")
 
         if to_wait is not None:
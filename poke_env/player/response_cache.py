@@ -0,0 +1,215 @@
+"""This module defines a cache for language model responses, which can be put in
+front of LLMPlayer's model calls.
+"""
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+import orjson
+
+
+class ResponseCache:
+    """LRU cache of model responses, optionally backed by a directory on disk.
+
+    Responses are keyed on a hash of everything that determines them: the
+    model adapter's configuration, including its sampling parameters, the
+    prompts and the sample index. The in-memory cache keeps the most recently
+    used entries; the on-disk cache persists responses across runs, for
+    instance between evaluation sweeps. Both are bounded in size, and entries
+    older than ``ttl`` are ignored and evicted.
+
+    The cache is thread-safe, as model calls are made from executor threads.
+
+    :param max_entries: Maximum number of responses kept in memory.
+    :type max_entries: int
+    :param ttl: Time to live of entries, in seconds. If None, entries never
+        expire.
+    :type ttl: float, optional
+    :param directory: Directory where responses are persisted. If None, the
+        cache is in-memory only.
+    :type directory: str, optional
+    :param max_disk_entries: Maximum number of responses kept on disk.
+    :type max_disk_entries: int
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 4096,
+        ttl: Optional[float] = None,
+        directory: Optional[str] = None,
+        max_disk_entries: int = 100_000,
+    ):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.directory = directory
+        self.max_disk_entries = max_disk_entries
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        self._lock = threading.Lock()
+        self._memory: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._disk_entries: "OrderedDict[str, float]" = OrderedDict()
+
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+            entries = []
+            for entry in os.scandir(directory):
+                if entry.name.endswith(".json"):
+                    entries.append((entry.stat().st_mtime, entry.name[:-5]))
+            for created, key in sorted(entries):
+                self._disk_entries[key] = created
+            self._evict_disk()
+
+    @staticmethod
+    def make_key(
+        backend: str,
+        system_prompt: str,
+        user_prompt: str,
+        sample: Any = None,
+    ) -> str:
+        """Computes the cache key of a model call.
+
+        :param backend: Description of the model backend, such as the repr of its
+            adapter, including its sampling parameters.
+        :type backend: str
+        :param system_prompt: The system prompt.
+        :type system_prompt: str
+        :param user_prompt: The user prompt.
+        :type user_prompt: str
+        :param sample: Identifies independent samples drawn for the same
+            prompts, such as samples voted on or retries, so that they are not
+            collapsed into a single response.
+        :return: The key.
+        :rtype: str
+        """
+        return hashlib.sha256(
+            orjson.dumps([backend, system_prompt, user_prompt, sample])
+        ).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """Returns the cached response for key, if there is a fresh one.
+
+        :param key: The key, computed with make_key.
+        :type key: str
+        :return: The cached response, or None.
+        :rtype: str, optional
+        """
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None and self._is_fresh(entry[0]):
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                del self._memory[key]
+
+            if key in self._disk_entries:
+                entry = self._read_from_disk(key)
+                if entry is not None and self._is_fresh(entry[0]):
+                    self._remember(key, entry)
+                    self.hits += 1
+                    self.disk_hits += 1
+                    return entry[1]
+                self._remove_from_disk(key)
+
+            self.misses += 1
+            return None
+
+    def put(self, key: str, response: str):
+        """Stores a response.
+
+        :param key: The key, computed with make_key.
+        :type key: str
+        :param response: The model's response.
+        :type response: str
+        """
+        entry = (time.time(), response)
+        with self._lock:
+            self._remember(key, entry)
+            if self.directory is not None:
+                self._write_to_disk(key, entry)
+
+    def clear(self):
+        """Removes every entry, in memory and on disk."""
+        with self._lock:
+            self._memory.clear()
+            for key in list(self._disk_entries):
+                self._remove_from_disk(key)
+
+    @property
+    def hit_rate(self) -> float:
+        """
+        :return: The fraction of lookups that were served from the cache.
+        :rtype: float
+        """
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    @property
+    def stats(self) -> Dict[str, Any]:
+        """
+        :return: The cache's hit / miss counters and sizes.
+        :rtype: Dict[str, Any]
+        """
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": self.hit_rate,
+            "memory_entries": len(self._memory),
+            "disk_entries": len(self._disk_entries),
+        }
+
+    def _is_fresh(self, created: float) -> bool:
+        return self.ttl is None or time.time() - created <= self.ttl
+
+    def _remember(self, key: str, entry: Tuple[float, str]):
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key + ".json")  # type: ignore
+
+    def _read_from_disk(self, key: str) -> Optional[Tuple[float, str]]:
+        try:
+            with open(self._path(key), "rb") as f:
+                created, response = orjson.loads(f.read())
+            return created, response
+        except (OSError, ValueError):
+            return None
+
+    def _write_to_disk(self, key: str, entry: Tuple[float, str]):
+        path = self._path(key)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(orjson.dumps(entry))
+            os.replace(tmp_path, path)
+        except OSError:
+            return
+        self._disk_entries[key] = entry[0]
+        self._disk_entries.move_to_end(key)
+        self._evict_disk()
+
+    def _remove_from_disk(self, key: str):
+        self._disk_entries.pop(key, None)
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
+
+    def _evict_disk(self):
+        while len(self._disk_entries) > self.max_disk_entries:
+            self._remove_from_disk(next(iter(self._disk_entries)))
+        if self.ttl is not None:
+            while self._disk_entries and not self._is_fresh(
+                next(iter(self._disk_entries.values()))
+            ):
+                self._remove_from_disk(next(iter(self._disk_entries)))
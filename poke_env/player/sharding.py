@@ -0,0 +1,170 @@
+"""This module runs battles between pairs of players hosted in several processes.
+"""
+
+import asyncio
+import multiprocessing
+import os
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, List, NamedTuple, Optional, Tuple
+
+from poke_env.environment.battle_event_log import BattleEvent
+from poke_env.player.player import Player
+from poke_env.ps_client.account_configuration import AccountConfiguration
+from poke_env.ps_client.server_configuration import (
+    LocalhostServerConfiguration,
+    ServerConfiguration,
+)
+
+PlayerFactory = Callable[..., Player]
+
+
+class BattleRecord(NamedTuple):
+    """Outcome of a battle played in a shard, from the point of view of the shard's
+    player. events holds the battle's event log, as kept by its BattleEventLog."""
+
+    shard: int
+    battle_tag: str
+    player_username: str
+    opponent_username: str
+    won: Optional[bool]
+    n_turns: int
+    events: Tuple[BattleEvent, ...] = ()
+
+
+class ShardedBattlesResult(NamedTuple):
+    """Merged results of battles played across shards."""
+
+    battles: List[BattleRecord]
+    n_shards: int
+
+    @property
+    def n_finished_battles(self) -> int:
+        return len(self.battles)
+
+    @property
+    def n_lost_battles(self) -> int:
+        return len([None for b in self.battles if b.won is False])
+
+    @property
+    def n_tied_battles(self) -> int:
+        return len([None for b in self.battles if b.won is None])
+
+    @property
+    def n_won_battles(self) -> int:
+        return len([None for b in self.battles if b.won])
+
+    @property
+    def win_rate(self) -> float:
+        if not self.battles:
+            return 0.0
+        return self.n_won_battles / self.n_finished_battles
+
+
+def run_sharded_battles(
+    player_factory: PlayerFactory,
+    opponent_factory: PlayerFactory,
+    n_battles: int,
+    n_shards: Optional[int] = None,
+    server_configuration: Optional[ServerConfiguration] = None,
+    username_prefix: str = "shard",
+) -> ShardedBattlesResult:
+    """Plays battles between two kinds of players in n_shards processes, and merges
+    their results.
+
+    Each process hosts its own pair of players, with their own accounts, event loop
+    and GIL, and plays its share of the battles with Player.battle_against. The
+    throughput of players limited by CPU time, such as heuristic players, therefore
+    scales with the number of cores.
+
+    Processes are started with the spawn method: factories must be picklable, eg.
+    classes or functools.partial objects wrapping them, and scripts calling this
+    function must guard their entry point with `if __name__ == "__main__":`.
+    Factories are called with the account_configuration and server_configuration
+    keyword arguments; the other arguments, such as battle_format or
+    max_concurrent_battles, must be bound beforehand. The event logs of the battles
+    are sent back with their records, while replays are written by the players, as
+    configured by the factories.
+
+    :param player_factory: Creates the player of each shard, which sends challenges.
+    :type player_factory: Callable[..., Player]
+    :param opponent_factory: Creates the opponent of each shard.
+    :type opponent_factory: Callable[..., Player]
+    :param n_battles: Total number of battles to play.
+    :type n_battles: int
+    :param n_shards: Number of processes. Defaults to the number of CPUs.
+    :type n_shards: int, optional
+    :param server_configuration: Server configuration. Defaults to Localhost Server
+        Configuration.
+    :type server_configuration: ServerConfiguration, optional
+    :param username_prefix: Prefix of the generated usernames, which also include a
+        random run identifier and the shard number.
+    :type username_prefix: str
+    :return: The records of the battles, from the point of view of the players
+        created by player_factory.
+    :rtype: ShardedBattlesResult
+    """
+    if n_shards is None:
+        n_shards = os.cpu_count() or 1
+    n_shards = max(1, min(n_shards, n_battles))
+    if server_configuration is None:
+        server_configuration = LocalhostServerConfiguration
+    run_id = uuid.uuid4().hex[:6]
+
+    shard_sizes = [
+        n_battles // n_shards + (1 if shard < n_battles % n_shards else 0)
+        for shard in range(n_shards)
+    ]
+    battles: List[BattleRecord] = []
+    with ProcessPoolExecutor(
+        max_workers=n_shards, mp_context=multiprocessing.get_context("spawn")
+    ) as executor:
+        futures = [
+            executor.submit(
+                _run_shard,
+                shard,
+                shard_size,
+                player_factory,
+                opponent_factory,
+                server_configuration,
+                f"{username_prefix}{run_id}{shard}",
+            )
+            for shard, shard_size in enumerate(shard_sizes)
+            if shard_size
+        ]
+        for future in futures:
+            battles.extend(future.result())
+    return ShardedBattlesResult(battles, n_shards)
+
+
+def _run_shard(
+    shard: int,
+    n_battles: int,
+    player_factory: PlayerFactory,
+    opponent_factory: PlayerFactory,
+    server_configuration: ServerConfiguration,
+    username: str,
+) -> List[BattleRecord]:
+    player = player_factory(
+        account_configuration=AccountConfiguration(f"{username}a", None),
+        server_configuration=server_configuration,
+    )
+    opponent = opponent_factory(
+        account_configuration=AccountConfiguration(f"{username}b", None),
+        server_configuration=server_configuration,
+    )
+    asyncio.run(player.battle_against(opponent, n_battles))
+
+    return [
+        BattleRecord(
+            shard=shard,
+            battle_tag=battle.battle_tag,
+            player_username=player.username,
+            opponent_username=opponent.username,
+            won=battle.won,
+            n_turns=battle.turn,
+            events=tuple(event for turn in battle.event_log for event in turn.events),
+        )
+        for battle in player.battles.values()
+        if battle.finished
+    ]
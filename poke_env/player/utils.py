@@ -4,7 +4,7 @@
 import asyncio
 import math
 from concurrent.futures import Future
-from typing import Dict, List, Optional, Tuple
+from typing import AsyncIterator, Dict, List, Optional, Tuple
 
 from poke_env.concurrency import POKE_LOOP
 from poke_env.data import to_id_str
@@ -33,30 +33,95 @@ async def cross_evaluate(
     results: Dict[str, Dict[str, Optional[float]]] = {
         p_1.username: {p_2.username: None for p_2 in players} for p_1 in players
     }
-    for i, p_1 in enumerate(players):
-        for j, p_2 in enumerate(players):
-            if j <= i:
-                continue
-            await asyncio.gather(
-                p_1.send_challenges(
-                    opponent=to_id_str(p_2.username),
-                    n_challenges=n_challenges,
-                    to_wait=p_2.ps_client.logged_in,
-                ),
-                p_2.accept_challenges(
-                    opponent=to_id_str(p_1.username),
-                    n_challenges=n_challenges,
-                    packed_team=p_2.next_team,
-                ),
-            )
-            results[p_1.username][p_2.username] = p_1.win_rate
-            results[p_2.username][p_1.username] = p_2.win_rate
-
-            p_1.reset_battles()
-            p_2.reset_battles()
+    async for p_1, p_2, p_1_win_rate, p_2_win_rate in stream_cross_evaluate(
+        players, n_challenges
+    ):
+        results[p_1][p_2] = p_1_win_rate
+        results[p_2][p_1] = p_2_win_rate
     return results
 
 
+async def stream_cross_evaluate(
+    players: List[Player], n_challenges: int
+) -> AsyncIterator[Tuple[str, str, float, float]]:
+    """Plays n_challenges battles between each pair of players, and yields the
+    results of each pair as soon as its battles are finished.
+
+    Pairs are scheduled in round-robin rounds, so that each player is in one pair
+    at a time while pairs of distinct players play concurrently. A pair starts as
+    soon as both of its players are done with their previous pairs, without
+    waiting for the rest of the round. Each player plays at most
+    max_concurrent_battles battles at once, as usual.
+
+    :param players: The players.
+    :type players: List[Player]
+    :param n_challenges: Number of battles played by each pair.
+    :type n_challenges: int
+    :return: Tuples of the usernames of the two players of a pair, followed by
+        their win rates against each other.
+    :rtype: AsyncIterator[Tuple[str, str, float, float]]
+    """
+    last_pair: Dict[int, "asyncio.Task[Tuple[str, str, float, float]]"] = {}
+    tasks = []
+    for i, j in _round_robin_pairs(len(players)):
+        previous = [last_pair[k] for k in (i, j) if k in last_pair]
+        task = asyncio.ensure_future(
+            _evaluate_pair(players[i], players[j], n_challenges, previous)
+        )
+        last_pair[i] = last_pair[j] = task
+        tasks.append(task)
+
+    try:
+        for task in asyncio.as_completed(tasks):
+            yield await task
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+async def _evaluate_pair(
+    p_1: Player,
+    p_2: Player,
+    n_challenges: int,
+    previous: List["asyncio.Task[Tuple[str, str, float, float]]"],
+) -> Tuple[str, str, float, float]:
+    for task in previous:
+        await task
+    await asyncio.gather(
+        p_1.send_challenges(
+            opponent=to_id_str(p_2.username),
+            n_challenges=n_challenges,
+            to_wait=p_2.ps_client.logged_in,
+        ),
+        p_2.accept_challenges(
+            opponent=to_id_str(p_1.username),
+            n_challenges=n_challenges,
+            packed_team=p_2.next_team,
+        ),
+    )
+    result = (p_1.username, p_2.username, p_1.win_rate, p_2.win_rate)
+
+    p_1.reset_battles()
+    p_2.reset_battles()
+    return result
+
+
+def _round_robin_pairs(n_players: int) -> List[Tuple[int, int]]:
+    """Lists the pairs of player indices, round by round, with the circle method.
+    In each round, every player is in at most one pair."""
+    order: List[Optional[int]] = list(range(n_players))
+    if n_players % 2:
+        order.append(None)
+    pairs = []
+    for _ in range(len(order) - 1):
+        for k in range(len(order) // 2):
+            i, j = order[k], order[-1 - k]
+            if i is not None and j is not None:
+                pairs.append((min(i, j), max(i, j)))
+        order.insert(1, order.pop())
+    return pairs
+
+
 def _estimate_strength_from_results(
     number_of_games: int, number_of_wins: int, opponent_rating: float
 ) -> Tuple[float, Tuple[float, float]]:
@@ -102,16 +167,51 @@ def _estimate_strength_from_results(
     return estimate, (lower_bound, higher_bound)
 
 
+def _is_precise_enough(
+    number_of_games: int, number_of_wins: int, max_error: float
+) -> bool:
+    """Checks whether the 95% confidence interval of a win rate is narrow enough.
+
+    :param number_of_games: Number of games played.
+    :type number_of_games: int
+    :param number_of_wins: Number of won games.
+    :type number_of_wins: int
+    :param max_error: Maximum half-width of the confidence interval.
+    :type max_error: float
+    :return: Whether the normal approximation applies and the half-width of the
+        interval is at most max_error.
+    :rtype: bool
+    """
+    if not number_of_games:
+        return False
+    n, p = number_of_games, number_of_wins / number_of_games
+    q = 1 - p
+    if n * p * q < 9:
+        return False
+    return math.sqrt(n * p * q) / n * 1.96 <= max_error
+
+
 def background_evaluate_player(
-    player: Player, n_battles: int = 1000, n_placement_battles: int = 30
+    player: Player,
+    n_battles: int = 1000,
+    n_placement_battles: int = 30,
+    max_error: Optional[float] = None,
+    batch_size: int = 10,
 ) -> "Future[Tuple[float, Tuple[float, float]]]":
     return asyncio.run_coroutine_threadsafe(
-        evaluate_player(player, n_battles, n_placement_battles), POKE_LOOP
+        evaluate_player(
+            player, n_battles, n_placement_battles, max_error, batch_size
+        ),
+        POKE_LOOP,
     )
 
 
 async def evaluate_player(
-    player: Player, n_battles: int = 1000, n_placement_battles: int = 30
+    player: Player,
+    n_battles: int = 1000,
+    n_placement_battles: int = 30,
+    max_error: Optional[float] = None,
+    batch_size: int = 10,
 ) -> Tuple[float, Tuple[float, float]]:
     """Estimate player strength.
 
@@ -127,7 +227,14 @@ async def evaluate_player(
     The actual evaluation can be performed against any baseline player for which an
     accurate strength estimate is available. This baseline is determined at the start of
     the process, by playing a limited number of placement battles and choosing the
-    opponent closest to the player in terms of performance.
+    opponent closest to the player in terms of performance. Placement battles against
+    the different baselines are played concurrently.
+
+    If max_error is set, the evaluation is adaptive: battles against the selected
+    baseline are played in batches of batch_size, and stop as soon as the 95%
+    confidence interval of the player's win rate against it is at most max_error
+    wide on each side. n_battles is then a budget, which is only reached if the
+    interval does not narrow enough before.
 
     :param player: The player to evaluate.
     :type player: Player
@@ -137,6 +244,12 @@ async def evaluate_player(
     :param n_placement_battles: Number of placement battles to perform per baseline
         player.
     :type n_placement_battles: int
+    :param max_error: Target half-width of the confidence interval of the win rate
+        against the selected baseline, eg. 0.05. If None, all battles are played.
+    :type max_error: float, optional
+    :param batch_size: Number of battles played between checks of the confidence
+        interval, when max_error is set. Defaults to 10.
+    :type batch_size: int
     :raises: ValueError if the results are too extreme to be interpreted.
     :raises: AssertionError if the player is not configured to play gen8battles or the
         selected number of games to play it too small.
@@ -169,8 +282,22 @@ async def evaluate_player(
     # Initial placement battles
     baselines = [p(max_concurrent_battles=n_battles) for p in _EVALUATION_RATINGS]
 
-    for p in baselines:
-        await p.battle_against(player, n_placement_battles)
+    await asyncio.gather(
+        *(
+            p.send_challenges(
+                to_id_str(player.username),
+                n_placement_battles,
+                to_wait=player.ps_client.logged_in,
+            )
+            for p in baselines
+        ),
+        # Challenges are accepted at once, as concurrent calls would compete for
+        # the player's challenge queue
+        player.accept_challenges(
+            [to_id_str(p.username) for p in baselines],
+            n_placement_battles * len(baselines),
+        ),
+    )
 
     # Select the best opponent for evaluation
     best_opp = min(
@@ -179,7 +306,15 @@ async def evaluate_player(
 
     # Performing the main evaluation
     remaining_battles = n_battles - len(_EVALUATION_RATINGS) * n_placement_battles
-    await best_opp.battle_against(player, remaining_battles)
+    if max_error is None:
+        await best_opp.battle_against(player, remaining_battles)
+    else:
+        while remaining_battles > 0 and not _is_precise_enough(
+            best_opp.n_finished_battles, best_opp.n_lost_battles, max_error
+        ):
+            batch = min(batch_size, remaining_battles)
+            await best_opp.battle_against(player, batch)
+            remaining_battles -= batch
 
     return _estimate_strength_from_results(
         best_opp.n_finished_battles,
@@ -0,0 +1,466 @@
+"""This module defines a vectorized environment, which plays several battles at once
+through the Gymnasium vector API.
+"""
+from __future__ import annotations
+
+import asyncio
+import random
+from abc import ABC, abstractmethod
+from copy import deepcopy
+from logging import Logger
+from typing import Any, Awaitable, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+from gymnasium.spaces import Discrete, MultiDiscrete, Space
+from gymnasium.utils import seeding
+from gymnasium.vector import AutoresetMode, VectorEnv
+from gymnasium.vector.utils import batch_space, concatenate, create_empty_array
+
+from poke_env.concurrency import POKE_LOOP
+from poke_env.environment.abstract_battle import AbstractBattle
+from poke_env.environment.battle_snapshot import BattleSnapshot
+from poke_env.player.battle_order import BattleOrder, ForfeitBattleOrder
+from poke_env.player.openai_api import _AsyncQueue, _episode_end
+from poke_env.player.player import Player
+from poke_env.ps_client import AccountConfiguration
+from poke_env.ps_client.server_configuration import (
+    LocalhostServerConfiguration,
+    ServerConfiguration,
+)
+from poke_env.teambuilder.teambuilder import Teambuilder
+
+
+class _VectorAsyncPlayer(Player):
+    """Player playing up to num_envs battles at once, each in a slot with its own
+    observation and action queues."""
+
+    def __init__(
+        self,
+        user_funcs: VectorOpenAIGymEnv,
+        username: str,
+        num_envs: int,
+        **kwargs: Any,
+    ):
+        self.__class__.__name__ = username
+        super().__init__(max_concurrent_battles=num_envs, **kwargs)
+        self.__class__.__name__ = "_VectorAsyncPlayer"
+        self.observations = [_AsyncQueue(1) for _ in range(num_envs)]
+        self.actions = [_AsyncQueue(1) for _ in range(num_envs)]
+        self.free_slots = _AsyncQueue()
+        for slot in range(num_envs):
+            self.free_slots.put_nowait(slot)
+        self.battle_slots: Dict[AbstractBattle, int] = {}
+        self.closing = False
+        self._user_funcs = user_funcs
+
+    def choose_move(self, battle: AbstractBattle) -> Awaitable[BattleOrder]:
+        return self._env_move(battle)
+
+    async def _env_move(self, battle: AbstractBattle) -> BattleOrder:
+        if self.closing:
+            return ForfeitBattleOrder()
+        slot = self.battle_slots.get(battle)
+        if slot is None:
+            slot = await self.free_slots.async_get()
+            self.battle_slots[battle] = slot
+        await self.observations[slot].async_put(
+            (battle, self._user_funcs.embed_battle(battle))
+        )
+        action = await self.actions[slot].async_get()
+        if action == -1:
+            return ForfeitBattleOrder()
+        return self._user_funcs.action_to_move(action, battle)
+
+    def _battle_finished_callback(self, battle: AbstractBattle):
+        slot = self.battle_slots.pop(battle, None)
+        if slot is None:
+            return
+        to_put = (battle, self._user_funcs.embed_battle(battle))
+        asyncio.run_coroutine_threadsafe(self._release_slot(slot, to_put), POKE_LOOP)
+
+    async def _release_slot(self, slot: int, to_put: Tuple[AbstractBattle, Any]):
+        # The final observation is queued before the slot can be reused, so that it
+        # is received before the first observation of the next battle
+        await self.observations[slot].async_put(to_put)
+        await self.free_slots.async_put(slot)
+
+
+class VectorOpenAIGymEnv(VectorEnv, ABC):
+    """
+    Base class implementing the Gymnasium vector API, with num_envs battles played at
+    once by a single player.
+
+    Each sub-environment is a slot, in which battles are played one after the
+    other. Observations are batched in arrays of shape (num_envs, ...), and steps
+    take one action per slot. Actions are exchanged with all slots in a single
+    round-trip with POKE_LOOP. When a battle finishes, its slot is reset
+    automatically within the same step: the returned observation is the first one
+    of the next battle, while the final observation is given in the `final_obs`
+    info, masked by `_final_obs`.
+
+    The opponent must be able to play num_envs battles at once, eg. a Player created
+    with max_concurrent_battles=num_envs.
+    """
+
+    metadata: Dict[str, Any] = {"autoreset_mode": AutoresetMode.SAME_STEP}
+
+    _INIT_TIMEOUT = 50.0
+    _BATTLES_PER_CHALLENGE_ROUND = 100
+
+    def __init__(
+        self,
+        num_envs: int,
+        account_configuration: Optional[AccountConfiguration] = None,
+        *,
+        avatar: Optional[int] = None,
+        battle_format: str = "gen8randombattle",
+        log_level: Optional[int] = None,
+        save_replays: Union[bool, str] = False,
+        server_configuration: Optional[
+            ServerConfiguration
+        ] = LocalhostServerConfiguration,
+        start_timer_on_battle_start: bool = False,
+        start_listening: bool = True,
+        ping_interval: Optional[float] = 20.0,
+        ping_timeout: Optional[float] = 20.0,
+        team: Optional[Union[str, Teambuilder]] = None,
+        start_challenging: bool = False,
+        copy: bool = True,
+    ):
+        """
+        :param num_envs: Number of battles played at once.
+        :type num_envs: int
+        :param copy: Whether reset and step return copies of the observations. If
+            False, they return the array the observations are batched into, which
+            is overwritten by the next call. Defaults to True.
+        :type copy: bool
+
+        The other parameters are the same as OpenAIGymEnv's.
+        """
+        self.num_envs = num_envs
+        self.agent = _VectorAsyncPlayer(
+            self,
+            username=self.__class__.__name__,  # type: ignore
+            num_envs=num_envs,
+            account_configuration=account_configuration,
+            avatar=avatar,
+            battle_format=battle_format,
+            log_level=log_level,
+            save_replays=save_replays,
+            server_configuration=server_configuration,
+            start_timer_on_battle_start=start_timer_on_battle_start,
+            start_listening=start_listening,
+            ping_interval=ping_interval,
+            ping_timeout=ping_timeout,
+            team=team,
+        )
+        self.single_action_space = Discrete(self.action_space_size())  # type: ignore
+        self.single_observation_space = self.describe_embedding()
+        self.action_space = MultiDiscrete([self.action_space_size()] * num_envs)
+        self.observation_space = batch_space(self.single_observation_space, num_envs)
+        self.copy = copy
+        self._observations = create_empty_array(
+            self.single_observation_space, num_envs
+        )
+
+        self.current_battles: List[Optional[AbstractBattle]] = [None] * num_envs
+        self.last_battles: List[Optional[BattleSnapshot]] = [None] * num_envs
+        self._keep_challenging: bool = False
+        self._challenge_task = None
+        if start_challenging:
+            self.start_challenging()
+
+    @abstractmethod
+    def calc_reward(
+        self, last_battle: BattleSnapshot, current_battle: AbstractBattle
+    ) -> float:
+        """
+        Returns the reward for the current state of a battle.
+
+        :param last_battle: A snapshot of the battle state in the previous step.
+        :type last_battle: BattleSnapshot
+        :param current_battle: The current battle state.
+        :type current_battle: AbstractBattle
+
+        :return: The reward for current_battle.
+        :rtype: float
+        """
+        pass
+
+    @abstractmethod
+    def action_to_move(self, action: int, battle: AbstractBattle) -> BattleOrder:
+        """
+        Returns the BattleOrder relative to the given action.
+
+        :param action: The action to take.
+        :type action: int
+        :param battle: The current battle state
+        :type battle: AbstractBattle
+
+        :return: The battle order for the given action in context of the battle.
+        :rtype: BattleOrder
+        """
+        pass
+
+    @abstractmethod
+    def embed_battle(self, battle: AbstractBattle) -> Any:
+        """
+        Returns the embedding of a battle state, which must belong to the space
+        returned by describe_embedding.
+
+        ObservationEncoder provides a configurable encoding into NumPy arrays, with
+        the matching describe_embedding.
+
+        :param battle: The battle state.
+        :type battle: AbstractBattle
+
+        :return: The embedding of the battle state.
+        """
+        pass
+
+    @abstractmethod
+    def describe_embedding(self) -> Space[Any]:
+        """
+        Returns the space of the embedding of a single battle.
+
+        :return: The description of the embedding.
+        :rtype: Space
+        """
+        pass
+
+    @abstractmethod
+    def action_space_size(self) -> int:
+        """
+        Returns the size of the action space of a single battle.
+
+        :return: The action space size.
+        :rtype: int
+        """
+        pass
+
+    @abstractmethod
+    def get_opponent(self) -> Union[Player, str, List[Player], List[str]]:
+        """
+        Returns the opponent (or list of opponents) challenged by the next round of
+        the challenge loop.
+
+        :return: The opponent (or list of opponents).
+        :rtype: Player or str or list(Player) or list(str)
+        """
+        pass
+
+    def _run(self, coro: Awaitable[Any]) -> Any:
+        return asyncio.run_coroutine_threadsafe(coro, POKE_LOOP).result()  # type: ignore
+
+    async def _next_observations(
+        self, slots: List[int], forfeit: bool = False
+    ) -> List[Tuple[AbstractBattle, Any]]:
+        """Waits for the next observation of each slot. If forfeit is set, the
+        battles of the slots are forfeited first, and the first observations of
+        their next battles are returned."""
+        if forfeit:
+            for slot in slots:
+                await self.agent.actions[slot].async_put(-1)
+            await asyncio.gather(
+                *(self.agent.observations[slot].async_get() for slot in slots)
+            )
+        try:
+            return await asyncio.wait_for(
+                asyncio.gather(
+                    *(self.agent.observations[slot].async_get() for slot in slots)
+                ),
+                self._INIT_TIMEOUT,
+            )
+        except asyncio.TimeoutError:
+            raise RuntimeError("Agent is not challenging")
+
+    async def _exchange(self, actions: List[int]) -> List[Tuple[AbstractBattle, Any]]:
+        for slot, action in enumerate(actions):
+            await self.agent.actions[slot].async_put(action)
+        return await asyncio.gather(
+            *(observations.async_get() for observations in self.agent.observations)
+        )
+
+    def reset(
+        self,
+        *,
+        seed: Optional[int] = None,
+        options: Optional[Dict[str, Any]] = None,
+    ) -> Tuple[np.ndarray, Dict[str, Any]]:
+        """Forfeits the battles in progress, and waits for a new battle in each
+        slot.
+
+        :return: The stacked observations and an empty info dict.
+        :rtype: Tuple[np.ndarray, Dict[str, Any]]
+        """
+        if seed is not None:
+            self._np_random, _ = seeding.np_random(seed)
+            random.seed(seed)
+        ongoing = [
+            slot
+            for slot, battle in enumerate(self.current_battles)
+            if battle is not None and not battle.finished
+        ]
+        waiting = [slot for slot in range(self.num_envs) if slot not in ongoing]
+        results = dict(zip(ongoing, self._run(self._next_observations(ongoing, True))))
+        results.update(zip(waiting, self._run(self._next_observations(waiting))))
+
+        observations = []
+        for slot in range(self.num_envs):
+            battle, observation = results[slot]
+            self.current_battles[slot] = battle
+            self.last_battles[slot] = battle.snapshot()
+            observations.append(observation)
+        return self._batch_observations(observations), {}
+
+    def step(
+        self, actions: Any
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, Dict[str, Any]]:
+        """
+        Plays one action in each slot.
+
+        :param actions: One action per slot.
+        :return: The stacked observations, rewards, termination and truncation flags,
+            and an info dict holding the final observations of finished battles.
+        :rtype: Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, Dict[str, Any]]
+        """
+        if any(battle is None for battle in self.current_battles):
+            observations, info = self.reset()
+            zeros = np.zeros(self.num_envs, dtype=bool)
+            return observations, np.zeros(self.num_envs), zeros, zeros.copy(), info
+
+        results = self._run(self._exchange([int(action) for action in actions]))
+        rewards = np.zeros(self.num_envs)
+        terminated = np.zeros(self.num_envs, dtype=bool)
+        truncated = np.zeros(self.num_envs, dtype=bool)
+        observations = []
+        finished = []
+        for slot, (battle, observation) in enumerate(results):
+            rewards[slot] = self.calc_reward(self.last_battles[slot], battle)
+            terminated[slot], truncated[slot] = _episode_end(battle)
+            if battle.finished:
+                finished.append(slot)
+            observations.append(observation)
+
+        info: Dict[str, Any] = {}
+        if finished:
+            final_observations = np.empty(self.num_envs, dtype=object)
+            for slot, (battle, observation) in zip(
+                finished, self._run(self._next_observations(finished))
+            ):
+                final_observations[slot] = observations[slot]
+                observations[slot] = observation
+                results[slot] = (battle, observation)
+            info["final_obs"] = final_observations
+            info["_final_obs"] = terminated | truncated
+
+        for slot, (battle, _) in enumerate(results):
+            self.current_battles[slot] = battle
+            self.last_battles[slot] = battle.snapshot()
+        return (
+            self._batch_observations(observations),
+            rewards,
+            terminated,
+            truncated,
+            info,
+        )
+
+    def _batch_observations(self, observations: List[Any]) -> Any:
+        # Observations are batched into a preallocated array, as SyncVectorEnv does
+        batch = concatenate(
+            self.single_observation_space, observations, self._observations
+        )
+        return deepcopy(batch) if self.copy else batch
+
+    async def _challenge_loop(self, n_challenges: Optional[int] = None):
+        while self._keep_challenging or n_challenges:
+            opponent = self.get_opponent()
+            if isinstance(opponent, list):
+                opponent = random.choice(opponent)
+            n_battles = self._BATTLES_PER_CHALLENGE_ROUND
+            if n_challenges:
+                n_battles = min(n_battles, n_challenges)
+                n_challenges -= n_battles
+            if isinstance(opponent, Player):
+                await self.agent.battle_against(opponent, n_battles)
+            else:
+                await self.agent.send_challenges(opponent, n_battles)
+
+    def start_challenging(self, n_challenges: Optional[int] = None):
+        """
+        Starts the challenge loop, which keeps up to num_envs battles running.
+
+        :param n_challenges: The number of battles to play. If empty it will run until
+            the environment is closed.
+        :type n_challenges: int, optional
+        """
+        if self._challenge_task and not self._challenge_task.done():
+            raise RuntimeError("Agent is already challenging")
+        self._keep_challenging = not n_challenges
+        self._challenge_task = asyncio.run_coroutine_threadsafe(
+            self._challenge_loop(n_challenges), POKE_LOOP
+        )
+
+    async def _stop_challenge_loop(self):
+        self._keep_challenging = False
+        self.agent.closing = True
+        if self._challenge_task is not None:
+            self._challenge_task.cancel()
+
+        # Battles waiting for an action are forfeited, and the others forfeit on
+        # their next request
+        deadline = asyncio.get_running_loop().time() + self._INIT_TIMEOUT
+        while any(not battle.finished for battle in self.agent.battles.values()):
+            if asyncio.get_running_loop().time() > deadline:
+                self.logger.warning("Battles still running after closing %s", self)
+                break
+            for slot in range(self.num_envs):
+                while not self.agent.observations[slot].empty():
+                    await self.agent.observations[slot].async_get()
+                if self.agent.actions[slot].empty():
+                    self.agent.actions[slot].put_nowait(-1)
+            await asyncio.sleep(0.1)
+
+        for queues in (self.agent.observations, self.agent.actions):
+            for queue in queues:
+                while not queue.empty():
+                    await queue.async_get()
+        self._challenge_task = None
+        self.current_battles = [None] * self.num_envs
+        self.last_battles = [None] * self.num_envs
+        self.agent.closing = False
+
+    def close(self, **kwargs: Any):
+        """Stops the challenge loop, forfeiting the battles in progress."""
+        self._run(self._stop_challenge_loop())
+        self.closed = True
+
+    def reset_battles(self):
+        """Resets the player's inner battle tracker."""
+        self.agent.reset_battles()
+
+    # Expose properties of Player class
+
+    @property
+    def battles(self) -> Dict[str, AbstractBattle]:
+        return self.agent.battles
+
+    @property
+    def n_finished_battles(self) -> int:
+        return self.agent.n_finished_battles
+
+    @property
+    def n_won_battles(self) -> int:
+        return self.agent.n_won_battles
+
+    @property
+    def win_rate(self) -> float:
+        return self.agent.win_rate
+
+    @property
+    def logger(self) -> Logger:
+        return self.agent.logger
+
+    @property
+    def username(self) -> str:
+        return self.agent.username
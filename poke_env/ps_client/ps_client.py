@@ -3,9 +3,9 @@
 import asyncio
 import json
 import logging
-from asyncio import CancelledError, Event, Lock, create_task, sleep
+import warnings
+from asyncio import CancelledError, Event, Future, Lock, create_task
 from logging import Logger
-from time import perf_counter
 from typing import Any, List, Optional, Set
 
 import requests
@@ -16,6 +16,7 @@ from poke_env.concurrency import (
     POKE_LOOP,
     create_in_poke_loop,
     handle_threaded_coroutines,
+    run_in_poke_loop,
 )
 from poke_env.exceptions import ShowdownException
 from poke_env.ps_client.account_configuration import AccountConfiguration
@@ -73,6 +74,11 @@ class PSClient:
         self._avatar = avatar
 
         self._logged_in: Event = create_in_poke_loop(Event)
+        self._login_result: Future[None] = create_in_poke_loop(Future)
+        # Failures are surfaced by wait_for_login, and may never be awaited
+        self._login_result.add_done_callback(
+            lambda f: f.cancelled() or f.exception()
+        )
         self._sending_lock = create_in_poke_loop(Lock)
 
         self.websocket: ws.WebSocketClientProtocol
@@ -148,6 +154,8 @@ class PSClient:
                 ]:
                     # Confirms successful login
                     self.logged_in.set()
+                    if not self._login_result.done():
+                        self._login_result.set_result(None)
                 elif not split_messages[0][2].startswith(" Guest "):
                     self.logger.warning(
                         """Trying to login as %s, showdown returned %s """
@@ -165,7 +173,9 @@ class PSClient:
                 self.logger.warning("Popup message received: %s", message)
             elif split_messages[0][1] in ["nametaken"]:
                 self.logger.critical("Error message received: %s", message)
-                raise ShowdownException("Error message received: %s", message)
+                exception = ShowdownException("Error message received: %s", message)
+                self._fail_login(exception)
+                raise exception
             elif split_messages[0][1] == "pm":
                 if len(split_messages) == 1:
                     if split_messages[0][4].startswith("/challenge"):
@@ -194,6 +204,16 @@ class PSClient:
             )
             raise exception
 
+    def _fail_login(self, exception: Exception):
+        """Resolves pending and future login waits with an exception, unless the
+        client is already logged in.
+
+        :param exception: The exception raised by wait_for_login.
+        :type exception: Exception
+        """
+        if not self._login_result.done():
+            self._login_result.set_exception(exception)
+
     async def _stop_listening(self):
         await self.websocket.close()
 
@@ -203,9 +223,10 @@ class PSClient:
         :param avatar_id: The new avatar id. If None, nothing happens.
         :type avatar_id: int
         """
-        await self.wait_for_login()
-        if avatar_id is not None:
-            await self.send_message(f"/avatar {avatar_id}")
+        if avatar_id is None:
+            return
+        await self.wait_for_login(timeout=None)
+        await self.send_message(f"/avatar {avatar_id}")
 
     async def listen(self):
         """Listen to a showdown websocket and dispatch messages to be handled."""
@@ -232,6 +253,12 @@ class PSClient:
             self.logger.critical("Listen interrupted by %s", e)
         except Exception as e:
             self.logger.exception(e)
+        finally:
+            self._fail_login(
+                ShowdownException(
+                    f"Connection with {self.websocket_url} closed before login"
+                )
+            )
 
     async def log_in(self, split_message: List[str]):
         """Log the player with specified username and password.
@@ -253,7 +280,18 @@ class PSClient:
                 },
             )
             self.logger.info("Sending authentication request")
-            assertion = json.loads(log_in_request.text[1:])["assertion"]
+            try:
+                assertion = json.loads(log_in_request.text[1:])["assertion"]
+            except (ValueError, KeyError, TypeError):
+                assertion = None
+            if not assertion or assertion.startswith(";;"):
+                exception = ShowdownException(
+                    "Authentication failed for %s: %s"
+                    % (self.username, assertion or log_in_request.text)
+                )
+                self.logger.critical(str(exception))
+                self._fail_login(exception)
+                raise exception
         else:
             self.logger.info("Bypassing authentication request")
             assertion = ""
@@ -284,7 +322,7 @@ class PSClient:
             to_send = "|".join([room, message, message_2])
         else:
             to_send = "|".join([room, message])
-        await self.websocket.send(to_send)
+        await run_in_poke_loop(self.websocket.send(to_send))
 
     async def set_team(self, packed_team: Optional[str]):
         if packed_team:
@@ -295,13 +333,49 @@ class PSClient:
     async def stop_listening(self):
         await handle_threaded_coroutines(self._stop_listening())
 
-    async def wait_for_login(self, checking_interval: float = 0.001, wait_for: int = 5):
-        start = perf_counter()
-        while perf_counter() - start < wait_for:
-            await sleep(checking_interval)
-            if self.logged_in:
-                return
-        assert self.logged_in, f"Expected player {self.username} to be logged in."
+    async def wait_for_login(
+        self,
+        timeout: Optional[float] = 5.0,
+        *,
+        checking_interval: Optional[float] = None,
+        wait_for: Optional[float] = None,
+    ):
+        """Waits for the client to be logged in.
+
+        :param timeout: Maximum number of seconds to wait. If None, waits until the
+            login succeeds or fails.
+        :type timeout: float, optional
+        :param checking_interval: Deprecated and ignored: the login is no longer
+            polled.
+        :type checking_interval: float, optional
+        :param wait_for: Deprecated alias of timeout.
+        :type wait_for: float, optional
+        :raises ShowdownException: If the name is taken, the authentication fails or
+            the connection is closed before login.
+        :raises asyncio.TimeoutError: If the client is not logged in before timeout.
+        """
+        if checking_interval is not None:
+            warnings.warn(
+                "checking_interval is deprecated and ignored.",
+                DeprecationWarning,
+                stacklevel=2,
+            )
+        if wait_for is not None:
+            warnings.warn(
+                "wait_for is deprecated, use timeout instead.",
+                DeprecationWarning,
+                stacklevel=2,
+            )
+            timeout = wait_for
+        await run_in_poke_loop(self._wait_for_login(timeout))
+
+    async def _wait_for_login(self, timeout: Optional[float]):
+        try:
+            await asyncio.wait_for(asyncio.shield(self._login_result), timeout)
+        except asyncio.TimeoutError:
+            raise asyncio.TimeoutError(
+                f"Expected player {self.username} to be logged in within {timeout}s."
+            )
 
     @property
     def account_configuration(self) -> AccountConfiguration: